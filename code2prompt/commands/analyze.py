@@ -1,15 +1,18 @@
 # code2prompt/commands/analyze.py
 
+import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 from code2prompt.commands.base_command import BaseCommand
 from code2prompt.utils.analyzer import (
     analyze_codebase,
+    count_tokens_by_extension,
     format_flat_output,
     format_tree_output,
     get_extension_list,
 )
+from code2prompt.utils.count_tokens import BATCH_THREADS
 
 
 class AnalyzeCommand(BaseCommand):
@@ -31,40 +34,41 @@ class AnalyzeCommand(BaseCommand):
         Args:
             path (Path): The path to analyze.
         """
-        extension_counts, extension_dirs = analyze_codebase(path)
+        # The files to tokenize are collected by the same walk
+        entries = [] if self.config.tokens else None
+        extension_counts, extension_dirs = analyze_codebase(path, self.config.gitignore, entries)
 
         if not extension_counts:
             self.logger.warning(f"No files found in {path}")
             return
 
+        extension_tokens = None
+        if entries is not None:
+            extension_tokens = self._count_tokens(entries)
+
         if self.config.format == "flat":
-            output = format_flat_output(extension_counts)
+            output = format_flat_output(extension_counts, extension_tokens)
         else:
-            output = format_tree_output(extension_dirs)
+            output = format_tree_output(extension_dirs, extension_tokens)
 
         print(output)
 
         print("\nComma-separated list of extensions:")
         print(get_extension_list(extension_counts))
 
-        if self.config.tokens:
-            total_tokens = self._count_tokens(extension_counts)
-            self.logger.info(f"Total tokens in codebase: {total_tokens}")
+        if extension_tokens is not None:
+            total_tokens = sum(sum(dirs.values()) for dirs in extension_tokens.values())
+            print(f"\nTotal tokens ({self.config.encoding}): {total_tokens:,}")
 
-    def _count_tokens(self, extension_counts: Dict[str, int]) -> int:
+    def _count_tokens(self, entries: List[os.DirEntry]) -> Dict[str, Dict[str, int]]:
         """
-        Count the total number of tokens in the codebase.
+        Count the tokens of the text files found by the analysis, per extension and directory.
 
         Args:
-            extension_counts (Dict[str, int]): A dictionary of file extensions and their counts.
+            entries (List[os.DirEntry]): The files, as collected by analyze_codebase.
 
         Returns:
-            int: The total number of tokens.
+            Dict[str, Dict[str, int]]: The tokens of each extension per directory.
         """
-        total_tokens = 0
-        for _ext, count in extension_counts.items():
-            # This is a simplified token count. You might want to implement a more
-            # sophisticated counting method based on the file type.
-            total_tokens += count * 100  # Assuming an average of 100 tokens per file
-
-        return total_tokens
+        workers = self.config.workers if self.config.workers > 1 else BATCH_THREADS
+        return count_tokens_by_extension(entries, self.config.encoding, workers=workers)
@@ -2,7 +2,9 @@
 
 from abc import ABC, abstractmethod
 import logging
+from typing import Optional
 from code2prompt.config import Configuration
+from code2prompt.core.file_caps import FileCaps
 
 class BaseCommand(ABC):
     """
@@ -63,6 +65,22 @@ class BaseCommand(ABC):
         """
         self.logger.error(f"Error in {self.__class__.__name__}: {str(error)}", exc_info=True)
 
+    def file_caps(self) -> Optional[FileCaps]:
+        """
+        Get the byte and token caps of each file from the configuration.
+
+        Returns:
+            Optional[FileCaps]: The caps, or None if neither is set.
+        """
+        if not (self.config.max_file_bytes or self.config.max_file_tokens):
+            return None
+        return FileCaps(
+            max_bytes=self.config.max_file_bytes,
+            max_tokens=self.config.max_file_tokens,
+            tail_fraction=self.config.elide_tail,
+            encoding=self.config.encoding,
+        )
+
     def validate_config(self) -> bool:
         """
         Validate the configuration for the command.
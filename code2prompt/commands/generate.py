@@ -3,65 +3,533 @@ This module contains the GenerateCommand class, which is responsible for generat
 markdown content from code files based on the provided configuration.
 """
 
-from typing import List, Dict, Any
-from code2prompt.core.process_files import process_files
-from code2prompt.core.generate_content import generate_content
+import logging
+from functools import partial
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from code2prompt.config import Configuration
+from code2prompt.core.compaction import parse_transforms
+from code2prompt.core.dedupe import dedupe_files
+from code2prompt.core.file_cache import FileCache, default_cache_dir
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.lazy_file import LazyFile
+from code2prompt.core.process_file import build_file_data, process_file
+from code2prompt.core.process_files import process_files, process_files_iter
+from code2prompt.core.stream_output import (
+    open_output_sink,
+    write_chunks,
+    write_markdown_stream,
+    write_split_markdown,
+)
+from code2prompt.core.template_processor import (
+    get_user_inputs,
+    load_template,
+    process_template,
+    stream_template,
+    template_uses_file_content,
+    template_uses_file_tokens,
+)
+from code2prompt.core.token_budget import PriorityRules, pack_files, parse_priority_weights
+from code2prompt.core.token_estimator import estimate_tokens
 from code2prompt.core.write_output import write_output
-from code2prompt.utils.count_tokens import count_tokens
-from code2prompt.utils.logging_utils import log_token_count
+from code2prompt.utils.count_tokens import count_tokens, count_tokens_batch
+from code2prompt.utils.logging_utils import (
+    log_duplicates,
+    log_elided_files,
+    log_output_parts,
+    log_token_budget,
+    log_token_count,
+    log_tokens_saved,
+)
 from code2prompt.utils.display_price_table import display_price_table
+from code2prompt.utils.display_token_estimate import display_token_estimate
+from code2prompt.utils.encoder_registry import warm_up
+from code2prompt.utils.generate_markdown_content import generate_markdown_content
+from code2prompt.utils.language_inference import infer_language
 from code2prompt.commands.base_command import BaseCommand
 
 
 class GenerateCommand(BaseCommand):
     """Command for generating markdown content from code files."""
 
+    def __init__(
+        self,
+        config: Configuration,
+        logger: logging.Logger,
+        file_records: Optional[List[FileRecord]] = None,
+        roots: Sequence[Path] = (),
+    ):
+        """
+        Initialize the GenerateCommand.
+
+        Args:
+            config (Configuration): The configuration object for the command.
+            logger (logging.Logger): The logger instance for the command.
+            file_records (Optional[List[FileRecord]]): The files to process, already
+                stat'ed and read during discovery. Defaults to the paths in config.path.
+            roots (Sequence[Path]): The directories the files were found in; the
+                --priority patterns match the paths relative to them.
+        """
+        super().__init__(config, logger)
+        self.file_records = file_records
+        self.roots = roots
+        self.template_content: Optional[str] = None
+        self.user_inputs: Dict[str, str] = {}
+        self.tokens_saved: List[Tuple[str, Dict[str, int]]] = []
+        self.elided_files: List[Dict[str, Any]] = []
+
     def execute(self) -> None:
         """Execute the generate command."""
         self.logger.info("Generating markdown...")
-        file_paths = self._process_files(syntax_map=self.config.syntax_map)  # Pass syntax_map here
-        content = self._generate_content(file_paths)
+        if self.config.template:
+            self.template_content = load_template(self.config.template)
+            self.user_inputs = get_user_inputs(self.template_content)
+            if template_uses_file_tokens(self.template_content):
+                warm_up(self.config.encoding)
+        if self.config.estimate:
+            self._estimate()
+            return
+        if self.config.split_tokens:
+            self._split()
+            self.logger.info("Generation complete.")
+            return
+        if self.config.stream:
+            self._stream()
+            self.logger.info("Generation complete.")
+            return
+        if self._use_lazy_files(count_total=True):
+            self._render_lazy()
+            self.logger.info("Generation complete.")
+            return
+
+        files_data = self._process_files(
+            syntax_map=self.config.syntax_map,  # Pass syntax_map here
+            encoding=self._token_encoding(count_total=True),
+        )
+        content = self._generate_content(files_data)
         self._write_output(content)
+        self._log_reports()
 
-        if self.config.price:
-            self.display_token_count_and_price(content)
-        elif self.config.tokens:
-            self.display_token_count(content)
+        if self.config.price or self.config.tokens:
+            token_count = self._count_output_tokens(files_data, content)
+            if self.config.price:
+                self._display_price(token_count)
+            else:
+                log_token_count(token_count)
 
         self.logger.info("Generation complete.")
 
-    def _process_files(self, syntax_map: dict) -> List[Dict[str, Any]]:
+    def _process_files(self, syntax_map: dict, encoding: Optional[str] = None) -> List[Dict[str, Any]]:
         """Process files based on the configuration."""
         all_files_data = []
-        files_data = process_files(
-            file_paths=self.config.path,
+        cache = self._open_cache(syntax_map) if self.config.cache else None
+        try:
+            if self.config.max_tokens:
+                files_data = self._pack_files(syntax_map, cache)
+            else:
+                files_data = process_files(
+                    file_paths=self.file_records if self.file_records is not None else self.config.path,
+                    line_number=self.config.line_number,
+                    no_codeblock=self.config.no_codeblock,
+                    suppress_comments=self.config.suppress_comments,
+                    syntax_map=syntax_map,  # Pass syntax_map here
+                    cache=cache,
+                    workers=self.config.workers,
+                    executor=self.config.executor,
+                    encoding=encoding,
+                    transforms=parse_transforms(self.config.compact),
+                    savings_encoding=self._savings_encoding(),
+                    caps=self.file_caps(),
+                )
+        finally:
+            if cache is not None:
+                cache.close()
+        all_files_data.extend(self._collect_reports(files_data))
+        if self.config.dedupe or self.config.near_duplicates:
+            all_files_data = self._dedupe(all_files_data)
+        return all_files_data
+
+    def _use_lazy_files(self, count_total: bool) -> bool:
+        """
+        Whether the template gets LazyFiles, so only the files it reads are processed.
+
+        Features that need every content up front, such as --max-tokens or
+        --dedupe, need the files processed beforehand, and so do templates that
+        read the contents when several workers can process them in parallel.
+
+        Args:
+            count_total (bool): Whether the total of the output is derived from the
+                per-file counts when --tokens or --price is given.
+        """
+        if not self.config.template:
+            return False
+        if self.config.max_tokens or self.config.dedupe or self.config.near_duplicates or self._savings_encoding():
+            return False
+        if count_total and (self.config.price or self.config.tokens):
+            return False
+        return self.config.workers == 1 or not template_uses_file_content(self.template_content)
+
+    def _lazy_files(self, cache: Optional[FileCache], encoding: Optional[str]) -> List[LazyFile]:
+        """
+        Wrap the files in LazyFiles that process them with the configured options
+        on first use.
+
+        When the template uses the contents or token counts, every file is read
+        anyway, so the files are processed now and those that are not valid UTF-8
+        are left out, as processing them up front would. Otherwise no file is read.
+        """
+        caps = self.file_caps()
+        process = partial(
+            process_file,
+            suppress_comments=self.config.suppress_comments,
+            line_number=self.config.line_number,
+            no_codeblock=self.config.no_codeblock,
+            syntax_map=self.config.syntax_map,
+            cache=cache,
+            transforms=parse_transforms(self.config.compact),
+            caps=caps,
+        )
+        files = [
+            LazyFile(record, process, self.config.syntax_map, self.config.no_codeblock, encoding)
+            for record in self._file_records()
+        ]
+        if template_uses_file_content(self.template_content) or template_uses_file_tokens(self.template_content):
+            files = [file for file in files if file.decodes()]
+        return files
+
+    def _render_lazy(self) -> None:
+        """Render the template over LazyFiles and write the output, reporting what the caps cut in the files read."""
+        cache = self._open_cache(self.config.syntax_map) if self.config.cache else None
+        try:
+            files_data = self._lazy_files(cache, self._token_encoding(count_total=False))
+            content = self._generate_content(files_data)
+        finally:
+            if cache is not None:
+                cache.close()
+        self._write_output(content)
+        list(self._collect_reports(file for file in files_data if file.loaded))
+        self._log_reports()
+
+    def _dedupe(self, files_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove the duplicate files, listing them on the file they duplicate, and report the tokens saved."""
+        result = dedupe_files(
+            files_data,
+            near_threshold=self.config.near_duplicates,
+            count_tokens=lambda text: count_tokens(text, self.config.encoding),
+        )
+        log_duplicates(result)
+        return result.files
+
+    def _open_cache(self, syntax_map: dict) -> FileCache:
+        """Open the file cache for the options that affect the processed contents."""
+        options = {
+            "suppress_comments": self.config.suppress_comments,
+            "line_number": self.config.line_number,
+            "encoding": self.config.encoding,
+            "syntax_map": syntax_map,
+            "compact": list(parse_transforms(self.config.compact)),
+            # Files cut by the caps are not cached, but a file cached whole must
+            # not be served when it is now above the token cap
+            "max_file_tokens": self.config.max_file_tokens,
+        }
+        return FileCache(
+            self.config.cache_dir or default_cache_dir(),
+            options,
+            max_size=self.config.cache_size * 1024 * 1024,
+        )
+
+    def _pack_files(self, syntax_map: dict, cache: Optional[FileCache]) -> List[Dict[str, Any]]:
+        """
+        Process the files that fit in --max-tokens, chosen by priority, and report
+        the files dropped.
+        """
+        records = self._file_records()
+        rules = PriorityRules(
+            parse_priority_weights(self.config.priority),
+            recency_half_life=self.config.recency_half_life,
+            size_penalty=self.config.size_penalty,
+            case_sensitive=self.config.case_sensitive,
+            roots=self.roots,
+        )
+        base = self._base_tokens()
+
+        def frame_tokens(records: List[FileRecord]) -> List[int]:
+            return self._frame_tokens(records, syntax_map, base)
+
+        def process(records: Iterable[FileRecord]) -> Iterator[Dict[str, Any]]:
+            # The greedy packer stops at the budget, so no file is tokenized ahead of it
+            token_batch_size = 1 if self.config.packer == "greedy" else None
+            return self._process_iter(records, syntax_map, cache, token_batch_size)
+
+        result = pack_files(
+            records, self.config.max_tokens - base, rules, frame_tokens, process, self.config.packer
+        )
+        log_token_budget(
+            len(result.files), len(records), base + result.tokens, self.config.max_tokens, result.dropped
+        )
+        return result.files
+
+    def _estimate(self) -> None:
+        """
+        Estimate the token count of the output from a sample of the files, and
+        display it with the price of the estimate if --price is given.
+        """
+        syntax_map = self.config.syntax_map
+        records = self._file_records()
+        base = self._base_tokens()
+
+        def measure(sample: List[FileRecord]) -> List[Tuple[int, int]]:
+            frames = self._frame_tokens(sample, syntax_map, base)
+            tokens = {
+                file_data["path"]: file_data["tokens"]
+                for file_data in self._process_iter(sample, syntax_map, cache=None)
+            }
+            # Files that cannot be decoded are left out of the output
+            return [
+                (tokens[str(record.path)], frame) if str(record.path) in tokens else (0, 0)
+                for record, frame in zip(sample, frames)
+            ]
+
+        estimate = estimate_tokens(
+            records,
+            lambda record: infer_language(record.path.name, syntax_map, record.head),
+            measure,
+            fixed_tokens=base,
+        )
+        display_token_estimate(estimate)
+        if self.config.price:
+            self._display_price(estimate.tokens)
+
+    def _file_records(self) -> List[FileRecord]:
+        """Return the records of the files to process."""
+        if self.file_records is not None:
+            return self.file_records
+        return [FileRecord.from_path(path) for path in self.config.path]
+
+    def _base_tokens(self) -> int:
+        """Count the tokens of the output without any file, e.g. the heading of the table of contents."""
+        return count_tokens(self._generate_content([]) or "", self.config.encoding)
+
+    def _frame_tokens(self, records: List[FileRecord], syntax_map: dict, base: int) -> List[int]:
+        """Count the tokens each file adds to the output besides its content, without reading it."""
+        frames = [
+            self._generate_content([
+                build_file_data(
+                    record,
+                    infer_language(record.path.name, syntax_map, record.head),
+                    "",
+                    self.config.no_codeblock,
+                )
+            ]) or ""
+            for record in records
+        ]
+        return [count - base for count in count_tokens_batch(frames, self.config.encoding)]
+
+    def _process_iter(
+        self,
+        records: Iterable[FileRecord],
+        syntax_map: dict,
+        cache: Optional[FileCache],
+        token_batch_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Process files lazily, in order, counting the tokens of each."""
+        return process_files_iter(
+            records,
             line_number=self.config.line_number,
             no_codeblock=self.config.no_codeblock,
             suppress_comments=self.config.suppress_comments,
-            syntax_map=syntax_map,  # Pass syntax_map here
+            syntax_map=syntax_map,
+            cache=cache,
+            workers=self.config.workers,
+            executor=self.config.executor,
+            encoding=self.config.encoding,
+            transforms=parse_transforms(self.config.compact),
+            savings_encoding=self._savings_encoding(),
+            caps=self.file_caps(),
+            token_batch_size=token_batch_size,
         )
-        all_files_data.extend(files_data)
-        return all_files_data
+
+    def _savings_encoding(self) -> Optional[str]:
+        """Return the encoding to count the tokens saved by --compact with, or None if they are not reported."""
+        if self.config.compact_report and self.config.compact:
+            return self.config.encoding
+        return None
+
+    def _collect_reports(self, files_data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass the files through, noting the tokens saved by the --compact transforms and what the caps cut."""
+        for file_data in files_data:
+            if "tokens_saved" in file_data:
+                self.tokens_saved.append((file_data["path"], file_data["tokens_saved"]))
+            if "elided_bytes" in file_data:
+                self.elided_files.append(file_data)
+            yield file_data
+
+    def _log_reports(self) -> None:
+        """Report the tokens saved by the --compact transforms, if asked to, and the files cut by the caps."""
+        if self._savings_encoding() is not None:
+            log_tokens_saved(self.tokens_saved)
+        if self.elided_files:
+            log_elided_files(self.elided_files)
+
+    def _token_encoding(self, count_total: bool) -> Optional[str]:
+        """
+        Return the encoding to count the tokens of each file with, or None if the
+        counts are not needed.
+
+        Args:
+            count_total (bool): Whether the total of the output is derived from the
+                per-file counts when --tokens or --price is given.
+        """
+        if count_total and (self.config.price or self.config.tokens):
+            return self.config.encoding
+        if self.config.template and template_uses_file_tokens(self.template_content):
+            return self.config.encoding
+        return None
+
+    def _stream(self) -> None:
+        """
+        Process the files one at a time and write their Markdown straight to the output.
+
+        Tokens are counted chunk by chunk. The output is not copied to the
+        clipboard, since that would need the whole content in memory.
+        """
+        count = None
+        if self.config.price or self.config.tokens:
+            def count(text: str) -> int:
+                return count_tokens(text, self.config.encoding)
+
+        lazy = self._use_lazy_files(count_total=False)
+        cache = self._open_cache(self.config.syntax_map) if self.config.cache else None
+        try:
+            if lazy:
+                files_data = self._lazy_files(cache, self._token_encoding(count_total=False))
+            elif self.config.max_tokens:
+                files_data = self._pack_files(self.config.syntax_map, cache)
+            else:
+                files_data = process_files_iter(
+                    file_paths=self.file_records if self.file_records is not None else self.config.path,
+                    line_number=self.config.line_number,
+                    no_codeblock=self.config.no_codeblock,
+                    suppress_comments=self.config.suppress_comments,
+                    syntax_map=self.config.syntax_map,
+                    cache=cache,
+                    workers=self.config.workers,
+                    executor=self.config.executor,
+                    # The chunks of a template are counted as they are written
+                    encoding=self._token_encoding(count_total=not self.config.template),
+                    transforms=parse_transforms(self.config.compact),
+                    savings_encoding=self._savings_encoding(),
+                    caps=self.file_caps(),
+                )
+            if not lazy:
+                files_data = self._collect_reports(files_data)
+            if self.config.template:
+                # Templates may iterate over the files several times, so they get
+                # the whole list; the rendered output is streamed
+                files_data = list(files_data)
+            with open_output_sink(self.config.output) as sink:
+                if self.config.template:
+                    token_count = write_chunks(
+                        stream_template(
+                            self.template_content,
+                            files_data,
+                            self.user_inputs,
+                            self.config.template,
+                        ),
+                        sink,
+                        count,
+                    )
+                else:
+                    token_count = write_markdown_stream(
+                        files_data, self.config.no_codeblock, sink, count
+                    )
+        finally:
+            if cache is not None:
+                cache.close()
+
+        self.logger.info("Streaming mode: the output is not copied to the clipboard.")
+        if lazy:
+            list(self._collect_reports(file for file in files_data if file.loaded))
+        self._log_reports()
+        if self.config.price:
+            self._display_price(token_count)
+        elif self.config.tokens:
+            log_token_count(token_count)
+
+    def _split(self) -> None:
+        """
+        Process the files one at a time and write them to parts of at most
+        --split-tokens tokens each, named after the output file.
+
+        Like streaming, this keeps memory bounded by a part, and the output is not
+        copied to the clipboard.
+        """
+        def count(text: str) -> int:
+            return count_tokens(text, self.config.encoding)
+
+        syntax_map = self.config.syntax_map
+        cache = self._open_cache(syntax_map) if self.config.cache else None
+        try:
+            if self.config.max_tokens:
+                files_data = self._pack_files(syntax_map, cache)
+            else:
+                files_data = self._process_iter(self._file_records(), syntax_map, cache)
+            parts = write_split_markdown(
+                self._collect_reports(files_data), self.config.no_codeblock, self.config.output, self.config.split_tokens, count
+            )
+        finally:
+            if cache is not None:
+                cache.close()
+
+        log_output_parts(parts, self.config.split_tokens)
+        self._log_reports()
+        token_count = sum(part.tokens for part in parts)
+        if self.config.price:
+            self._display_price(token_count)
+        elif self.config.tokens:
+            log_token_count(token_count)
 
     def _generate_content(self, files_data: List[Dict[str, Any]]) -> str:
         """Generate content from processed files data."""
-        return generate_content(files_data, self.config.dict())
+        if self.config.template:
+            return process_template(
+                self.template_content, files_data, self.user_inputs, self.config.template
+            )
+        return generate_markdown_content(files_data, self.config.no_codeblock)
 
     def _write_output(self, content: str) -> None:
         """Write the generated content to output."""
         write_output(content, self.config.output, copy_to_clipboard=True)
 
-    def display_token_count_and_price(self, content: str) -> None:
-        """Handle token counting and price calculation if enabled."""
-        token_count = count_tokens(content, self.config.encoding)
+    def _count_output_tokens(self, files_data: List[Dict[str, Any]], content: str) -> int:
+        """
+        Count the tokens of the output from the token counts of the files.
+
+        The file contents were tokenized in batch while they were processed, so
+        only the rest of the output is tokenized here: the output is rendered
+        again with empty contents. This needs every content to appear verbatim,
+        exactly once, in the output; otherwise, e.g. when a template escapes or
+        leaves out the contents, the whole output is tokenized. The total may
+        differ by a token or so per file from tokenizing the output as a whole,
+        where a content meets the text around it.
+        """
+        if content is not None and all("tokens" in file for file in files_data):
+            frame = self._generate_content([{**file, "content": ""} for file in files_data])
+            content_length = sum(len(file["content"]) for file in files_data)
+            if frame is not None and len(frame) + content_length == len(content):
+                return count_tokens(frame, self.config.encoding) + sum(
+                    file["tokens"] for file in files_data
+                )
+        return count_tokens(content, self.config.encoding)
+
+    def _display_price(self, token_count: int) -> None:
+        """Display the price table and the token count."""
         model = self.config.model
         provider = self.config.provider
-        display_price_table(token_count, provider, model, self.config.output_tokens)
-        log_token_count(token_count)
-
-        
-    def display_token_count(self, content: str) -> None:
-        """Display the token count if enabled."""
-        token_count = count_tokens(content, self.config.encoding)
+        display_price_table(
+            output_tokens=self.config.output_tokens,
+            provider=provider,
+            model=model,
+            token_count=token_count,
+        )
         log_token_count(token_count)
-        
@@ -0,0 +1,384 @@
+"""
+This module contains the WatchCommand class, which keeps the generated markdown
+up to date while the code files change.
+"""
+
+import os
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from code2prompt.commands.base_command import BaseCommand
+from code2prompt.core.compaction import parse_transforms
+from code2prompt.core.file_cache import FileCache, default_cache_dir
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.file_watcher import RESCAN, create_watcher, signature
+from code2prompt.core.process_file import process_file
+from code2prompt.core.template_processor import (
+    get_user_inputs,
+    load_template,
+    process_template,
+)
+from code2prompt.core.walk_directory import walk_directory
+from code2prompt.utils.count_tokens import count_tokens
+from code2prompt.utils.filter_spec import FilterSpec
+from code2prompt.utils.generate_markdown_content import (
+    format_file_section,
+    format_table_of_contents,
+)
+from code2prompt.utils.get_gitignore_patterns import get_gitignore_matcher
+from code2prompt.utils.gitignore_matcher import GitignoreTree
+from code2prompt.utils.logging_utils import log_token_count
+
+
+@lru_cache(maxsize=None)
+def _umask() -> int:
+    """Return the umask of the process, read on first use."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    # Elsewhere, reading the umask means setting it
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+class WatchCommand(BaseCommand):
+    """
+    Command for regenerating the markdown incrementally when files change.
+
+    The processed data, the markdown section and the token count of every file
+    are kept in memory. On a change only the touched files are read and
+    processed again; their sections are spliced between the unchanged ones and
+    the output file is replaced atomically. The set of files is only rediscovered
+    when files or directories that discovery would keep are added or removed, or
+    a .gitignore changes; ignored or filtered out paths, such as editor swap files
+    or build output, are skipped.
+    """
+
+    def __init__(self, config, logger):
+        super().__init__(config, logger)
+        self._filter_spec = FilterSpec.compile(
+            config.filter, config.exclude, config.case_sensitive
+        )
+        self._count = config.tokens or config.price
+        self._trees: Dict[Path, Optional[GitignoreTree]] = {}
+        self._order: List[str] = []
+        self._files: Dict[str, dict] = {}
+        self._sections: Dict[str, str] = {}
+        self._tokens: Dict[str, int] = {}
+        self._toc_tokens = 0
+        self._directories: List[str] = []
+        self._watched: Set[str] = set()
+        self._table_of_contents = ""
+        self._template: Optional[Tuple[str, dict]] = None
+
+    def execute(self) -> None:
+        """Build the output, then update it on every change until interrupted."""
+        self.build()
+        watcher = create_watcher(
+            self._scan, self.config.poll_interval, poll=self.config.poll
+        )
+        watcher.watch(self._directories)
+        self.logger.info(
+            "Watching %d files for changes; press Ctrl+C to stop.", len(self._order)
+        )
+        try:
+            while True:
+                changed = watcher.changes(timeout=1.0)
+                if changed:
+                    started = time.perf_counter()
+                    if self.update(changed):
+                        watcher.watch(self._directories)
+                        self.logger.info(
+                            "Updated %s in %.0f ms.",
+                            self.config.output,
+                            (time.perf_counter() - started) * 1000,
+                        )
+        except KeyboardInterrupt:
+            self.logger.info("Stopped watching.")
+        finally:
+            watcher.close()
+
+    def build(self) -> None:
+        """Discover and process all files, and write the output."""
+        if self.config.template:
+            template_content = load_template(self.config.template)
+            self._template = (template_content, get_user_inputs(template_content))
+
+        for path in self.config.path:
+            path = Path(path)
+            if path.is_dir():
+                self._trees[path] = GitignoreTree(
+                    path, get_gitignore_matcher(path, self.config.gitignore)
+                )
+            else:
+                self._trees[path] = None
+
+        discovered = self._discover()
+        cache = None
+        if self.config.cache:
+            cache = FileCache(
+                self.config.cache_dir or default_cache_dir(),
+                {
+                    "suppress_comments": self.config.suppress_comments,
+                    "line_number": self.config.line_number,
+                    "encoding": self.config.encoding,
+                    "syntax_map": self.config.syntax_map,
+                    "compact": list(parse_transforms(self.config.compact)),
+                    "max_file_tokens": self.config.max_file_tokens,
+                },
+                max_size=self.config.cache_size * 1024 * 1024,
+            )
+        try:
+            for path, entry in discovered:
+                self._load(path, entry, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+        self._order = [path for path, _ in discovered if path in self._files]
+        self._refresh_table_of_contents()
+        self._write()
+
+    def update(self, changed: Set[str]) -> bool:
+        """
+        Process the changed paths and rewrite the output if anything changed.
+
+        Args:
+            changed (Set[str]): Paths reported by the watcher.
+
+        Returns:
+            bool: True if the output was rewritten.
+        """
+        changed = {path for path in changed if path in self._files or self._affects_discovery(path)}
+        structural = any(path not in self._files for path in changed)
+        dirty = False
+
+        if structural:
+            for path in changed:
+                root = Path(os.path.dirname(path))
+                if os.path.basename(path) == ".gitignore" and self._trees.get(root) is not None:
+                    # Nested .gitignore files are reloaded by the tree; the root one is not
+                    self._trees[root] = GitignoreTree(
+                        root, get_gitignore_matcher(root, self.config.gitignore)
+                    )
+            discovered = self._discover()
+            paths = [path for path, _ in discovered]
+            known = set(self._files)
+            for path, entry in discovered:
+                if path not in known or path in changed:
+                    dirty |= self._load(path, entry)
+            for path in known.difference(paths):
+                self._drop(path)
+                dirty = True
+        else:
+            paths = self._order
+            for path in changed:
+                dirty |= self._load(path)
+
+        # Files may have been added, or dropped because they were deleted
+        order = [path for path in paths if path in self._files]
+        if order != self._order:
+            self._order = order
+            self._refresh_table_of_contents()
+            dirty = True
+
+        if dirty:
+            self._write()
+        return dirty
+
+    def _affects_discovery(self, path: str) -> bool:
+        """
+        Check whether a changed path that is not a known file may change the set
+        of files, without rescanning.
+
+        Args:
+            path (str): A path reported by the watcher.
+
+        Returns:
+            bool: True if the files must be rediscovered.
+        """
+        if path == RESCAN or os.path.basename(path) == ".gitignore":
+            return True
+        if path in self._watched:
+            # A directory that was walked changed or went away
+            return True
+        if not os.path.lexists(path):
+            # Neither a known file nor a walked directory
+            return False
+        for root, tree in self._trees.items():
+            if tree is None:
+                if path == str(root):
+                    return True
+                continue
+            prefix = os.path.join(root, "")
+            if not path.startswith(prefix):
+                continue
+            relative = path[len(prefix):]
+            if os.sep != "/":
+                relative = relative.replace(os.sep, "/")
+            is_dir = os.path.isdir(path)
+            if tree.is_ignored(relative, is_dir):
+                return False
+            if is_dir:
+                return not self._filter_spec.excludes_directory(relative)
+            return self._filter_spec.matches(relative)
+        return False
+
+    def _discover(self) -> List[Tuple[str, Optional[os.DirEntry]]]:
+        """List the files to include, in output order, and the directories to watch."""
+        discovered: List[Tuple[str, Optional[os.DirEntry]]] = []
+        directories: List[str] = []
+        for path, tree in self._trees.items():
+            if tree is None:
+                if path.is_file():
+                    discovered.append((str(path), None))
+                directories.append(str(path.parent))
+                continue
+            prefix = os.path.join(path, "")
+            for entry in walk_directory(
+                path,
+                tree,
+                self._filter_spec,
+                workers=self.config.discovery_workers,
+                directories=directories,
+            ):
+                relative = entry.path[len(prefix):]
+                if os.sep != "/":
+                    relative = relative.replace(os.sep, "/")
+                if self._filter_spec.matches(relative):
+                    discovered.append((entry.path, entry))
+        self._directories = directories
+        self._watched = set(directories)
+        return discovered
+
+    def _scan(self) -> Dict[str, Tuple[int, int, int]]:
+        """Return the stat signature of every file, for the polling watcher."""
+        signatures = {}
+        for path, entry in self._discover():
+            try:
+                stat_result = entry.stat() if entry is not None else os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = signature(stat_result)
+        return signatures
+
+    def _load(
+        self,
+        path: str,
+        entry: Optional[os.DirEntry] = None,
+        cache: Optional[FileCache] = None,
+    ) -> bool:
+        """
+        Process a file and update its section.
+
+        Returns:
+            bool: True if the section of the file changed.
+        """
+        # Files given on the command line are included even if they look binary
+        explicit = Path(path) in self._trees
+        try:
+            record = FileRecord.from_entry(entry) if entry is not None else FileRecord.from_path(path)
+            caps = self.file_caps()
+            # Files above the byte cap are never read in full
+            oversized = caps is not None and caps.exceeds_bytes(record)
+            keep = record.is_regular and (
+                explicit or not (record.sniff_binary() if oversized else record.is_binary)
+            )
+            file_data = (
+                process_file(
+                    record,
+                    suppress_comments=self.config.suppress_comments,
+                    line_number=self.config.line_number,
+                    no_codeblock=self.config.no_codeblock,
+                    syntax_map=self.config.syntax_map,
+                    cache=cache,
+                    transforms=parse_transforms(self.config.compact),
+                    caps=caps,
+                )
+                if keep
+                else None
+            )
+        except OSError as e:
+            self.logger.debug("Skipping %s: %s", path, e)
+            file_data = None
+
+        if file_data is None:
+            if path in self._files:
+                self._drop(path)
+                return True
+            return False
+
+        section = format_file_section(file_data, self.config.no_codeblock)
+        self._files[path] = file_data
+        if self._sections.get(path) == section:
+            return False
+        self._sections[path] = section
+        if self._count:
+            self._tokens[path] = count_tokens(section, self.config.encoding)
+        return True
+
+    def _drop(self, path: str) -> None:
+        self._files.pop(path, None)
+        self._sections.pop(path, None)
+        self._tokens.pop(path, None)
+
+    def _refresh_table_of_contents(self) -> None:
+        self._table_of_contents = format_table_of_contents(
+            [self._files[path] for path in self._order]
+        )
+        if self._count:
+            self._toc_tokens = count_tokens(self._table_of_contents, self.config.encoding)
+
+    def render(self) -> str:
+        """
+        Render the output from the files in memory.
+
+        Returns:
+            str: The markdown, or the rendered template if one is configured.
+        """
+        if self._template is not None:
+            template_content, user_inputs = self._template
+            files_data = [self._files[path] for path in self._order]
+            return process_template(
+                template_content, files_data, user_inputs, self.config.template
+            )
+        return self._table_of_contents + "".join(
+            self._sections[path] for path in self._order
+        )
+
+    @property
+    def token_count(self) -> int:
+        """int: The sum of the token counts of the table of contents and the sections."""
+        return self._toc_tokens + sum(self._tokens.values())
+
+    def _write(self) -> None:
+        """Replace the output file atomically, so readers never see a partial file."""
+        content = self.render()
+        output = Path(self.config.output)
+        fd, temporary = tempfile.mkstemp(
+            dir=output.parent, prefix=f".{output.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(content)
+            # mkstemp creates the file as 0600; use the mode open() would have used
+            os.chmod(temporary, 0o666 & ~_umask())
+            os.replace(temporary, output)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        if self._count:
+            token_count = (
+                count_tokens(content, self.config.encoding)
+                if self._template is not None
+                else self.token_count
+            )
+            log_token_count(token_count)
@@ -0,0 +1,24 @@
+from .c_style import strip_c_style_comments
+from .html_style import strip_html_style_comments
+from .languages import COMMENT_SYNTAX
+from .lexer import CommentSyntax, strip_comments_with_syntax
+from .matlab_style import strip_matlab_style_comments
+from .python_style import strip_python_style_comments
+from .r_style import strip_r_style_comments
+from .shell_style import strip_shell_style_comments
+from .sql_style import strip_sql_style_comments
+from .strip_comments import strip_comments
+
+__all__ = [
+    "COMMENT_SYNTAX",
+    "CommentSyntax",
+    "strip_c_style_comments",
+    "strip_comments",
+    "strip_comments_with_syntax",
+    "strip_html_style_comments",
+    "strip_matlab_style_comments",
+    "strip_python_style_comments",
+    "strip_r_style_comments",
+    "strip_shell_style_comments",
+    "strip_sql_style_comments",
+]
@@ -1,5 +1,7 @@
-import re
+from .languages import HTML_STYLE
+from .lexer import strip_comments_with_syntax
+
 
 def strip_html_style_comments(code: str) -> str:
-    pattern = re.compile(r"<!--.*?-->", re.DOTALL)
-    return re.sub(pattern, "", code)
+    """Strips HTML-style comments (<!-- -->) from the given code."""
+    return strip_comments_with_syntax(code, HTML_STYLE)
@@ -0,0 +1,130 @@
+"""
+This module contains the comment syntax of each language known to infer_language.
+
+Languages without comments (e.g. JSON or plain text) map to NO_COMMENTS, so
+every language has an entry and their code is left unchanged.
+"""
+
+from typing import Dict
+
+from .lexer import CommentSyntax
+
+NO_COMMENTS = CommentSyntax()
+
+C_STYLE = CommentSyntax(line=("//",), block=(("/*", "*/"),), strings=('"', "'"))
+HASH_STYLE = CommentSyntax(line=("#",), strings=('"', "'"))
+SHELL_STYLE = CommentSyntax(
+    line=("#",),
+    line_start_block=((": '", "'"),),
+    strings=('"', "'"),
+    space_before_line=True,
+)
+HTML_STYLE = CommentSyntax(block=(("<!--", "-->"),))
+SQL_STYLE = CommentSyntax(line=("--",), block=(("/*", "*/"),), strings=("'", '"'), escape="")
+MATLAB_STYLE = CommentSyntax(
+    line=("%",), line_start_block=(("%{", "%}"),), strings=("'", '"'), escape=""
+)
+HASKELL_STYLE = CommentSyntax(line=("--",), nested_block=(("{-", "-}"),), strings=('"',))
+ML_STYLE = CommentSyntax(nested_block=(("(*", "*)"),), strings=('"',))
+LISP_STYLE = CommentSyntax(line=(";",), nested_block=(("#|", "|#"),), strings=('"',))
+JS_STYLE = C_STYLE._replace(multiline_strings=("`",))
+
+COMMENT_SYNTAX: Dict[str, CommentSyntax] = {
+    "c": C_STYLE,
+    "cpp": C_STYLE,
+    "java": C_STYLE,
+    "csharp": C_STYLE,
+    "apex": C_STYLE._replace(strings=("'",)),
+    "solidity": C_STYLE,
+    "hack": C_STYLE,
+    "verilog": C_STYLE._replace(strings=('"',)),
+    # PHP also has # comments, but #[ opens an attribute
+    "php": C_STYLE,
+    "javascript": JS_STYLE,
+    "typescript": JS_STYLE,
+    "typescriptreact": JS_STYLE,
+    "react": JS_STYLE,
+    "go": C_STYLE._replace(raw_strings=("`",)),
+    # ' opens a lifetime as well as a character
+    "rust": C_STYLE._replace(block=(), nested_block=(("/*", "*/"),), strings=('"',)),
+    "kotlin": C_STYLE._replace(block=(), nested_block=(("/*", "*/"),), raw_strings=('"""',)),
+    "swift": C_STYLE._replace(block=(), nested_block=(("/*", "*/"),), strings=('"',), multiline_strings=('"""',)),
+    "scala": C_STYLE._replace(block=(), nested_block=(("/*", "*/"),), raw_strings=('"""',)),
+    "dart": C_STYLE._replace(block=(), nested_block=(("/*", "*/"),), multiline_strings=('"""', "'''")),
+    "groovy": C_STYLE._replace(multiline_strings=('"""', "'''")),
+    "d": C_STYLE._replace(nested_block=(("/+", "+/"),), raw_strings=("`",)),
+    "zig": CommentSyntax(line=("//",), strings=('"', "'")),
+    "fsharp": CommentSyntax(line=("//",), nested_block=(("(*", "*)"),), strings=('"',), raw_strings=('"""',)),
+    "python": HASH_STYLE._replace(
+        multiline_strings=('"""', "'''"),
+        # A string that starts a line is a docstring, or a string used as a comment
+        line_start_block=(('"""', '"""'), ("'''", "'''")),
+    ),
+    "ruby": HASH_STYLE._replace(line_start_block=(("=begin", "=end"),)),
+    "perl": HASH_STYLE._replace(
+        # POD blocks, and $#array is not a comment
+        line_start_block=tuple((opener, "=cut") for opener in ("=pod", "=head", "=begin", "=over", "=item", "=for")),
+        space_before_line=True,
+    ),
+    "raku": HASH_STYLE,
+    "crystal": HASH_STYLE._replace(strings=('"',)),
+    "r": HASH_STYLE,
+    "elixir": HASH_STYLE._replace(multiline_strings=('"""', "'''")),
+    "julia": CommentSyntax(line=("#",), nested_block=(("#=", "=#"),), strings=('"',), multiline_strings=('"""',)),
+    "nim": CommentSyntax(line=("#",), nested_block=(("#[", "]#"),), strings=('"', "'"), multiline_strings=('"""',)),
+    "coffeescript": HASH_STYLE._replace(block=(("###", "###"),), multiline_strings=('"""', "'''")),
+    "bash": SHELL_STYLE,
+    "zsh": SHELL_STYLE,
+    "shell": SHELL_STYLE,
+    "powershell": CommentSyntax(line=("#",), block=(("<#", "#>"),), strings=('"', "'"), escape="`"),
+    "tcl": CommentSyntax(line_start=("#",), strings=('"',)),
+    "yaml": HASH_STYLE._replace(space_before_line=True),
+    "toml": HASH_STYLE._replace(multiline_strings=('"""',), raw_strings=("'''",)),
+    "ini": CommentSyntax(line_start=("#", ";")),
+    "dockerfile": CommentSyntax(line_start=("#",)),
+    "makefile": CommentSyntax(line=("#",), verbatim=("\\#",)),
+    "cmake": CommentSyntax(line=("#",), block=(("#[[", "]]"),), strings=('"',)),
+    "html": HTML_STYLE,
+    "xml": HTML_STYLE,
+    "markdown": HTML_STYLE,
+    "sql": SQL_STYLE,
+    "plsql": SQL_STYLE,
+    "tsql": SQL_STYLE,
+    "matlab": MATLAB_STYLE,
+    "octave": MATLAB_STYLE._replace(line=("%", "#"), line_start_block=(("%{", "%}"), ("#{", "#}"))),
+    "lua": CommentSyntax(line=("--",), block=(("--[[", "]]"),), strings=('"', "'")),
+    "haskell": HASKELL_STYLE,
+    "purescript": HASKELL_STYLE,
+    "elm": HASKELL_STYLE,
+    "idris": HASKELL_STYLE,
+    "agda": HASKELL_STYLE,
+    "lean": CommentSyntax(line=("--",), nested_block=(("/-", "-/"),), strings=('"',)),
+    "vhdl": CommentSyntax(line=("--",), block=(("/*", "*/"),), strings=('"',), escape=""),
+    "ada": CommentSyntax(line=("--",), strings=('"',), escape=""),
+    "ocaml": ML_STYLE,
+    "standardml": ML_STYLE,
+    "erlang": CommentSyntax(line=("%",), strings=('"', "'")),
+    "prolog": CommentSyntax(line=("%",), block=(("/*", "*/"),), strings=('"', "'")),
+    "postscript": CommentSyntax(line=("%",)),
+    "latex": CommentSyntax(line=("%",), verbatim=("\\%",)),
+    "bibtex": CommentSyntax(line=("%",), verbatim=("\\%",)),
+    "clojure": CommentSyntax(line=(";",), strings=('"',)),
+    "lisp": LISP_STYLE,
+    "scheme": LISP_STYLE,
+    "racket": LISP_STYLE,
+    "assembly": CommentSyntax(line=(";",), block=(("/*", "*/"),), strings=('"', "'")),
+    "webassembly": CommentSyntax(line=(";;",), nested_block=(("(;", ";)"),), strings=('"',)),
+    "fortran": CommentSyntax(line=("!",), strings=("'", '"'), escape=""),
+    "cobol": CommentSyntax(line=("*>",), strings=("'", '"'), escape=""),
+    "pascal": CommentSyntax(line=("//",), block=(("{", "}"), ("(*", "*)")), strings=("'",), escape=""),
+    "visualbasic": CommentSyntax(line=("'",), strings=('"',), escape=""),
+    "abap": CommentSyntax(line=('"',), line_start=("*",), strings=("'", "`"), escape=""),
+    "vimscript": CommentSyntax(line_start=('"',), strings=("'",), escape=""),
+    "forth": CommentSyntax(line=("\\ ",), block=(("( ", ")"),), space_before_line=True),
+    "jinja2": CommentSyntax(block=(("{#", "#}"),)),
+    "json": NO_COMMENTS,
+    "plaintext": NO_COMMENTS,
+    "csv": NO_COMMENTS,
+    "tsv": NO_COMMENTS,
+    "log": NO_COMMENTS,
+}
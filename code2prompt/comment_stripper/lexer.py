@@ -0,0 +1,241 @@
+"""
+This module contains the table-driven lexer that strips comments from code.
+
+Each language is described by a CommentSyntax: its line comments, block
+comments (nested or not), string literals and a few position rules. The lexer
+compiles one scanner per syntax: a regular expression that consumes code and
+whole string literals up to the next comment opener, so the regex engine does
+the bulk of the work and Python only steps in once per comment. From an opener,
+the end of the comment is found by a forward search, and scanning resumes after
+it. No character is examined more than a bounded number of times, so the lexer
+runs in linear time on any input, including unterminated comments and strings.
+
+Comments are replaced by nothing. A comment that ends its line takes the
+whitespace before it along, and a line left empty by a comment is removed.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Pattern, Tuple
+
+
+class CommentSyntax(NamedTuple):
+    """
+    The comment and string syntax of a language.
+
+    Attributes:
+        line (Tuple[str, ...]): Openers of comments that end at the end of the line.
+        block (Tuple[Tuple[str, str], ...]): Opener and closer of block comments.
+        nested_block (Tuple[Tuple[str, str], ...]): Opener and closer of block
+            comments that nest.
+        strings (Tuple[str, ...]): Delimiters of string literals that end at
+            the end of the line if they are not closed.
+        multiline_strings (Tuple[str, ...]): Delimiters of string literals that
+            may span lines.
+        raw_strings (Tuple[str, ...]): Delimiters of multi-line string literals
+            without escapes.
+        escape (str): The escape character of strings, or "" for none.
+        line_start (Tuple[str, ...]): Openers of line comments recognised only
+            at the start of a line, after indentation.
+        line_start_block (Tuple[Tuple[str, str], ...]): Opener and closer of
+            block comments recognised only at the start of a line, after
+            indentation, e.g. Python docstrings.
+        space_before_line (bool): Whether line comments need whitespace or the
+            start of the line before them, as in shell where a # inside a word
+            does not start a comment.
+        verbatim (Tuple[str, ...]): Sequences kept as they are outside strings,
+            e.g. \\% in LaTeX.
+    """
+
+    line: Tuple[str, ...] = ()
+    block: Tuple[Tuple[str, str], ...] = ()
+    nested_block: Tuple[Tuple[str, str], ...] = ()
+    strings: Tuple[str, ...] = ()
+    multiline_strings: Tuple[str, ...] = ()
+    raw_strings: Tuple[str, ...] = ()
+    escape: str = "\\"
+    line_start: Tuple[str, ...] = ()
+    line_start_block: Tuple[Tuple[str, str], ...] = ()
+    space_before_line: bool = False
+    verbatim: Tuple[str, ...] = ()
+
+    @property
+    def has_comments(self) -> bool:
+        """Whether the language has any comment syntax."""
+        return bool(self.line or self.block or self.nested_block or self.line_start or self.line_start_block)
+
+
+# A comment handler returns the end of the comment whose opener ends at the
+# given position.
+_Handler = Callable[[str, int], int]
+
+# The scanner consumes at most this many pieces of code or string literals per
+# match, which bounds the backtracking state the regex engine keeps.
+_MAX_RUN = 65535
+
+
+class _Scanner(NamedTuple):
+    pattern: Pattern[str]
+    handlers: Dict[str, _Handler]
+
+
+def strip_comments_with_syntax(code: str, syntax: CommentSyntax) -> str:
+    """
+    Strip the comments of a language from code, in one linear pass.
+
+    Args:
+        code (str): The source code.
+        syntax (CommentSyntax): The comment and string syntax of its language.
+
+    Returns:
+        str: The code without comments. String literals are kept as they are,
+        as is a shebang line.
+    """
+    if not syntax.has_comments:
+        return code
+    scanner = _compile(syntax)
+    out = []
+    pos = _shebang_end(code)
+    n = len(code)
+    out.append(code[:pos])
+    while pos < n:
+        match = scanner.pattern.match(code, pos)
+        opener = match.lastgroup
+        if opener is None:
+            out.append(code[pos:match.end()])
+            pos = match.end()
+            continue
+        start = match.start(opener)
+        end = scanner.handlers[opener](code, match.end())
+
+        # A comment that ends its line takes the whitespace before it along,
+        # and the line too if nothing else is left on it
+        before = start
+        while before > pos and code[before - 1] in " \t":
+            before -= 1
+        after = end
+        while after < n and code[after] in " \t":
+            after += 1
+        if after == n or code[after] in "\r\n":
+            if before == 0 or code[before - 1] == "\n":
+                if code.startswith("\r\n", after):
+                    after += 2
+                elif after < n:
+                    after += 1
+            out.append(code[pos:before])
+            pos = after
+        else:
+            out.append(code[pos:start])
+            pos = end
+    return "".join(out)
+
+
+def _shebang_end(code: str) -> int:
+    """Return the end of the shebang line that opens the code, or 0 if there is none."""
+    stripped = code.lstrip()
+    if not stripped.startswith("#!"):
+        return 0
+    end = code.find("\n", len(code) - len(stripped))
+    return len(code) if end == -1 else end
+
+
+@lru_cache(maxsize=None)
+def _compile(syntax: CommentSyntax) -> _Scanner:
+    """
+    Compile the scanner of a syntax.
+
+    A match is a run of code and string literals, followed by a comment opener
+    in a named group unless the run ends the code or reaches _MAX_RUN pieces.
+    """
+    # (opener, recognised only at the start of a line, lookbehind, handler)
+    comments: List[Tuple[str, bool, str, _Handler]] = []
+    line_prefix = r"(?<![^\s])" if syntax.space_before_line else ""
+    for opener in syntax.line:
+        comments.append((opener, False, line_prefix, _line_comment))
+    for opener in syntax.line_start:
+        comments.append((opener, True, "", _line_comment))
+    for opener, closer in syntax.block:
+        comments.append((opener, False, "", _block_comment(closer)))
+    for opener, closer in syntax.nested_block:
+        comments.append((opener, False, "", _nested_block_comment(opener, closer)))
+    for opener, closer in syntax.line_start_block:
+        comments.append((opener, True, "", _block_comment(closer)))
+    # Longer openers first, so that e.g. --[[ wins over --
+    comments.sort(key=lambda comment: -len(comment[0]))
+
+    openers = []
+    handlers = {}
+    for i, (opener, at_line_start, prefix, handler) in enumerate(comments):
+        group = f"(?P<c{i}>{re.escape(opener)})"
+        # The group is the opener itself, without the indentation before it
+        openers.append(r"^[ \t]*" + group if at_line_start else prefix + group)
+        handlers[f"c{i}"] = handler
+
+    literals = [(delimiter, syntax.escape, False) for delimiter in syntax.strings]
+    literals += [(delimiter, syntax.escape, True) for delimiter in syntax.multiline_strings]
+    literals += [(delimiter, "", True) for delimiter in syntax.raw_strings]
+    # Longer delimiters first, so that e.g. """ wins over "
+    literals.sort(key=lambda literal: -len(literal[0]))
+    pieces = [_string(delimiter, escape, multiline) for delimiter, escape, multiline in literals]
+    pieces += [re.escape(sequence) for sequence in syntax.verbatim]
+
+    # Runs of characters that cannot start a comment, a string or a verbatim
+    # sequence are consumed at once; a line start is where line-start openers
+    # are checked, so newlines end these runs then
+    special = {opener[0] for opener, _, _, _ in comments}
+    special |= {delimiter[0] for delimiter, _, _ in literals}
+    special |= {sequence[0] for sequence in syntax.verbatim}
+    if syntax.line_start or syntax.line_start_block:
+        special.add("\n")
+    plain = "[^" + "".join(re.escape(char) for char in sorted(special)) + "]+"
+
+    unnamed = re.sub(r"\(\?P<c\d+>", "(?:", "|".join(openers))
+    run = f"(?:(?!{unnamed})(?:{'|'.join([plain] + pieces + ['.'])})){{0,{_MAX_RUN}}}"
+    pattern = f"{run}(?:{'|'.join(openers)})?"
+    return _Scanner(re.compile(pattern, re.MULTILINE | re.DOTALL), handlers)
+
+
+def _line_comment(code: str, opened: int) -> int:
+    end = code.find("\n", opened)
+    if end == -1:
+        return len(code)
+    # Keep the \r of a \r\n line ending with the newline
+    if end > opened and code[end - 1] == "\r":
+        end -= 1
+    return end
+
+
+def _block_comment(closer: str) -> _Handler:
+    def handle(code: str, opened: int) -> int:
+        end = code.find(closer, opened)
+        return len(code) if end == -1 else end + len(closer)
+
+    return handle
+
+
+def _nested_block_comment(opener: str, closer: str) -> _Handler:
+    delimiters = re.compile(f"{re.escape(opener)}|{re.escape(closer)}")
+
+    def handle(code: str, opened: int) -> int:
+        depth = 1
+        for match in delimiters.finditer(code, opened):
+            depth += 1 if match.group() == opener else -1
+            if depth == 0:
+                return match.end()
+        return len(code)
+
+    return handle
+
+
+def _string(delimiter: str, escape: str, multiline: bool) -> str:
+    """Return the regex of a string literal; an unterminated one runs to the end of its line or of the code."""
+    # Any character but the escape, a newline (unless multiline) or the start
+    # of the closing delimiter; or an escaped character
+    quoted = re.escape(delimiter)
+    excluded = re.escape(escape) + ("" if multiline else r"\n")
+    # Runs of characters that cannot end the literal are consumed at once
+    body = f"[^{re.escape(delimiter[0])}{excluded}]+|"
+    body += f"(?!{quoted})[^{excluded}]" if excluded else f"(?!{quoted})."
+    if escape:
+        body += f"|{re.escape(escape)}."
+    return f"{quoted}(?:{body})*(?:{quoted})?"
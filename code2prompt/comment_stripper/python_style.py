@@ -1,12 +1,7 @@
-import re
+from .languages import COMMENT_SYNTAX
+from .lexer import strip_comments_with_syntax
+
 
 def strip_python_style_comments(code: str) -> str:
-    pattern = re.compile(
-        r'(?s)#.*?$|\'\'\'.*?\'\'\'|""".*?"""|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
-        re.MULTILINE,
-    )
-    return re.sub(
-        pattern,
-        lambda match: ("" if match.group(0).startswith(("#", "'''", '"""')) else match.group(0)),
-        code,
-    )
+    """Strips Python-style comments (# and docstrings) from the given code."""
+    return strip_comments_with_syntax(code, COMMENT_SYNTAX["python"])
@@ -1,12 +1,7 @@
-import re
+from .languages import COMMENT_SYNTAX
+from .lexer import strip_comments_with_syntax
+
 
 def strip_r_style_comments(code: str) -> str:
-    pattern = re.compile(
-        r'#.*?$|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
-        re.DOTALL | re.MULTILINE,
-    )
-    return re.sub(
-        pattern,
-        lambda match: match.group(0) if match.group(0).startswith(("'", '"')) else "",
-        code,
-    )
+    """Strips R-style comments (#) from the given code."""
+    return strip_comments_with_syntax(code, COMMENT_SYNTAX["r"])
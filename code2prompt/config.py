@@ -3,6 +3,8 @@
 from pathlib import Path
 from typing import List, Optional, Dict
 from pydantic import BaseModel, Field, field_validator, ValidationError
+from code2prompt.core.compaction import parse_transforms
+from code2prompt.core.token_budget import parse_priority_weights
 
 class Configuration(BaseModel):
     """
@@ -20,10 +22,18 @@ class Configuration(BaseModel):
     case_sensitive: bool = Field(False, description="Perform case-sensitive pattern matching.")
     suppress_comments: bool = Field(False, description="Strip comments from the code files.")
     line_number: bool = Field(False, description="Add line numbers to source code blocks.")
+    compact: Optional[str] = Field(None, description="Comma-separated transforms compacting the code files, or all.")
+    compact_report: bool = Field(False, description="Report the tokens saved by each compaction transform per file.")
+    dedupe: bool = Field(False, description="Emit files with identical contents once, listing the other paths.")
+    near_duplicates: Optional[float] = Field(None, description="Similarity above which files are removed as near duplicates.")
+    max_file_bytes: Optional[int] = Field(None, description="Bytes read from a file at most; the middle of larger files is elided.")
+    max_file_tokens: Optional[int] = Field(None, description="Tokens of a file at most; the middle of larger files is elided.")
+    elide_tail: float = Field(0.25, description="Share of a file cap kept from the end of the file.")
     no_codeblock: bool = Field(False, description="Disable wrapping code inside markdown code blocks.")
     template: Optional[Path] = Field(None, description="Path to a Jinja2 template file for custom prompt generation.")
     tokens: bool = Field(False, description="Display the token count of the generated prompt.")
     encoding: str = Field("cl100k_base", description="Specify the tokenizer encoding to use.")
+    tokenizer_dir: Optional[Path] = Field(None, description="Directory of pre-seeded tokenizer BPE files.")
     create_templates: bool = Field(False, description="Create a templates directory with example templates.")
     log_level: str = Field("INFO", description="Set the logging level.")
     price: bool = Field(False, description="Display the estimated price of tokens based on provider and model.")
@@ -33,6 +43,23 @@ class Configuration(BaseModel):
     analyze: bool = Field(False, description="Analyze the codebase and provide a summary of file extensions.")
     format: str = Field("flat", description="Format of the analysis output (flat or tree-like).")
     interactive: bool = Field(False, description="Interactive mode to select files.")
+    discovery: str = Field("walk", description="File discovery backend (walk or git).")
+    discovery_workers: int = Field(1, description="Number of threads scanning directories during discovery.")
+    estimate: bool = Field(False, description="Estimate the token count from a sample of the files instead of generating.")
+    max_tokens: Optional[int] = Field(None, description="Token budget of the output; files are dropped by priority to fit.")
+    priority: Optional[str] = Field(None, description="Comma-separated pattern:weight priority rules for the token budget.")
+    recency_half_life: Optional[float] = Field(None, description="Days after which the priority of an unmodified file halves.")
+    size_penalty: float = Field(0.0, description="Exponent of the size penalty on the priority of a file.")
+    packer: str = Field("greedy", description="Packer selecting the files within the token budget (greedy or knapsack).")
+    workers: int = Field(1, description="Number of files processed concurrently.")
+    executor: str = Field("thread", description="Pool processing the files (thread or process).")
+    cache: bool = Field(False, description="Cache processed file contents between runs.")
+    cache_dir: Optional[Path] = Field(None, description="Directory of the file cache.")
+    cache_size: int = Field(256, description="Size cap of the file cache, in megabytes.")
+    split_tokens: Optional[int] = Field(None, description="Token limit of each part when splitting the output.")
+    stream: bool = Field(False, description="Stream the output instead of building it in memory.")
+    poll: bool = Field(False, description="Watch for changes by polling instead of inotify.")
+    poll_interval: float = Field(0.5, description="Seconds between two scans when polling for changes.")
     
     # Add the syntax_map attribute
     syntax_map: Dict[str, str] = Field(default_factory=dict, description="Custom syntax mappings for language inference.")
@@ -61,6 +88,98 @@ class Configuration(BaseModel):
             raise ValueError(f"Invalid format. Must be one of: {', '.join(valid_formats)}")
         return v
 
+    @field_validator('discovery')
+    @classmethod
+    def validate_discovery(cls, v: str) -> str:
+        valid_backends = ["walk", "git"]
+        if v not in valid_backends:
+            raise ValueError(f"Invalid discovery backend. Must be one of: {', '.join(valid_backends)}")
+        return v
+
+    @field_validator('discovery_workers')
+    @classmethod
+    def validate_discovery_workers(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError("The number of discovery workers must be at least 1.")
+        return v
+
+    @field_validator('max_tokens')
+    @classmethod
+    def validate_max_tokens(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v < 1:
+            raise ValueError("The token budget must be at least 1.")
+        return v
+
+    @field_validator('split_tokens')
+    @classmethod
+    def validate_split_tokens(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v < 1:
+            raise ValueError("The token limit of a part must be at least 1.")
+        return v
+
+    @field_validator('compact')
+    @classmethod
+    def validate_compact(cls, v: Optional[str]) -> Optional[str]:
+        parse_transforms(v)
+        return v
+
+    @field_validator('near_duplicates')
+    @classmethod
+    def validate_near_duplicates(cls, v: Optional[float]) -> Optional[float]:
+        if v is not None and not 0 < v <= 1:
+            raise ValueError("The near-duplicate similarity threshold must be in (0, 1].")
+        return v
+
+    @field_validator('max_file_bytes', 'max_file_tokens')
+    @classmethod
+    def validate_file_caps(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v < 1:
+            raise ValueError("A file cap must be at least 1.")
+        return v
+
+    @field_validator('elide_tail')
+    @classmethod
+    def validate_elide_tail(cls, v: float) -> float:
+        if not 0 <= v <= 1:
+            raise ValueError("The share of a file cap kept from the end must be between 0 and 1.")
+        return v
+
+    @field_validator('priority')
+    @classmethod
+    def validate_priority(cls, v: Optional[str]) -> Optional[str]:
+        parse_priority_weights(v)
+        return v
+
+    @field_validator('packer')
+    @classmethod
+    def validate_packer(cls, v: str) -> str:
+        valid_packers = ["greedy", "knapsack"]
+        if v not in valid_packers:
+            raise ValueError(f"Invalid packer. Must be one of: {', '.join(valid_packers)}")
+        return v
+
+    @field_validator('workers')
+    @classmethod
+    def validate_workers(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        return v
+
+    @field_validator('executor')
+    @classmethod
+    def validate_executor(cls, v: str) -> str:
+        valid_executors = ["thread", "process"]
+        if v not in valid_executors:
+            raise ValueError(f"Invalid executor. Must be one of: {', '.join(valid_executors)}")
+        return v
+
+    @field_validator('cache_size')
+    @classmethod
+    def validate_cache_size(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError("The cache size must be at least 1 MB.")
+        return v
+
     @classmethod
     def load_from_file(cls, file_path: Path) -> "Configuration":
         """
@@ -0,0 +1,224 @@
+"""
+This module contains the opt-in transforms that compact file contents to save tokens.
+
+Each transform removes layout that costs tokens but little meaning:
+
+- docstrings drops the docstrings of Python modules, classes and functions,
+  found with ast, so the code stays valid Python.
+- trailing-whitespace strips the whitespace at the end of lines.
+- indent re-indents with the minimal width: an indentation step of four spaces
+  or a tab becomes one space. In languages where indentation is syntax, such as
+  Python, the step divides the indentation of every line, so the structure is
+  kept exactly.
+- blank-lines collapses runs of blank lines into one.
+
+They run after comment stripping and before line numbering, always in the order
+of TRANSFORMS, whatever the order they are given in.
+"""
+
+import ast
+import io
+import re
+from collections import Counter
+from functools import reduce
+from math import gcd
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+TRANSFORMS = ("docstrings", "trailing-whitespace", "indent", "blank-lines")
+
+# Languages whose layout is part of the content: indentation makes code blocks
+# and nested lists in Markdown, two trailing spaces a line break, and make
+# needs its tabs.
+_LAYOUT_SENSITIVE = {"markdown", "makefile"}
+
+# Languages whose indentation is syntax, re-indented only by whole steps.
+_INDENTATION_SYNTAX = {
+    "python", "yaml", "haskell", "purescript", "elm", "idris", "agda", "fsharp", "nim",
+    "coffeescript",
+}
+
+# Columns of a tab in indentation, as in Python.
+_TAB_SIZE = 8
+
+_TRAILING_WHITESPACE = re.compile(r"[ \t]+(?=\r?$)", re.MULTILINE)
+_BLANK_LINE_RUN = re.compile(r"(\r?\n)(?:[ \t]*\r?\n){2,}")
+_LEADING_BLANK_LINES = re.compile(r"\A(?:[ \t]*\r?\n)+")
+_TRAILING_BLANK_LINES = re.compile(r"(\r?\n)(?:[ \t]*\r?\n)+\Z")
+
+
+def parse_transforms(spec: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated list of transforms.
+
+    Args:
+        spec (Optional[str]): The transforms, e.g. "indent,blank-lines", or "all".
+
+    Returns:
+        Tuple[str, ...]: The transforms, in the order they are applied.
+
+    Raises:
+        ValueError: If a transform is unknown.
+    """
+    names = {name.strip() for name in (spec or "").split(",") if name.strip()}
+    if "all" in names:
+        return TRANSFORMS
+    unknown = names.difference(TRANSFORMS)
+    if unknown:
+        raise ValueError(
+            f"Invalid transform {sorted(unknown)[0]!r}. Must be one of: all, {', '.join(TRANSFORMS)}"
+        )
+    return tuple(name for name in TRANSFORMS if name in names)
+
+
+def compact(
+    content: str,
+    language: str,
+    transforms: Sequence[str],
+    count: Optional[Callable[[str], int]] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Apply transforms to the content of a file.
+
+    Args:
+        content (str): The content.
+        language (str): The language of the file, as inferred by infer_language.
+        transforms (Sequence[str]): The transforms to apply, among TRANSFORMS.
+        count (Optional[Callable[[str], int]]): Counts the tokens of a text. If
+            given, the content is tokenized after each transform.
+
+    Returns:
+        Tuple[str, Dict[str, int]]: The transformed content, and the tokens
+        saved by each transform if count is given, or an empty dict.
+    """
+    saved: Dict[str, int] = {}
+    tokens = count(content) if count is not None else 0
+    for name in TRANSFORMS:
+        if name not in transforms:
+            continue
+        content = _TRANSFORM_FUNCTIONS[name](content, language)
+        if count is not None:
+            after = count(content)
+            saved[name] = tokens - after
+            tokens = after
+    return content, saved
+
+
+def strip_trailing_whitespace(content: str, language: str = "unknown") -> str:
+    """Strip the spaces and tabs at the end of every line."""
+    if language in _LAYOUT_SENSITIVE:
+        return content
+    return _TRAILING_WHITESPACE.sub("", content)
+
+
+def collapse_blank_lines(content: str, language: str = "unknown") -> str:
+    """
+    Collapse every run of blank lines, even with whitespace on them, into one
+    empty line, and drop the blank lines at the start and end of the content.
+    """
+    content = _LEADING_BLANK_LINES.sub("", content)
+    content = _BLANK_LINE_RUN.sub(r"\1\1", content)
+    return _TRAILING_BLANK_LINES.sub(r"\1", content)
+
+
+def reindent(content: str, language: str = "unknown") -> str:
+    """
+    Re-indent the content with one space per indentation step.
+
+    The step is the most common increase of indentation from one line to the
+    next. Lines indented by a part of a step keep the remainder, e.g. the
+    aligned * of a block comment. In languages where indentation is syntax, the
+    step is reduced until it divides the indentation of every line.
+    """
+    if language in _LAYOUT_SENSITIVE or language == "unknown":
+        return content
+    lines = content.split("\n")
+    indents: List[Tuple[int, int]] = []
+    for line in lines:
+        text = line.lstrip(" \t")
+        if text.strip():
+            length = len(line) - len(text)
+            indents.append((length, len(line[:length].expandtabs(_TAB_SIZE))))
+        else:
+            indents.append((0, 0))
+
+    steps = Counter(
+        after - before
+        for (_, before), (_, after) in zip(indents, indents[1:])
+        if after > before
+    )
+    if not steps:
+        return content
+    step = steps.most_common(1)[0][0]
+    if language in _INDENTATION_SYNTAX:
+        widths = [width for _, width in indents]
+        step = reduce(gcd, widths, step)
+    if step <= 1:
+        return content
+
+    out = []
+    for line, (length, width) in zip(lines, indents):
+        if width:
+            line = " " * (width // step + width % step) + line[length:]
+        out.append(line)
+    return "\n".join(out)
+
+
+def strip_python_docstrings(content: str, language: str = "python") -> str:
+    """
+    Drop the docstrings of a Python module and of its classes and functions.
+
+    A docstring is only dropped when it is alone on its lines, and a body left
+    empty gets a pass. Content that does not parse is left unchanged.
+    """
+    if language != "python":
+        return content
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return content
+
+    # universal newlines, as the tokenizer splits lines
+    lines = io.StringIO(content, newline="").readlines()
+    replacements: Dict[int, Tuple[int, Optional[str]]] = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        body = node.body
+        if not (body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant)
+                and isinstance(body[0].value.value, str)):
+            continue
+        docstring = body[0]
+        first, last = docstring.lineno - 1, docstring.end_lineno - 1
+        # Column offsets count UTF-8 bytes
+        before = lines[first].encode("utf-8")[:docstring.col_offset]
+        after = lines[last].encode("utf-8")[docstring.end_col_offset:].strip()
+        if before.strip() or (after and not after.startswith(b"#")):
+            continue
+        if len(body) > 1 or isinstance(node, ast.Module):
+            replacements[first] = (last, None)
+        else:
+            newline = lines[last][len(lines[last].rstrip("\r\n")):]
+            replacements[first] = (last, before.decode("utf-8") + "pass" + newline)
+
+    if not replacements:
+        return content
+    out = []
+    i = 0
+    while i < len(lines):
+        if i in replacements:
+            last, replacement = replacements[i]
+            if replacement is not None:
+                out.append(replacement)
+            i = last + 1
+        else:
+            out.append(lines[i])
+            i += 1
+    return "".join(out)
+
+
+_TRANSFORM_FUNCTIONS = {
+    "docstrings": strip_python_docstrings,
+    "trailing-whitespace": strip_trailing_whitespace,
+    "indent": reindent,
+    "blank-lines": collapse_blank_lines,
+}
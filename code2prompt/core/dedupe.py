@@ -0,0 +1,182 @@
+"""
+This module contains the removal of duplicate files from the output.
+
+Files are compared on their processed content, in output order. The first file
+of a group is kept, and the paths of the others are listed on it, under
+"duplicates" for identical contents and under "near_duplicates" for similar
+ones.
+
+Identical contents are found by their SHA-256. Near duplicates are found with
+MinHash: the content is cut into shingles of SHINGLE_SIZE words, and the
+signature of a file is the minimum of each of NUM_PERMUTATIONS hash functions
+over its shingles. The share of equal minimums estimates the Jaccard similarity
+of two files. Locality-sensitive hashing on bands of the signature finds the
+candidate pairs, so files are not all compared with each other.
+"""
+
+import hashlib
+import random
+import re
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Number of hash functions of a MinHash signature.
+NUM_PERMUTATIONS = 64
+
+# Number of words in a shingle.
+SHINGLE_SIZE = 5
+
+# The (bands, rows) splits of a signature for locality-sensitive hashing.
+_BANDINGS = ((64, 1), (32, 2), (16, 4), (8, 8), (4, 16))
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+# The hash functions of the signatures are the XOR of the shingle hashes with
+# fixed random masks, the same from run to run.
+_MASKS = tuple(random.Random(0).getrandbits(64) for _ in range(NUM_PERMUTATIONS))
+
+
+class DedupeResult(NamedTuple):
+    """
+    The files left once duplicates are removed.
+
+    Attributes:
+        files (List[Dict[str, Any]]): The files kept, in order.
+        identical (int): The number of files removed as identical to a kept file.
+        near (int): The number of files removed as similar to a kept file.
+        tokens_saved (int): The tokens of the contents of the files removed.
+    """
+
+    files: List[Dict[str, Any]]
+    identical: int
+    near: int
+    tokens_saved: int
+
+
+def dedupe_files(
+    files_data: Iterable[Dict[str, Any]],
+    near_threshold: Optional[float] = None,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> DedupeResult:
+    """
+    Remove the files whose content duplicates the content of an earlier file.
+
+    Args:
+        files_data (Iterable[Dict[str, Any]]): The processed files, in output order.
+        near_threshold (Optional[float]): If given, files whose estimated
+            similarity to a kept file is at least this are removed too.
+        count_tokens (Optional[Callable[[str], int]]): Counts the tokens of a
+            content; the "tokens" of a file are used when it has them.
+
+    Returns:
+        DedupeResult: The files kept, with the paths of their duplicates, and
+        what was removed.
+    """
+    kept: List[Dict[str, Any]] = []
+    by_hash: Dict[bytes, Dict[str, Any]] = {}
+    index = _NearDuplicateIndex(near_threshold) if near_threshold is not None else None
+    identical = near = tokens_saved = 0
+
+    for file_data in files_data:
+        content = file_data["content"]
+        digest = hashlib.sha256(content.encode("utf-8")).digest()
+        original = by_hash.get(digest)
+        if original is not None:
+            original.setdefault("duplicates", []).append(file_data["path"])
+            identical += 1
+        elif index is not None:
+            signature = minhash_signature(content)
+            match = index.find(signature)
+            if match is not None:
+                original, similarity = match
+                original.setdefault("near_duplicates", []).append(
+                    {"path": file_data["path"], "similarity": similarity}
+                )
+                near += 1
+            else:
+                index.add(signature, file_data)
+        if original is not None:
+            if "tokens" in file_data:
+                tokens_saved += file_data["tokens"]
+            elif count_tokens is not None:
+                tokens_saved += count_tokens(content)
+            continue
+        by_hash[digest] = file_data
+        kept.append(file_data)
+
+    return DedupeResult(kept, identical, near, tokens_saved)
+
+
+def minhash_signature(content: str) -> Tuple[int, ...]:
+    """
+    Compute the MinHash signature of a content.
+
+    Args:
+        content (str): The content.
+
+    Returns:
+        Tuple[int, ...]: NUM_PERMUTATIONS minimums, or an empty tuple if the
+        content has no words.
+    """
+    words = _WORD.findall(content)
+    if not words:
+        return ()
+    size = min(SHINGLE_SIZE, len(words))
+    hashes = {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(words[i:i + size]).encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        for i in range(len(words) - size + 1)
+    }
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _MASKS)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimate the Jaccard similarity of two contents from their signatures."""
+    if not a or not b:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class _NearDuplicateIndex:
+    """The signatures of the kept files, bucketed by band for locality-sensitive hashing."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        # The banding whose similarity of 50% chance to be a candidate is the
+        # closest below the threshold, which favours recall; candidates are
+        # then checked against the threshold
+        self.bands, self.rows = max(
+            (banding for banding in _BANDINGS if (1 / banding[0]) ** (1 / banding[1]) <= threshold),
+            key=lambda banding: (1 / banding[0]) ** (1 / banding[1]),
+            default=_BANDINGS[0],
+        )
+        self.buckets: List[Dict[Tuple[int, ...], List[Tuple[Tuple[int, ...], Dict[str, Any]]]]] = [
+            {} for _ in range(self.bands)
+        ]
+
+    def _keys(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def find(self, signature: Tuple[int, ...]) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return the most similar kept file at or above the threshold, with its similarity."""
+        if not signature:
+            return None
+        best = None
+        seen = set()
+        for band, key in self._keys(signature):
+            for candidate, file_data in self.buckets[band].get(key, ()):
+                if id(file_data) in seen:
+                    continue
+                seen.add(id(file_data))
+                score = similarity(signature, candidate)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (file_data, score)
+        return best
+
+    def add(self, signature: Tuple[int, ...], file_data: Dict[str, Any]) -> None:
+        """Index the signature of a kept file."""
+        if not signature:
+            return
+        for band, key in self._keys(signature):
+            self.buckets[band].setdefault(key, []).append((signature, file_data))
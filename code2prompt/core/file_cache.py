@@ -0,0 +1,382 @@
+"""
+This module contains FileCache, a persistent cache of processed file contents.
+
+Processed contents (after comment stripping and line numbering) and their token
+counts are stored in a SQLite database, content-addressed by the SHA-256 of the
+raw file and a hash of the options that affect processing. A second table maps
+(path, size, mtime_ns, inode) to the content hash, so an unchanged file is served
+from a single stat without being read. A file whose stat changed is read and
+hashed, and still hits if its content did not change, e.g. after a checkout.
+
+The database runs in WAL mode so concurrent invocations can share it. Writes are
+batched and committed when the cache is closed, at which point the least recently
+used contents are evicted to keep the database under its size cap.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from code2prompt.core.file_record import FileRecord
+from code2prompt.version import VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump when the schema or the meaning of the stored contents changes.
+SCHEMA_VERSION = 2
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Files modified this recently may change again within the same mtime tick, so
+# their stat is not trusted on the next run and the content hash is checked.
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Pending writes are flushed once this many have accumulated.
+_FLUSH_THRESHOLD = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    content_hash TEXT NOT NULL,
+    options_hash TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER,
+    nbytes INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (content_hash, options_hash)
+);
+CREATE INDEX IF NOT EXISTS artifacts_last_access ON artifacts (last_access);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT NOT NULL,
+    options_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (path, options_hash)
+);
+"""
+
+
+class CachedFile(NamedTuple):
+    """A processed file content retrieved from the cache."""
+
+    content: str
+    tokens: Optional[int]
+    content_hash: str
+
+
+def default_cache_dir() -> Path:
+    """
+    Return the default cache directory, honouring XDG_CACHE_HOME.
+
+    Returns:
+        Path: The directory, e.g. ~/.cache/code2prompt.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "code2prompt"
+
+
+def hash_options(options: Dict[str, Any]) -> str:
+    """
+    Hash the options that affect the processed content of a file.
+
+    The code2prompt version and the schema version are included, so upgrading
+    invalidates contents produced by an older comment stripper.
+
+    Args:
+        options (Dict[str, Any]): JSON-serialisable options.
+
+    Returns:
+        str: The hex digest.
+    """
+    payload = json.dumps(
+        {"version": VERSION, "schema": SCHEMA_VERSION, "options": options},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FileCache:
+    """
+    A persistent, size-capped cache of processed file contents.
+
+    Use as a context manager, or call close() to commit the pending writes. Any
+    database error disables the cache with a warning instead of failing the run.
+
+    Attributes:
+        path (Path): The database file.
+        options_hash (str): The hash of the processing options.
+        max_size (int): The cap on the total size of the cached contents, in bytes.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that missed.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        options: Dict[str, Any],
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self.path = Path(directory) / "files.sqlite3"
+        self.options_hash = hash_options(options)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, str] = {}
+        self._touched: Dict[str, float] = {}
+        self._artifacts: List[Tuple[str, str, Optional[int]]] = []
+        self._files: Dict[str, Tuple[int, int, int, str]] = {}
+        self._tokens: Dict[str, int] = {}
+        self._connection: Optional[sqlite3.Connection] = None
+        try:
+            self._connection = self._connect()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("File cache disabled: cannot open %s: %s", self.path, e)
+
+    def __enter__(self) -> "FileCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __bool__(self) -> bool:
+        return self._connection is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            connection.executescript(
+                "BEGIN IMMEDIATE;"
+                "DROP TABLE IF EXISTS artifacts;"
+                "DROP TABLE IF EXISTS files;"
+                f"{_SCHEMA}"
+                f"PRAGMA user_version={SCHEMA_VERSION};"
+                "COMMIT;"
+            )
+        return connection
+
+    def _disable(self, error: Exception) -> None:
+        logger.warning("File cache disabled: %s", error)
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+        self._connection = None
+
+    def get(self, record: FileRecord) -> Optional[CachedFile]:
+        """
+        Look up the processed content of a file.
+
+        Args:
+            record (FileRecord): The file. It is only read if its stat does not match
+                the cached one.
+
+        Returns:
+            Optional[CachedFile]: The cached content and token count, or None.
+        """
+        if self._connection is None:
+            return None
+        path = str(record.path)
+        stat = record.stat
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT a.content, a.tokens, f.size, f.mtime_ns, f.inode, f.content_hash "
+                    "FROM files f LEFT JOIN artifacts a "
+                    "ON a.content_hash = f.content_hash AND a.options_hash = f.options_hash "
+                    "WHERE f.path = ? AND f.options_hash = ?",
+                    (path, self.options_hash),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+            if (
+                row is not None
+                and row[0] is not None
+                and (row[2], row[3], row[4])
+                == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            ):
+                self._hit(row[5])
+                return CachedFile(row[0], row[1], row[5])
+
+        # Read and hash outside the lock, so other threads are not held up
+        content_hash = hashlib.sha256(record.data).hexdigest()
+        with self._lock:
+            if self._connection is None:
+                return None
+            self._hashes[path] = content_hash
+            try:
+                artifact = self._connection.execute(
+                    "SELECT content, tokens FROM artifacts "
+                    "WHERE content_hash = ? AND options_hash = ?",
+                    (content_hash, self.options_hash),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+            if artifact is None:
+                self.misses += 1
+                return None
+            self._hit(content_hash)
+            self._remember_file(path, record, content_hash)
+            return CachedFile(artifact[0], artifact[1], content_hash)
+
+    def put(self, record: FileRecord, content: str, tokens: Optional[int] = None) -> None:
+        """
+        Store the processed content of a file; written when the cache is flushed.
+
+        Args:
+            record (FileRecord): The file the content was produced from.
+            content (str): The processed content.
+            tokens (Optional[int]): The token count of the content, if known.
+        """
+        if self._connection is None:
+            return
+        path = str(record.path)
+        with self._lock:
+            content_hash = self._hashes.pop(path, None)
+            if content_hash is None:
+                content_hash = hashlib.sha256(record.data).hexdigest()
+            self._artifacts.append((content_hash, content, tokens))
+            self._remember_file(path, record, content_hash)
+            if len(self._artifacts) + len(self._files) + len(self._tokens) >= _FLUSH_THRESHOLD:
+                self._flush()
+
+    def set_tokens(self, cached: CachedFile, tokens: int) -> None:
+        """
+        Store the token count of a content cached without one; written when the cache is flushed.
+
+        Args:
+            cached (CachedFile): The content, as returned by get.
+            tokens (int): Its token count.
+        """
+        if self._connection is None:
+            return
+        with self._lock:
+            self._tokens[cached.content_hash] = tokens
+            if len(self._artifacts) + len(self._files) + len(self._tokens) >= _FLUSH_THRESHOLD:
+                self._flush()
+
+    def _hit(self, content_hash: str) -> None:
+        self.hits += 1
+        self._touched[content_hash] = time.time()
+
+    def _remember_file(self, path: str, record: FileRecord, content_hash: str) -> None:
+        stat = record.stat
+        mtime_ns = stat.st_mtime_ns
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            mtime_ns = -1
+        self._files[path] = (stat.st_size, mtime_ns, stat.st_ino, content_hash)
+
+    def flush(self) -> None:
+        """Write the pending entries and access times to the database."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._connection is None:
+            return
+        if not (self._artifacts or self._files or self._touched or self._tokens):
+            return
+        now = time.time()
+        try:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO artifacts "
+                "(content_hash, options_hash, content, tokens, nbytes, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (h, self.options_hash, content, tokens, len(content.encode("utf-8")), now)
+                    for h, content, tokens in self._artifacts
+                ],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(path, options_hash, size, mtime_ns, inode, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, self.options_hash, *row) for path, row in self._files.items()],
+            )
+            self._connection.executemany(
+                "UPDATE artifacts SET last_access = ? "
+                "WHERE content_hash = ? AND options_hash = ?",
+                [(t, h, self.options_hash) for h, t in self._touched.items()],
+            )
+            self._connection.executemany(
+                "UPDATE artifacts SET tokens = ? "
+                "WHERE content_hash = ? AND options_hash = ?",
+                [(n, h, self.options_hash) for h, n in self._tokens.items()],
+            )
+            self._connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._disable(e)
+        finally:
+            self._artifacts.clear()
+            self._files.clear()
+            self._touched.clear()
+            self._tokens.clear()
+
+    def evict(self) -> int:
+        """
+        Evict the least recently used contents until the cache fits its size cap.
+
+        Returns:
+            int: The number of contents evicted.
+        """
+        with self._lock:
+            if self._connection is None:
+                return 0
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                total = self._connection.execute(
+                    "SELECT COALESCE(SUM(nbytes), 0) FROM artifacts"
+                ).fetchone()[0]
+                victims = []
+                if total > self.max_size:
+                    # Evict down to 90% of the cap so the next run does not evict again
+                    target = self.max_size * 0.9
+                    for rowid, nbytes in self._connection.execute(
+                        "SELECT rowid, nbytes FROM artifacts ORDER BY last_access"
+                    ):
+                        if total <= target:
+                            break
+                        victims.append((rowid,))
+                        total -= nbytes
+                    self._connection.executemany(
+                        "DELETE FROM artifacts WHERE rowid = ?", victims
+                    )
+                    self._connection.execute(
+                        "DELETE FROM files WHERE NOT EXISTS (SELECT 1 FROM artifacts a "
+                        "WHERE a.content_hash = files.content_hash "
+                        "AND a.options_hash = files.options_hash)"
+                    )
+                self._connection.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._disable(e)
+                return 0
+            if victims:
+                logger.debug("Evicted %d entries from the file cache.", len(victims))
+            return len(victims)
+
+    def close(self) -> None:
+        """Flush the pending writes, enforce the size cap and close the database."""
+        self.flush()
+        self.evict()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        logger.debug("File cache: %d hits, %d misses.", self.hits, self.misses)
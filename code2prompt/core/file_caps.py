@@ -0,0 +1,132 @@
+"""
+This module contains the per-file size caps.
+
+A file above the byte cap is never read or decoded in full: only its head and
+tail are read, through a memory map, and an elision marker stands for the rest.
+A file whose processed content is above the token cap is cut the same way,
+after comment stripping and compaction. Cuts are made at line boundaries, so no
+line is split, and the share of the cap kept from the end is tail_fraction.
+"""
+
+from typing import AnyStr, NamedTuple, Optional, Tuple
+
+from code2prompt.core.file_record import FileRecord
+from code2prompt.utils.encoder_registry import get_encoder
+
+ELISION_MARKER = "[... {size} {unit} elided ...]\n"
+
+
+class FileCaps(NamedTuple):
+    """
+    The size caps of each file.
+
+    Attributes:
+        max_bytes (Optional[int]): The cap on the bytes read from a file.
+        max_tokens (Optional[int]): The cap on the tokens of a processed content.
+        tail_fraction (float): The share of a cap kept from the end of the file.
+        encoding (str): The encoding counting the tokens.
+    """
+
+    max_bytes: Optional[int] = None
+    max_tokens: Optional[int] = None
+    tail_fraction: float = 0.25
+    encoding: str = "cl100k_base"
+
+    def exceeds_bytes(self, record: FileRecord) -> bool:
+        """Whether the file, as of its stat, is above the byte cap."""
+        return self.max_bytes is not None and record.size > self.max_bytes
+
+    def split(self, cap: int) -> Tuple[int, int]:
+        """Return the sizes of the head and the tail kept under a cap."""
+        tail = int(cap * self.tail_fraction)
+        return cap - tail, tail
+
+
+def read_capped_text(record: FileRecord, caps: FileCaps) -> Tuple[str, int]:
+    """
+    Read the head and tail of a file within the byte cap, and decode them.
+
+    Args:
+        record (FileRecord): The file.
+        caps (FileCaps): The caps; max_bytes must be set.
+
+    Returns:
+        Tuple[str, int]: The head, the elision marker and the tail, decoded like
+        FileRecord.text, and the number of bytes elided.
+
+    Raises:
+        UnicodeDecodeError: If the head or tail is not valid UTF-8.
+        OSError: If the file cannot be read.
+    """
+    head_size, tail_size = caps.split(caps.max_bytes)
+    head, tail, size = record.read_head_tail(head_size, tail_size)
+    if len(head) + len(tail) == size:
+        text = (head + tail).decode("utf-8")
+        elided = 0
+    else:
+        head, tail = _cut_head(head, b"\n"), _cut_tail(tail, b"\n")
+        head, tail = _trim_partial_characters(head, tail)
+        elided = size - len(head) - len(tail)
+        text = _join(head.decode("utf-8"), tail.decode("utf-8"), elided, "bytes")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, elided
+
+
+def cap_tokens(content: str, caps: FileCaps) -> Tuple[str, int]:
+    """
+    Cut a content down to the token cap, keeping its head and tail.
+
+    Args:
+        content (str): The processed content.
+        caps (FileCaps): The caps; max_tokens must be set.
+
+    Returns:
+        Tuple[str, int]: The content, with an elision marker if it was cut, and
+        the number of tokens elided.
+    """
+    encoder = get_encoder(caps.encoding)
+    tokens = encoder.encode_ordinary(content)
+    if len(tokens) <= caps.max_tokens:
+        return content, 0
+    head_size, tail_size = caps.split(caps.max_tokens)
+    head = _cut_head(encoder.decode(tokens[:head_size]), "\n")
+    tail = _cut_tail(encoder.decode(tokens[len(tokens) - tail_size:]) if tail_size else "", "\n")
+    kept = len(encoder.encode_ordinary(head)) + len(encoder.encode_ordinary(tail))
+    elided = len(tokens) - kept
+    return _join(head, tail, elided, "tokens"), elided
+
+
+def _join(head: str, tail: str, size: int, unit: str) -> str:
+    if head and not head.endswith("\n"):
+        head += "\n"
+    return head + ELISION_MARKER.format(size=size, unit=unit) + tail
+
+
+def _cut_head(head: AnyStr, newline: AnyStr) -> AnyStr:
+    """Cut the head after its last full line, if it has one."""
+    end = head.rfind(newline)
+    return head[:end + 1] if end != -1 else head
+
+
+def _cut_tail(tail: AnyStr, newline: AnyStr) -> AnyStr:
+    """Cut the tail before its first full line, if it has one."""
+    start = tail.find(newline)
+    return tail[start + 1:] if start != -1 else tail
+
+
+def _trim_partial_characters(head: bytes, tail: bytes) -> Tuple[bytes, bytes]:
+    """Drop the bytes of UTF-8 characters split by the cut, when a line was too long to cut at."""
+    # A character is at most 4 bytes: drop a lead byte at the end of the head
+    # whose continuation bytes are missing, and continuation bytes at the start
+    # of the tail
+    for length in range(1, min(4, len(head)) + 1):
+        byte = head[-length]
+        if byte & 0xC0 != 0x80:
+            if byte >= 0xC0 and length < (2 if byte < 0xE0 else 3 if byte < 0xF0 else 4):
+                head = head[:-length]
+            break
+    start = 0
+    while start < min(3, len(tail)) and tail[start] & 0xC0 == 0x80:
+        start += 1
+    return head, tail[start:]
@@ -1,10 +1,19 @@
 """
-This module contains the function to get file paths based on the provided options.
+This module contains the functions to get the files to process based on the provided options.
 """
 
+import logging
+import os
 from pathlib import Path
-from code2prompt.utils.get_gitignore_patterns import get_gitignore_patterns
-from code2prompt.utils.should_process_file import should_process_file
+from typing import Iterator, Optional, Tuple
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.git_file_lister import list_git_files
+from code2prompt.core.walk_directory import walk_directory
+from code2prompt.utils.filter_spec import FilterSpec
+from code2prompt.utils.get_gitignore_patterns import get_gitignore_matcher
+from code2prompt.utils.is_binary import is_binary
+
+logger = logging.getLogger(__name__)
 
 
 def retrieve_file_paths(
@@ -13,6 +22,9 @@ def retrieve_file_paths(
     exclude_patterns: list[str],
     case_sensitive: bool,
     gitignore: list[str],
+    filter_spec: Optional[FilterSpec] = None,
+    discovery: str = "walk",
+    discovery_workers: int = 1,
 ) -> list[Path]:
     """
     Retrieves file paths based on the provided options.
@@ -22,49 +34,164 @@ def retrieve_file_paths(
     filter_patterns (list[str]): Patterns to include.
     exclude_patterns (list[str]): Patterns to exclude.
     case_sensitive (bool): Whether the filtering should be case sensitive.
-    gitignore (list[str]): Gitignore patterns to consider.
+    gitignore (list[str]): Path to a .gitignore file to use instead of the default one.
+    filter_spec (Optional[FilterSpec]): The compiled include/exclude patterns. When
+        omitted, filter_patterns, exclude_patterns and case_sensitive are compiled.
+    discovery (str): "walk" to walk the directory tree, or "git" to list the files
+        tracked in the git index (falls back to "walk" outside a git repository).
+    discovery_workers (int): Number of threads scanning directories concurrently
+        when walking the directory tree.
 
     Returns:
     list[Path]: A list of file paths that should be processed.
     """
+    retrieved_paths: list[Path] = []
+    for record in _retrieve(
+        file_paths,
+        filter_patterns,
+        exclude_patterns,
+        case_sensitive,
+        gitignore,
+        filter_spec,
+        discovery,
+        discovery_workers,
+    ):
+        if is_binary(record.path):
+            logger.debug("Skipping %s: File is binary.", record.path)
+            continue
+        retrieved_paths.append(record.path)
+    return retrieved_paths
+
+
+def retrieve_file_records(
+    file_paths: list[Path],
+    filter_patterns: list[str],
+    exclude_patterns: list[str],
+    case_sensitive: bool,
+    gitignore: list[str],
+    filter_spec: Optional[FilterSpec] = None,
+    discovery: str = "walk",
+    discovery_workers: int = 1,
+    keep_content: bool = True,
+    max_file_bytes: Optional[int] = None,
+) -> list[FileRecord]:
+    """
+    Retrieves the files to process as FileRecords, each stat'ed and read once.
+
+    Takes the same arguments as retrieve_file_paths. The stat result comes from the
+    directory walk and the binary sniff runs on the content that is later used
+    for the prompt, so process_file touches the file system no further.
+
+    With keep_content=False, only the head of each file is read for the binary
+    sniff, so memory does not grow with the size of the repository and files
+    that are never processed, e.g. by an estimate, are barely read. Files above
+    max_file_bytes are never read in full either; only their head and tail are
+    read when they are processed.
+
+    Returns:
+    list[FileRecord]: The records of the files that should be processed.
+    """
+    records: list[FileRecord] = []
+    for record in _retrieve(
+        file_paths,
+        filter_patterns,
+        exclude_patterns,
+        case_sensitive,
+        gitignore,
+        filter_spec,
+        discovery,
+        discovery_workers,
+    ):
+        try:
+            read_whole = keep_content and not (max_file_bytes is not None and record.size > max_file_bytes)
+            binary = record.is_binary if read_whole else record.sniff_binary()
+        except OSError as e:
+            logger.warning("Skipping %s: %s", record.path, e)
+            continue
+        if binary:
+            logger.debug("Skipping %s: File is binary.", record.path)
+            continue
+        records.append(record)
+    return records
+
+
+def _retrieve(
+    file_paths: list[Path],
+    filter_patterns: list[str],
+    exclude_patterns: list[str],
+    case_sensitive: bool,
+    gitignore: list[str],
+    filter_spec: Optional[FilterSpec],
+    discovery: str,
+    discovery_workers: int,
+) -> Iterator[FileRecord]:
+    """Yield a record for every file below the given directories that passes the filters."""
     if not file_paths:
         raise ValueError("file_paths list cannot be empty.")
 
-    retrieved_paths: list[Path] = []
+    if filter_spec is None:
+        filter_spec = FilterSpec.compile(filter_patterns, exclude_patterns, case_sensitive)
 
     for path in file_paths:
         try:
             path = Path(path)
+            if not path.is_dir():
+                continue
 
-            # Get gitignore patterns for the current path
-            gitignore_patterns = get_gitignore_patterns(
-                path.parent if path.is_file() else path, gitignore
-            )
-
-            # Add the top-level directory if it should be processed
-            if path.is_dir() and should_process_file(
-                path,
-                gitignore_patterns,
-                path.parent,
-                filter_patterns,
-                exclude_patterns,
-                case_sensitive,
+            for file_path, relative, entry in _discover_files(
+                path, gitignore, filter_spec, discovery, discovery_workers
             ):
-                retrieved_paths.append(path)
-
-            # Add files and directories within the top-level directory
-            for file_path in path.rglob("*"):
-                if should_process_file(
-                    file_path,
-                    gitignore_patterns,
-                    path,
-                    filter_patterns,
-                    exclude_patterns,
-                    case_sensitive,
-                ):
-                    retrieved_paths.append(file_path)
+                # Patterns match below the root, not the directories above it
+                if not filter_spec.matches(relative):
+                    logger.debug(
+                        "Skipping %s: File does not meet filter criteria.", file_path
+                    )
+                    continue
+                try:
+                    if entry is not None:
+                        record = FileRecord.from_entry(entry)
+                    else:
+                        record = FileRecord.from_path(file_path)
+                except OSError as e:
+                    logger.debug("Skipping %s: %s", file_path, e)
+                    continue
+                # Skip submodule directories listed by the git backend
+                if record.is_regular:
+                    yield record
 
         except (FileNotFoundError, PermissionError) as e:
             print(f"Error processing path {path}: {e}")
 
-    return retrieved_paths
\ No newline at end of file
+
+def _discover_files(
+    path: Path,
+    gitignore: str,
+    filter_spec: FilterSpec,
+    discovery: str,
+    discovery_workers: int = 1,
+) -> Iterator[Tuple[str, str, Optional[os.DirEntry]]]:
+    """
+    Yield the candidate files below a directory using the selected backend, with
+    their path relative to it, with "/" separators, and their directory entry
+    when the backend has one.
+    """
+    if discovery == "git":
+        tracked_files = list_git_files(path)
+        if tracked_files is not None:
+            for relative in tracked_files:
+                # Files deleted from the work tree fail to stat and are skipped
+                yield os.path.join(path, relative), relative, None
+            return
+
+    # Compile the gitignore patterns for the current path once
+    gitignore_matcher = get_gitignore_matcher(path, gitignore)
+
+    # Ignored and excluded directories are pruned by the walker
+    prefix = os.path.join(path, "")
+    for entry in walk_directory(
+        path, gitignore_matcher, filter_spec, workers=discovery_workers
+    ):
+        relative = entry.path[len(prefix):]
+        if os.sep != "/":
+            relative = relative.replace(os.sep, "/")
+        yield entry.path, relative, entry
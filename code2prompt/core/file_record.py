@@ -0,0 +1,201 @@
+"""
+This module contains FileRecord, a file whose metadata and content are fetched once.
+
+Each file goes through a single ``stat`` and a single read: the stat result is
+taken from the walker's ``os.DirEntry`` when available, and the binary sniff, the
+metadata and the content all come from the same record.
+"""
+
+import mmap
+import os
+import stat
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from code2prompt.utils.is_binary import SNIFF_SIZE, TEXT_EXTENSIONS, is_binary_content
+
+
+class FileRecord:
+    """
+    A file with its stat result and, once read, its raw content.
+
+    Attributes:
+        path (Path): The path of the file.
+        stat (os.stat_result): The stat result of the file.
+    """
+
+    __slots__ = ("path", "stat", "_data")
+
+    def __init__(
+        self, path: Path, stat_result: os.stat_result, data: Optional[bytes] = None
+    ):
+        self.path = path
+        self.stat = stat_result
+        self._data = data
+
+    @classmethod
+    def from_entry(cls, entry: os.DirEntry) -> "FileRecord":
+        """
+        Create a record from a directory entry, reusing the stat cached by scandir.
+
+        Args:
+            entry (os.DirEntry): The entry of a file.
+
+        Returns:
+            FileRecord: The record.
+        """
+        return cls(Path(entry.path), entry.stat())
+
+    @classmethod
+    def from_path(cls, path: Union[str, "os.PathLike[str]"]) -> "FileRecord":
+        """
+        Create a record from a path.
+
+        Args:
+            path (Union[str, os.PathLike]): The path of the file.
+
+        Returns:
+            FileRecord: The record.
+
+        Raises:
+            OSError: If the file cannot be stat'ed.
+        """
+        return cls(Path(path), os.stat(path))
+
+    def __repr__(self) -> str:
+        return f"FileRecord({str(self.path)!r}, size={self.size})"
+
+    @property
+    def is_regular(self) -> bool:
+        """bool: Whether the record is a regular file."""
+        return stat.S_ISREG(self.stat.st_mode)
+
+    @property
+    def size(self) -> int:
+        """int: The size of the file in bytes, as of the stat."""
+        return self.stat.st_size
+
+    @property
+    def data(self) -> bytes:
+        """
+        bytes: The raw content of the file, read on first access.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    def release(self) -> None:
+        """Drop the content read so far; it is read again if needed."""
+        self._data = None
+
+    def _read(self) -> bytes:
+        # The size is known from the stat, so asking for one byte more reads a
+        # regular file in a single call; the loop only runs again if it grew.
+        fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            chunks = []
+            request = self.stat.st_size + 1
+            while True:
+                chunk = os.read(fd, request)
+                chunks.append(chunk)
+                if len(chunk) < request:
+                    break
+                request = max(request, 64 * 1024)
+            return b"".join(chunks)
+        finally:
+            os.close(fd)
+
+    @property
+    def is_binary(self) -> bool:
+        """
+        bool: Whether the file looks binary.
+
+        Files with a known text extension are never sniffed; for other files the
+        check runs on the content already read.
+        """
+        if self.path.suffix.lower() in TEXT_EXTENSIONS:
+            return False
+        return is_binary_content(self.data)
+
+    def sniff_binary(self) -> bool:
+        """
+        Check whether the file looks binary, like is_binary, but without reading
+        the whole file: if its content has not been read yet, only the first
+        SNIFF_SIZE bytes are.
+
+        Returns:
+            bool: Whether the file looks binary.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        if self.path.suffix.lower() in TEXT_EXTENSIONS:
+            return False
+        return is_binary_content(self.head())
+
+    def head(self) -> bytes:
+        """
+        Return the first SNIFF_SIZE bytes of the file, from the content if it has
+        been read, or else by reading only them.
+
+        Returns:
+            bytes: The first bytes of the file.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        if self._data is not None:
+            return self._data[:SNIFF_SIZE]
+        with open(self.path, "rb") as file:
+            return file.read(SNIFF_SIZE)
+
+    def read_head_tail(self, head: int, tail: int) -> Tuple[bytes, bytes, int]:
+        """
+        Read the first and last bytes of the file, without reading the rest.
+
+        The file is mapped in memory, so only the pages of the head and the tail
+        are read, however large it is. Content already read is used as is.
+
+        Args:
+            head (int): The number of bytes to read from the start.
+            tail (int): The number of bytes to read from the end; they never
+                overlap the head.
+
+        Returns:
+            Tuple[bytes, bytes, int]: The head, the tail and the size of the file.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        if self._data is not None:
+            size = len(self._data)
+            return self._data[:head], self._data[max(head, size - tail):], size
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            try:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    size = len(mapped)
+                    return mapped[:head], mapped[max(head, size - tail):], size
+            except (ValueError, OSError):
+                # Empty files, and files systems that cannot map files
+                head_data = file.read(head)
+                file.seek(max(head, size - tail))
+                return head_data, file.read(), size
+
+    def text(self) -> str:
+        """
+        Decode the content as UTF-8 with universal newlines, like ``open(path, "r")``.
+
+        Returns:
+            str: The content of the file.
+
+        Raises:
+            UnicodeDecodeError: If the content is not valid UTF-8.
+        """
+        content = self.data.decode("utf-8")
+        if "\r" in content:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        return content
@@ -0,0 +1,248 @@
+"""
+This module contains the file system watchers used by the watch command.
+
+InotifyWatcher receives change events from the Linux kernel through inotify,
+which is accessed with ctypes so no extra dependency is needed. PollingWatcher
+is the portable fallback: it rescans the tree at a fixed interval and compares
+the stat signatures of the files.
+
+Both return the set of paths that changed. A path may be a file or a directory,
+and may no longer exist. The special path RESCAN means that events were lost,
+so the caller should rescan everything.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reported when events were lost and the whole tree must be rescanned.
+RESCAN = ""
+
+# Events arriving within this delay of each other are reported together, so a
+# save that produces several events triggers a single update.
+DEBOUNCE_SECONDS = 0.01
+
+Signature = Tuple[int, int, int]
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_EXCL_UNLINK = 0x04000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_MODIFY
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+    | _IN_EXCL_UNLINK
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Watch directories for changes with Linux inotify.
+
+    Raises:
+        OSError: If inotify is not available on this platform.
+    """
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self._directories: Dict[int, str] = {}
+        self._watched: Set[str] = set()
+
+    def watch(self, directories: Iterable[str]) -> None:
+        """
+        Start watching directories; directories already watched are skipped.
+
+        Args:
+            directories (Iterable[str]): The directories to watch. Subdirectories
+                are not watched unless listed.
+        """
+        for directory in directories:
+            if directory in self._watched:
+                continue
+            wd = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOSPC:
+                    logger.warning(
+                        "Cannot watch %s: the inotify watch limit is reached "
+                        "(see /proc/sys/fs/inotify/max_user_watches).",
+                        directory,
+                    )
+                else:
+                    logger.debug("Cannot watch %s: %s", directory, os.strerror(code))
+                continue
+            self._directories[wd] = directory
+            self._watched.add(directory)
+
+    def changes(self, timeout: float) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait for the first event.
+
+        Returns:
+            Set[str]: The changed paths; empty if the timeout expired.
+        """
+        changed: Set[str] = set()
+        wait = timeout
+        while True:
+            readable, _, _ = select.select([self._fd], [], [], wait)
+            if not readable:
+                return changed
+            self._read_events(changed)
+            wait = DEBOUNCE_SECONDS
+
+    def _read_events(self, changed: Set[str]) -> None:
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed; rescanning.")
+                changed.add(RESCAN)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._directories[wd]
+                self._watched.discard(directory)
+                continue
+            if name:
+                changed.add(os.path.join(directory, os.fsdecode(name)))
+            else:
+                changed.add(directory)
+
+    def close(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    Watch files by rescanning at a fixed interval.
+
+    Args:
+        scan (Callable[[], Dict[str, Signature]]): Returns the stat signature
+            (size, mtime_ns, inode) of every watched file.
+        interval (float): Seconds between two scans.
+    """
+
+    def __init__(self, scan: Callable[[], Dict[str, Signature]], interval: float):
+        self._scan = scan
+        self._interval = interval
+        self._snapshot = scan()
+        self._next_scan = time.monotonic() + interval
+
+    def watch(self, directories: Iterable[str]) -> None:
+        """Directories are discovered by the scan; nothing to do."""
+
+    def changes(self, timeout: float) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            Set[str]: The files added, removed or modified since the last scan;
+            empty if the timeout expired first.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if self._next_scan > deadline:
+                time.sleep(max(0.0, deadline - now))
+                return set()
+            time.sleep(max(0.0, self._next_scan - now))
+            snapshot = self._scan()
+            self._next_scan = time.monotonic() + self._interval
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+def signature(stat_result: os.stat_result) -> Signature:
+    """Return the part of a stat result that changes when a file is modified."""
+    return (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+
+
+def create_watcher(
+    scan: Callable[[], Dict[str, Signature]],
+    interval: float,
+    poll: bool = False,
+):
+    """
+    Create an InotifyWatcher, or a PollingWatcher if inotify is not available.
+
+    Args:
+        scan (Callable[[], Dict[str, Signature]]): The scan for the PollingWatcher.
+        interval (float): Seconds between two scans of the PollingWatcher.
+        poll (bool): Use the PollingWatcher even if inotify is available.
+
+    Returns:
+        Union[InotifyWatcher, PollingWatcher]: The watcher.
+    """
+    if not poll:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.info("inotify is not available (%s); polling for changes.", e)
+    return PollingWatcher(scan, interval)
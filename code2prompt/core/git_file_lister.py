@@ -0,0 +1,55 @@
+"""
+This module contains the git discovery backend.
+
+Instead of walking the work tree and evaluating .gitignore rules, the files are
+listed straight from the repository index with a single ``git ls-files -z`` call.
+"""
+
+import logging
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def list_git_files(root: Path) -> Optional[List[str]]:
+    """
+    List the files tracked by git below a directory.
+
+    Args:
+        root (Path): A directory inside a git work tree.
+
+    Returns:
+        Optional[List[str]]: The tracked files relative to root, "/"-separated and in
+        the same order as walk_directory, or None if git is not available or root is
+        not inside a git work tree.
+    """
+    if shutil.which("git") is None:
+        logger.warning("git is not installed; falling back to the directory walker.")
+        return None
+
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(root), "ls-files", "-z", "--cached"],
+            capture_output=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        logger.warning(
+            "%s is not inside a git repository; falling back to the directory walker: %s",
+            root,
+            e.stderr.decode("utf-8", errors="replace").strip(),
+        )
+        return None
+
+    paths = [
+        path.decode("utf-8", errors="surrogateescape")
+        for path in result.stdout.split(b"\0")
+        if path
+    ]
+    # git sorts by raw bytes ("a-b" before "a/b"); sort by path components instead
+    # so both discovery backends return files in the same order.
+    paths.sort(key=lambda path: path.split("/"))
+    return paths
@@ -0,0 +1,117 @@
+"""
+This module contains LazyFile, the data of a file for templates, processed on first use.
+
+A template that only lists paths or sizes needs no file content. A LazyFile has
+the metadata of a file from its record, and reads and processes the file only
+when the template first looks up its content, or anything else that needs it,
+such as its token count. The results are kept, so the file is processed at
+most once however many times the template uses it.
+
+process_file leaves out the files that are not valid UTF-8. Whether a file is
+only shows once it is read, so a LazyFile that is never read is kept, and one
+found not to be gets an empty content; callers that read every file anyway can
+drop them up front with decodes.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_file import build_file_data
+from code2prompt.utils.count_tokens import count_tokens
+from code2prompt.utils.language_inference import infer_language
+
+# The keys that only processing the file can set, besides "content" and "tokens".
+_PROCESSED_KEYS = frozenset({"elided_bytes", "elided_tokens"})
+
+
+class LazyFile(Mapping):
+    """
+    The data of a file, as built by process_file, with its content loaded on first access.
+
+    Templates use it like the dict of a processed file, e.g. file.path or
+    file["content"]. Looking up "content", "tokens" or a key only set once the
+    file is processed, such as "elided_bytes", processes the file; checking
+    whether a key is there with "in" does not.
+
+    Attributes:
+        record (FileRecord): The file.
+        loaded (bool): Whether the file was processed.
+    """
+
+    def __init__(
+        self,
+        record: FileRecord,
+        process: Callable[[FileRecord], Optional[Dict[str, Any]]],
+        syntax_map: dict,
+        no_codeblock: bool,
+        encoding: Optional[str] = None,
+    ):
+        """
+        Initialize the LazyFile.
+
+        Args:
+            record (FileRecord): The file.
+            process (Callable[[FileRecord], Optional[Dict[str, Any]]]): Processes
+                the file, like process_file; None means it is not valid UTF-8.
+            syntax_map (dict): Custom syntax mappings for language inference.
+            no_codeblock (bool): Flag indicating whether to disable wrapping code
+                inside markdown code blocks.
+            encoding (Optional[str]): If given, the token count of the content,
+                counted with it, is available under "tokens".
+        """
+        self.record = record
+        self.loaded = False
+        self._decoded = True
+        self._process = process
+        self._encoding = encoding
+        language = infer_language(record.path.name, syntax_map, record.head)
+        self._data = build_file_data(record, language, "", no_codeblock)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._data and key != "content":
+            return self._data[key]
+        if key == "tokens" and self._encoding is not None:
+            self._data["tokens"] = count_tokens(self["content"], self._encoding)
+            return self._data["tokens"]
+        if key != "content" and key not in _PROCESSED_KEYS:
+            raise KeyError(key)
+        self._load()
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        # Unlike Mapping's, does not look the value up, which would process the file
+        return key in self._data or (key == "tokens" and self._encoding is not None)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._data
+        if self._encoding is not None and "tokens" not in self._data:
+            yield "tokens"
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LazyFile({str(self.record.path)!r}, loaded={self.loaded})"
+
+    def decodes(self) -> bool:
+        """
+        Process the file, if it was not already, and check whether it is valid UTF-8.
+
+        Returns:
+            bool: False if process_file would leave the file out.
+        """
+        self._load()
+        return self._decoded
+
+    def _load(self) -> None:
+        """Process the file, once. A file that is not valid UTF-8 keeps an empty content."""
+        if self.loaded:
+            return
+        self.loaded = True
+        file_data = self._process(self.record)
+        self.record.release()
+        if file_data is None:
+            self._decoded = False
+        else:
+            self._data.update(file_data)
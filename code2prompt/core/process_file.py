@@ -1,59 +1,178 @@
 """
-This module contains the function to process a file and extract its metadata and content.
+This module contains the functions to process a file and extract its metadata and content.
 """
 
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional, Sequence, Union
 
+from code2prompt.core.compaction import compact
+from code2prompt.core.file_cache import FileCache
+from code2prompt.core.file_caps import FileCaps, cap_tokens, read_capped_text
+from code2prompt.core.file_record import FileRecord
 from code2prompt.utils.add_line_numbers import add_line_numbers
 from code2prompt.utils.language_inference import infer_language
+from code2prompt.utils.count_tokens import count_tokens
 from code2prompt.comment_stripper.strip_comments import strip_comments
 
 
 def process_file(
-    file_path: Path, suppress_comments: bool, line_number: bool, no_codeblock: bool, syntax_map: dict
+    file_path: Union[Path, FileRecord], suppress_comments: bool, line_number: bool, no_codeblock: bool, syntax_map: dict,
+    cache: Optional[FileCache] = None, transforms: Sequence[str] = (), caps: Optional[FileCaps] = None,
 ):
     """
     Processes a given file to extract its metadata and content.
 
     Parameters:
-    - file_path (Path): The path to the file to be processed.
+    - file_path (Union[Path, FileRecord]): The file to be processed. A FileRecord
+      from retrieve_file_records is used as is, without stat'ing or reading the
+      file again.
     - suppress_comments (bool): Flag indicating whether to remove comments from the file content.
     - line_number (bool): Flag indicating whether to add line numbers to the file content.
     - no_codeblock (bool): Flag indicating whether to disable wrapping code inside markdown code blocks.
     - syntax_map (dict): Custom syntax mappings for language inference.
+    - cache (Optional[FileCache]): Cache of processed contents. It must have been
+      opened with the same suppress_comments, line_number, syntax_map and transforms options.
+    - transforms (Sequence[str]): The compaction transforms to apply, among
+      code2prompt.core.compaction.TRANSFORMS.
+    - caps (Optional[FileCaps]): The byte and token caps of the file. A file cut
+      by them is not cached, and its data gets "elided_bytes" and "elided_tokens".
 
     Returns:
     dict: A dictionary containing the file information and content.
     """
-    file_extension = file_path.suffix
-    file_size = file_path.stat().st_size
-    file_creation_time = datetime.fromtimestamp(file_path.stat().st_ctime).strftime(
-        "%Y-%m-%d %H:%M:%S"
-    )
-    file_modification_time = datetime.fromtimestamp(file_path.stat().st_mtime).strftime(
-        "%Y-%m-%d %H:%M:%S"
-    )
+    record = file_path if isinstance(file_path, FileRecord) else FileRecord.from_path(file_path)
+    language = infer_language(record.path.name, syntax_map, record.head)
+    # The cache would hash the whole content of a file above the byte cap
+    if caps is not None and caps.exceeds_bytes(record):
+        cache = None
+    cached = cache.get(record) if cache is not None else None
 
-    try:
-        with file_path.open("r", encoding="utf-8") as f:
-            file_content = f.read()
+    elided = {}
+    if cached is not None:
+        file_content = cached.content
+    else:
+        file_content = transform_content(
+            record, language, suppress_comments, line_number, transforms, caps=caps, elided=elided
+        )
+        if file_content is None:
+            return None
+
+        if cache is not None and not elided:
+            cache.put(record, file_content)
 
-        language = infer_language(file_path.name, syntax_map)
+    return add_elided(build_file_data(record, language, file_content, no_codeblock), elided)
+
+
+def transform_content(
+    record: FileRecord,
+    language: str,
+    suppress_comments: bool,
+    line_number: bool,
+    transforms: Sequence[str] = (),
+    tokens_saved: Optional[Dict[str, int]] = None,
+    encoding: Optional[str] = None,
+    caps: Optional[FileCaps] = None,
+    elided: Optional[Dict[str, int]] = None,
+) -> Optional[str]:
+    """
+    Decodes a file and applies the requested transformations to its content.
+
+    Parameters:
+    - record (FileRecord): The file.
+    - language (str): The language of the file, as inferred by infer_language.
+    - suppress_comments (bool): Flag indicating whether to remove comments from the file content.
+    - line_number (bool): Flag indicating whether to add line numbers to the file content.
+    - transforms (Sequence[str]): The compaction transforms to apply after
+      stripping comments, among code2prompt.core.compaction.TRANSFORMS.
+    - tokens_saved (Optional[Dict[str, int]]): If given, the tokens saved by each
+      transform, counted with encoding, are stored in it.
+    - encoding (Optional[str]): The encoding counting the tokens saved.
+    - caps (Optional[FileCaps]): The byte and token caps. A file above the byte
+      cap is not read in full: only its head and tail are, around an elision
+      marker. The token cap applies to the content once transformed, before
+      line numbers are added.
+    - elided (Optional[Dict[str, int]]): If given, the bytes and tokens cut by
+      the caps are stored in it under "bytes" and "tokens", when there are any.
+
+    Returns:
+    Optional[str]: The transformed content, or None if the file is not valid UTF-8.
+    """
+    try:
+        if caps is not None and caps.exceeds_bytes(record):
+            file_content, elided_bytes = read_capped_text(record, caps)
+            if elided_bytes and elided is not None:
+                elided["bytes"] = elided_bytes
+        else:
+            file_content = record.text()
 
         if suppress_comments and language != "unknown":
             file_content = strip_comments(file_content, language)
 
+        if transforms:
+            count = None
+            if tokens_saved is not None:
+                def count(text: str) -> int:
+                    return count_tokens(text, encoding)
+
+            file_content, saved = compact(file_content, language, transforms, count)
+            if tokens_saved is not None:
+                tokens_saved.update(saved)
+
+        if caps is not None and caps.max_tokens:
+            file_content, elided_tokens = cap_tokens(file_content, caps)
+            if elided_tokens and elided is not None:
+                elided["tokens"] = elided_tokens
+
         if line_number:
             file_content = add_line_numbers(file_content)
     except UnicodeDecodeError:
         return None
+    return file_content
+
 
+def add_elided(file_data: dict, elided: Optional[Dict[str, int]]) -> dict:
+    """
+    Adds the bytes and tokens cut by the caps to the data of a file.
+
+    Parameters:
+    - file_data (dict): The data of the file, as built by build_file_data.
+    - elided (Optional[Dict[str, int]]): The bytes and tokens cut, as filled in by transform_content.
+
+    Returns:
+    dict: The data of the file, with "elided_bytes" and "elided_tokens" if anything was cut.
+    """
+    if elided:
+        file_data["elided_bytes"] = elided.get("bytes", 0)
+        file_data["elided_tokens"] = elided.get("tokens", 0)
+    return file_data
+
+
+def build_file_data(record: FileRecord, language: str, file_content: str, no_codeblock: bool) -> dict:
+    """
+    Builds the dictionary describing a processed file.
+
+    Parameters:
+    - record (FileRecord): The file.
+    - language (str): The language of the file.
+    - file_content (str): The transformed content.
+    - no_codeblock (bool): Flag indicating whether to disable wrapping code inside markdown code blocks.
+
+    Returns:
+    dict: A dictionary containing the file information and content.
+    """
+    file_path = record.path
+    file_creation_time = datetime.fromtimestamp(record.stat.st_ctime).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+    file_modification_time = datetime.fromtimestamp(record.stat.st_mtime).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
     return {
         "path": str(file_path),
-        "extension": file_extension,
+        "extension": file_path.suffix,
         "language": language,
-        "size": file_size,
+        "size": record.stat.st_size,
         "created": file_creation_time,
         "modified": file_modification_time,
         "content": file_content,
@@ -1,18 +1,52 @@
 """
 This module contains functions for processing files and directories.
+
+Files can be processed serially or in parallel. With a thread pool, reading
+overlaps with processing; with a process pool, comment stripping also runs on
+several cores. Results are always returned in the order of the input.
 """
 
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
-from code2prompt.core.process_file import process_file
+from typing import Callable, List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
+from code2prompt.core.file_cache import CachedFile, FileCache
+from code2prompt.core.file_caps import FileCaps
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_file import add_elided, build_file_data, transform_content
+from code2prompt.utils.count_tokens import count_tokens_batch
+from code2prompt.utils.language_inference import infer_language
+
+EXECUTORS = ("thread", "process")
+
+# Number of files sent to a worker process at once, to amortise the IPC cost.
+PROCESS_BATCH_SIZE = 32
+
+# Number of files whose contents are tokenized together.
+TOKEN_BATCH_SIZE = 64
+
+# Tasks submitted ahead of the one being consumed, per worker. Bounds the number
+# of processed files held in memory while keeping the workers busy.
+_PREFETCH_PER_WORKER = 4
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def process_files(
-    file_paths: List[Path],
+    file_paths: Sequence[Union[Path, FileRecord]],
     line_number: bool,
     no_codeblock: bool,
     suppress_comments: bool,
-    syntax_map: dict  # Add this parameter
+    syntax_map: dict,  # Add this parameter
+    cache: Optional[FileCache] = None,
+    workers: int = 1,
+    executor: str = "thread",
+    encoding: Optional[str] = None,
+    transforms: Sequence[str] = (),
+    savings_encoding: Optional[str] = None,
+    caps: Optional[FileCaps] = None,
 ) -> List[Dict[str, Any]]:
     """
     Processes files or directories based on the provided paths.
@@ -20,26 +54,304 @@ def process_files(
     Args:
     options (dict): A dictionary containing options such as paths, gitignore patterns,
                     and flags for processing files.
+    workers (int): Number of files processed concurrently; 1 processes them serially.
+    executor (str): "thread" or "process"; see process_files_iter.
+    encoding (Optional[str]): If given, the token count of each file is stored under "tokens".
+    transforms (Sequence[str]): The compaction transforms to apply; see process_files_iter.
+    savings_encoding (Optional[str]): If given, the tokens saved by each transform
+        are stored under "tokens_saved"; see process_files_iter.
+    caps (Optional[FileCaps]): The byte and token caps of each file; see process_files_iter.
 
     Returns:
     list: A list of dictionaries containing processed file data.
     """
-    files_data = []
-    
-    # Test file paths if List[Path] type
-    if not (isinstance(file_paths, list) and all(isinstance(path, Path) for path in file_paths)): 
-        raise ValueError("file_paths must be a list of Path objects")
+    # Test file paths if List[Path] type; FileRecords from retrieve_file_records are accepted too
+    if not (isinstance(file_paths, list) and all(isinstance(path, (Path, FileRecord)) for path in file_paths)):
+        raise ValueError("file_paths must be a list of Path or FileRecord objects")
 
-    # Use get_file_paths to retrieve all file paths to process
-    for path in file_paths:
-        result = process_file(
-            file_path=path,
-            suppress_comments=suppress_comments,
+    return list(
+        process_files_iter(
+            file_paths,
             line_number=line_number,
             no_codeblock=no_codeblock,
-            syntax_map=syntax_map  # Ensure this is being passed
+            suppress_comments=suppress_comments,
+            syntax_map=syntax_map,  # Ensure this is being passed
+            cache=cache,
+            workers=workers,
+            executor=executor,
+            encoding=encoding,
+            transforms=transforms,
+            savings_encoding=savings_encoding,
+            caps=caps,
+        )
+    )
+
+
+def process_files_iter(
+    file_paths: Sequence[Union[Path, FileRecord]],
+    line_number: bool,
+    no_codeblock: bool,
+    suppress_comments: bool,
+    syntax_map: dict,
+    cache: Optional[FileCache] = None,
+    workers: int = 1,
+    executor: str = "thread",
+    encoding: Optional[str] = None,
+    transforms: Sequence[str] = (),
+    savings_encoding: Optional[str] = None,
+    caps: Optional[FileCaps] = None,
+    token_batch_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Processes files one at a time, yielding the data of each as soon as it is ready.
+
+    Unlike process_files, only one file's content is held at a time: the content
+    read into a FileRecord is released once the file has been processed. With
+    several workers, a bounded number of files is processed ahead, and the
+    results are still yielded in the order of file_paths.
+
+    Args:
+    file_paths (Sequence[Union[Path, FileRecord]]): The files to process.
+    line_number (bool): Whether to add line numbers to the content.
+    no_codeblock (bool): Whether to disable wrapping code inside markdown code blocks.
+    suppress_comments (bool): Whether to remove comments from the content.
+    syntax_map (dict): Custom syntax mappings for language inference.
+    cache (Optional[FileCache]): Cache of processed contents.
+    workers (int): Number of files processed concurrently; 1 processes them serially.
+    executor (str): "thread" loads and transforms the files on a thread pool,
+        which overlaps reading with processing. "process" runs the decoding and
+        the transforms on a process pool, so the CPU-bound comment stripping
+        scales with the number of cores; the cache is then consulted in the
+        calling process.
+    encoding (Optional[str]): If given, the processed content of each file is
+        tokenized with this encoding and its count is stored under "tokens".
+        Files are tokenized in batches of token_batch_size, across threads, and
+        counts found in the cache are reused.
+    transforms (Sequence[str]): The compaction transforms to apply after
+        stripping comments, among code2prompt.core.compaction.TRANSFORMS.
+    savings_encoding (Optional[str]): If given, the content of each file is
+        tokenized after each transform, and the tokens saved by each are stored
+        under "tokens_saved". The cache is then not read from, so the transforms
+        always run.
+    caps (Optional[FileCaps]): The byte and token caps of each file. A file cut
+        by them gets "elided_bytes" and "elided_tokens", and is not cached;
+        nor is a file above the byte cap looked up, since that would hash its
+        whole content.
+    token_batch_size (Optional[int]): Number of files tokenized together,
+        TOKEN_BATCH_SIZE by default. A file is only
+        yielded once its batch is tokenized, so a consumer that may stop early,
+        such as the greedy packer, uses 1 to keep files from being read ahead
+        of it.
+
+    Yields:
+    dict: The processed data of each file that could be decoded.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Invalid executor. Must be one of: {', '.join(EXECUTORS)}")
+
+    def load(path: Union[Path, FileRecord]) -> _LoadedFile:
+        record = path if isinstance(path, FileRecord) else FileRecord.from_path(path)
+        language = infer_language(record.path.name, syntax_map, record.head)
+        cached = cache.get(record) if _use_cache(cache, record, caps) and savings_encoding is None else None
+        if cached is not None:
+            return _LoadedFile(record, language, cached.content, cached)
+        tokens_saved = {} if savings_encoding is not None else None
+        elided: Dict[str, int] = {}
+        content = transform_content(
+            record, language, suppress_comments, line_number, transforms, tokens_saved, savings_encoding,
+            caps, elided,
         )
-        if result:
-            files_data.append(result)
+        return _LoadedFile(record, language, content, None, tokens_saved, elided)
+
+    if workers <= 1:
+        loaded: Iterable[_LoadedFile] = map(load, file_paths)
+        yield from _finish(loaded, no_codeblock, cache, encoding, token_batch_size)
+    elif executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code2prompt-process") as pool:
+            loaded = ordered_map(pool, load, file_paths, workers * _PREFETCH_PER_WORKER)
+            yield from _finish(loaded, no_codeblock, cache, encoding, token_batch_size)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = _load_in_pool(
+                pool, file_paths, workers, line_number, suppress_comments, syntax_map,
+                None if savings_encoding is not None else cache,
+                transforms, savings_encoding, caps,
+            )
+            yield from _finish(loaded, no_codeblock, cache, encoding, token_batch_size)
+
+
+def ordered_map(
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], window: int
+) -> Iterator[R]:
+    """
+    Map a function over items on an executor, yielding the results in order.
+
+    Unlike Executor.map, at most window tasks are in flight, so the items are
+    consumed lazily and the results of the tasks ahead are bounded.
+
+    Args:
+    executor (Executor): The executor running the tasks.
+    fn (Callable[[T], R]): The function to apply.
+    items (Iterable[T]): The items.
+    window (int): The maximum number of tasks in flight.
+
+    Yields:
+    R: The result for each item, in the order of items.
+    """
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class _LoadedFile(NamedTuple):
+    """A file with its transformed content, None if it could not be decoded."""
+
+    record: FileRecord
+    language: str
+    content: Optional[str]
+    cached: Optional[CachedFile]
+    tokens_saved: Optional[Dict[str, int]] = None
+    elided: Optional[Dict[str, int]] = None
+
+
+def _finish(
+    loaded: Iterable[_LoadedFile],
+    no_codeblock: bool,
+    cache: Optional[FileCache],
+    encoding: Optional[str],
+    token_batch_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Count the tokens of the loaded files in batches, fill the cache and build their data."""
+    batch_size = (token_batch_size or TOKEN_BATCH_SIZE) if encoding is not None else 1
+    iterator = iter(loaded)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+
+        tokens: List[Optional[int]] = [None] * len(batch)
+        if encoding is not None:
+            for i, item in enumerate(batch):
+                if item.cached is not None:
+                    tokens[i] = item.cached.tokens
+            todo = [i for i, item in enumerate(batch) if item.content is not None and tokens[i] is None]
+            counts = count_tokens_batch([batch[i].content for i in todo], encoding)
+            for i, count in zip(todo, counts):
+                tokens[i] = count
+
+        for item, count in zip(batch, tokens):
+            # Files cut by the caps are not cached, so they always carry what was elided
+            if item.content is not None and cache is not None and not item.elided:
+                if item.cached is None:
+                    cache.put(item.record, item.content, count)
+                elif item.cached.tokens is None and count is not None:
+                    cache.set_tokens(item.cached, count)
+            item.record.release()
+            if item.content is None:
+                continue
+            file_data = build_file_data(item.record, item.language, item.content, no_codeblock)
+            if count is not None:
+                file_data["tokens"] = count
+            if item.tokens_saved is not None:
+                file_data["tokens_saved"] = item.tokens_saved
+            yield add_elided(file_data, item.elided)
+
+
+def _load_in_pool(
+    pool: Executor,
+    file_paths: Iterable[Union[Path, FileRecord]],
+    workers: int,
+    line_number: bool,
+    suppress_comments: bool,
+    syntax_map: dict,
+    cache: Optional[FileCache],
+    transforms: Sequence[str] = (),
+    savings_encoding: Optional[str] = None,
+    caps: Optional[FileCaps] = None,
+) -> Iterator[_LoadedFile]:
+    """Transform files on a process pool, in batches, consulting the cache locally."""
+
+    def batches() -> Iterator[List[_LoadedFile]]:
+        iterator = iter(file_paths)
+        while True:
+            batch = []
+            for path in islice(iterator, PROCESS_BATCH_SIZE):
+                record = path if isinstance(path, FileRecord) else FileRecord.from_path(path)
+                language = infer_language(record.path.name, syntax_map, record.head)
+                cached = cache.get(record) if _use_cache(cache, record, caps) else None
+                content = cached.content if cached is not None else None
+                batch.append(_LoadedFile(record, language, content, cached))
+            if not batch:
+                return
+            yield batch
+
+    def submit(batch: List[_LoadedFile]) -> tuple:
+        # Only the files missing from the cache are sent to a worker
+        todo = [(item.record, item.language) for item in batch if item.cached is None]
+        future = (
+            pool.submit(
+                _transform_batch, todo, suppress_comments, line_number, transforms, savings_encoding, caps
+            )
+            if todo
+            else None
+        )
+        return batch, future
+
+    def drain(entry) -> Iterator[_LoadedFile]:
+        batch, future = entry
+        transformed = iter(future.result()) if future is not None else iter(())
+        for item in batch:
+            if item.cached is None:
+                content, tokens_saved, elided = next(transformed)
+                item = item._replace(content=content, tokens_saved=tokens_saved, elided=elided)
+            yield item
+
+    pending = deque()
+    try:
+        for batch in batches():
+            pending.append(submit(batch))
+            if len(pending) >= workers * 2:
+                yield from drain(pending.popleft())
+        while pending:
+            yield from drain(pending.popleft())
+    finally:
+        for _, future in pending:
+            if future is not None:
+                future.cancel()
+
+
+def _transform_batch(
+    batch: List[tuple],
+    suppress_comments: bool,
+    line_number: bool,
+    transforms: Sequence[str] = (),
+    savings_encoding: Optional[str] = None,
+    caps: Optional[FileCaps] = None,
+) -> List[Tuple[Optional[str], Optional[Dict[str, int]], Dict[str, int]]]:
+    """
+    Run in a worker process: decode and transform a batch of files, with the
+    tokens saved by each transform and the bytes and tokens cut by the caps.
+    """
+    results = []
+    for record, language in batch:
+        tokens_saved = {} if savings_encoding is not None else None
+        elided: Dict[str, int] = {}
+        content = transform_content(
+            record, language, suppress_comments, line_number, transforms, tokens_saved, savings_encoding,
+            caps, elided,
+        )
+        results.append((content, tokens_saved, elided))
+    return results
+
 
-    return files_data
+def _use_cache(cache: Optional[FileCache], record: FileRecord, caps: Optional[FileCaps]) -> bool:
+    """Whether the cache is used for a file; it would hash the whole content of a file above the byte cap."""
+    return cache is not None and not (caps is not None and caps.exceeds_bytes(record))
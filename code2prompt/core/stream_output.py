@@ -0,0 +1,322 @@
+"""
+This module contains the streaming output path of the generate command.
+
+Instead of building the whole output string in memory, it is written as it is
+produced. For the default Markdown output, the section of each file is written
+as soon as the file is processed. The sections are spooled to a temporary file,
+which stays in memory up to SPOOL_MAX_SIZE and moves to disk beyond. The table
+of contents can only list files once they have been decoded successfully, so it
+is written first and the spool is copied after it. Custom templates are
+rendered chunk by chunk and the chunks are written as Jinja yields them.
+
+write_split_markdown spreads the Markdown output over several files, each under
+a token limit and with its own table of contents. The tokens of each part are
+summed from the counts of its pieces as the files stream in, so no part is
+tokenized again once assembled.
+"""
+
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from code2prompt.utils.generate_markdown_content import (
+    format_file_section,
+    format_table_of_contents,
+)
+from code2prompt.utils.logging_utils import log_output_created
+
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Template chunks are coalesced into blocks of about this size before they are
+# written and counted, as Jinja yields many tiny chunks.
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+@contextmanager
+def open_output_sink(output_path: Optional[Path]) -> Iterator[TextIO]:
+    """
+    Open the output file for writing, or use stdout if no output file is given.
+
+    Args:
+        output_path (Optional[Path]): The output file.
+
+    Yields:
+        TextIO: The stream to write the output to.
+    """
+    if not output_path:
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    with Path(output_path).open("w", encoding="utf-8") as output_file:
+        yield output_file
+    log_output_created(output_path)
+
+
+def write_markdown_stream(
+    files_data: Iterable[Dict[str, Any]],
+    no_codeblock: bool,
+    sink: TextIO,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> int:
+    """
+    Write the Markdown of the files to a stream, one section at a time.
+
+    The output is identical to generate_markdown_content.
+
+    Args:
+        files_data (Iterable[Dict[str, Any]]): The processed files, typically from
+            process_files_iter so that each file is read only when it is written.
+        no_codeblock (bool): Whether to disable wrapping code inside markdown code blocks.
+        sink (TextIO): The stream to write to.
+        count_tokens (Optional[Callable[[str], int]]): Counts the tokens of a chunk.
+            The counts of the chunks are summed. For files that carry their own
+            token count, as computed by process_files_iter, only the section
+            around the content is counted.
+
+    Returns:
+        int: The number of tokens, or 0 if count_tokens is None.
+    """
+    token_count = 0
+    paths = []
+    with tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_SIZE, mode="w+", encoding="utf-8", newline=""
+    ) as spool:
+        for file in files_data:
+            section = format_file_section(file, no_codeblock)
+            spool.write(section)
+            paths.append({"path": file["path"]})
+            if count_tokens is not None:
+                if "tokens" in file:
+                    frame = format_file_section({**file, "content": ""}, no_codeblock)
+                    token_count += count_tokens(frame) + file["tokens"]
+                else:
+                    token_count += count_tokens(section)
+
+        table_of_contents = format_table_of_contents(paths)
+        sink.write(table_of_contents)
+        if count_tokens is not None:
+            token_count += count_tokens(table_of_contents)
+
+        spool.seek(0)
+        shutil.copyfileobj(spool, sink, _COPY_CHUNK_SIZE)
+    return token_count
+
+
+def write_chunks(
+    chunks: Iterable[str],
+    sink: TextIO,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> int:
+    """
+    Write chunks of text to a stream as they are produced, e.g. by stream_template.
+
+    Small chunks are coalesced into blocks of about WRITE_BUFFER_SIZE characters,
+    and each block is written, flushed and counted before the next is produced.
+
+    Args:
+        chunks (Iterable[str]): The chunks of the output.
+        sink (TextIO): The stream to write to.
+        count_tokens (Optional[Callable[[str], int]]): Counts the tokens of a block.
+            The counts of the blocks are summed.
+
+    Returns:
+        int: The number of tokens, or 0 if count_tokens is None.
+    """
+    token_count = 0
+    buffer = []
+    buffered = 0
+
+    def flush():
+        nonlocal token_count, buffered
+        block = "".join(buffer)
+        buffer.clear()
+        buffered = 0
+        sink.write(block)
+        sink.flush()
+        if count_tokens is not None:
+            token_count += count_tokens(block)
+
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= WRITE_BUFFER_SIZE:
+            flush()
+    if buffer:
+        flush()
+    return token_count
+
+
+class OutputPart(NamedTuple):
+    """A part of a split output."""
+
+    path: Path
+    files: int
+    tokens: int
+
+
+def split_part_path(output_path: Path, index: int) -> Path:
+    """
+    Return the path of a part of a split output, e.g. out.002.md for out.md.
+
+    Args:
+        output_path (Path): The output file given by the user.
+        index (int): The number of the part, from 1.
+
+    Returns:
+        Path: The path of the part.
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.{index:03d}{output_path.suffix}")
+
+
+def write_split_markdown(
+    files_data: Iterable[Dict[str, Any]],
+    no_codeblock: bool,
+    output_path: Path,
+    max_tokens: int,
+    count_tokens: Callable[[str], int],
+) -> List[OutputPart]:
+    """
+    Write the Markdown of the files to numbered parts of at most max_tokens each.
+
+    Files are written whole, in order, and a new part is started when the next
+    file does not fit. A file that does not fit even in a part of its own is
+    split at line boundaries (within a line only for very long lines) into
+    sections titled "path (part k of n)". Each part starts with the table of
+    contents of its own sections.
+
+    The tokens of a part are the sum of the tokens of its table of contents
+    heading, entries and sections, counted separately; tokenizing the part as a
+    whole may give a few tokens less, where pieces meet.
+
+    Args:
+        files_data (Iterable[Dict[str, Any]]): The processed files, typically from
+            process_files_iter with an encoding, so that each file carries the
+            token count of its content.
+        no_codeblock (bool): Whether to disable wrapping code inside markdown code blocks.
+        output_path (Path): The output file; the parts are named after it by
+            split_part_path.
+        max_tokens (int): The token limit of a part.
+        count_tokens (Callable[[str], int]): Counts the tokens of a piece of text.
+
+    Returns:
+        List[OutputPart]: The parts written.
+
+    Raises:
+        ValueError: If max_tokens cannot fit the section of a file even without
+            its content.
+    """
+    base = count_tokens(format_table_of_contents([]))
+    parts: List[OutputPart] = []
+    entries: List[Dict[str, str]] = []
+    used = base
+    spool = None
+
+    def close_part() -> None:
+        path = split_part_path(output_path, len(parts) + 1)
+        with path.open("w", encoding="utf-8") as part_file:
+            part_file.write(format_table_of_contents(entries))
+            spool.seek(0)
+            shutil.copyfileobj(spool, part_file, _COPY_CHUNK_SIZE)
+        spool.close()
+        log_output_created(path)
+        parts.append(OutputPart(path, len(entries), used))
+
+    try:
+        for file in files_data:
+            for section, cost in _file_sections(file, no_codeblock, max_tokens - base, count_tokens):
+                if entries and used + cost > max_tokens:
+                    close_part()
+                    entries, used, spool = [], base, None
+                if spool is None:
+                    spool = tempfile.SpooledTemporaryFile(
+                        max_size=SPOOL_MAX_SIZE, mode="w+", encoding="utf-8", newline=""
+                    )
+                spool.write(format_file_section(section, no_codeblock))
+                entries.append({"path": section["path"]})
+                used += cost
+        if entries:
+            close_part()
+    finally:
+        if spool is not None:
+            spool.close()
+    return parts
+
+
+def _file_sections(
+    file: Dict[str, Any],
+    no_codeblock: bool,
+    available: int,
+    count_tokens: Callable[[str], int],
+) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """
+    Yield the sections of a file with their cost, including the table of contents
+    entry: the file itself if it fits in the available tokens, else its pieces.
+    """
+
+    def frame_tokens(path: str) -> int:
+        frame = format_file_section({**file, "path": path, "content": ""}, no_codeblock)
+        return count_tokens(f"- {path}\n") + count_tokens(frame)
+
+    content = file["content"]
+    tokens = file["tokens"] if "tokens" in file else count_tokens(content)
+    cost = frame_tokens(file["path"]) + tokens
+    if cost <= available:
+        yield file, cost
+        return
+
+    # No file has more pieces than characters, so this label is the longest
+    longest = f"{file['path']} (part {len(content)} of {len(content)})"
+    chunks = _split_content(content, available - frame_tokens(longest), count_tokens)
+    if not chunks:
+        raise ValueError(
+            f"A part of {available} tokens cannot fit the section of {file['path']}."
+        )
+    for k, (chunk, chunk_tokens) in enumerate(chunks, 1):
+        path = f"{file['path']} (part {k} of {len(chunks)})"
+        yield {**file, "path": path, "content": chunk}, frame_tokens(path) + chunk_tokens
+
+
+def _split_content(
+    content: str, available: int, count_tokens: Callable[[str], int]
+) -> List[Tuple[str, int]]:
+    """Split a content into chunks of at most available tokens, at line boundaries when possible."""
+    if available < 1:
+        return []
+    chunks = []
+    lines: List[str] = []
+    used = 0
+    for line in content.splitlines(keepends=True):
+        for piece, tokens in _split_line(line, available, count_tokens):
+            if lines and used + tokens > available:
+                chunks.append(("".join(lines), used))
+                lines, used = [], 0
+            lines.append(piece)
+            used += tokens
+    if lines:
+        chunks.append(("".join(lines), used))
+    return chunks
+
+
+def _split_line(line: str, available: int, count_tokens: Callable[[str], int]) -> List[Tuple[str, int]]:
+    """Split a line into pieces of at most available tokens."""
+    tokens = count_tokens(line)
+    if tokens <= available:
+        return [(line, tokens)]
+    pieces = []
+    start = 0
+    length = available
+    while start < len(line):
+        piece = line[start:start + length]
+        tokens = count_tokens(piece)
+        if tokens > available and length > 1:
+            length //= 2
+            continue
+        pieces.append((piece, tokens))
+        start += len(piece)
+    return pieces
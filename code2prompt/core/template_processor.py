@@ -1,11 +1,19 @@
 import os
-from jinja2 import Environment
-from jinja2 import TemplateNotFound
+from functools import lru_cache
+from jinja2 import Environment, FileSystemBytecodeCache, Template, nodes
+from jinja2 import TemplateNotFound, TemplateSyntaxError
+from jinja2.bccache import Bucket
+from code2prompt.core.file_cache import default_cache_dir
 from code2prompt.utils.include_loader import CircularIncludeError, IncludeLoader
 from code2prompt.utils.logging_utils import log_error
+from typing import Iterator, Optional
 from prompt_toolkit import prompt
 import re
 
+# Number of compiled templates kept in memory, e.g. for the same template
+# rendered with different inputs.
+_TEMPLATE_CACHE_SIZE = 32
+
 
 def load_template(template_path):
     """
@@ -89,15 +97,7 @@ def process_template(template_content, files_data, user_inputs, template_path):
 
     """
     try:
-        template_dir = os.path.dirname(template_path)
-        env = Environment(
-            loader=IncludeLoader(template_dir),
-            autoescape=True,
-            keep_trailing_newline=True,
-        )
-        # Replace input placeholders with user-provided values
-        processed_content = replace_input_placeholders(template_content, user_inputs)
-        template = env.from_string(processed_content)
+        template = _prepare_template(template_content, user_inputs, template_path)
         return template.render(files=files_data, **user_inputs)
     except TemplateNotFound as e:
         log_error(
@@ -110,3 +110,141 @@ def process_template(template_content, files_data, user_inputs, template_path):
     except IOError as e:
         log_error(f"Error processing template: {e}")
         return None
+
+
+def stream_template(template_content, files_data, user_inputs, template_path) -> Iterator[str]:
+    """
+    Render a template chunk by chunk with Jinja's streaming generate() API.
+
+    The rendered output is never held in memory as a whole: each chunk is yielded
+    as soon as Jinja produces it, so it can be written to the output right away.
+
+    Args:
+        template_content (str): The content of the template to be processed.
+        files_data (list): The processed files, available to the template as files.
+        user_inputs (dict): A dictionary containing user-provided values for input placeholders in the template.
+        template_path (str): The path to the template file.
+
+    Yields:
+        str: The successive chunks of the rendered template. If an error occurs,
+        it is logged and the generator stops.
+    """
+    try:
+        template = _prepare_template(template_content, user_inputs, template_path)
+        yield from template.generate(files=files_data, **user_inputs)
+    except TemplateNotFound as e:
+        log_error(
+            f"Template file not found: {e.name}. Please check the path and ensure the file exists."
+        )
+    except CircularIncludeError as e:
+        log_error(f"Circular include detected: {str(e)}")
+    except IOError as e:
+        log_error(f"Error processing template: {e}")
+
+
+def template_uses_file_tokens(template_content):
+    """
+    Check whether a template refers to the token counts of the files.
+
+    Token counts are only computed when needed, so the template is parsed for
+    attribute or item accesses named tokens, as in file.tokens or file["tokens"].
+
+    Args:
+        template_content (str): The content of the template.
+
+    Returns:
+        bool: True if the template may use the token counts. Templates that
+        include other templates, or that cannot be parsed, are assumed to.
+    """
+    return _template_uses_file_field(template_content, "tokens")
+
+
+def template_uses_file_content(template_content):
+    """
+    Check whether a template refers to the contents of the files.
+
+    Like template_uses_file_tokens, for accesses named content, as in file.content.
+
+    Args:
+        template_content (str): The content of the template.
+
+    Returns:
+        bool: True if the template may use the contents. Templates that include
+        other templates, or that cannot be parsed, are assumed to.
+    """
+    return _template_uses_file_field(template_content, "content")
+
+
+def _template_uses_file_field(template_content, field):
+    """Check whether a template has an attribute or item access named field, or an include."""
+    try:
+        ast = Environment().parse(replace_input_placeholders(template_content, {}))
+    except TemplateSyntaxError:
+        return True
+    if any(True for _ in ast.find_all(nodes.Include)):
+        return True
+    if any(node.attr == field for node in ast.find_all(nodes.Getattr)):
+        return True
+    return any(
+        isinstance(node.arg, nodes.Const) and node.arg.value == field
+        for node in ast.find_all(nodes.Getitem)
+    )
+
+
+def _prepare_template(template_content, user_inputs, template_path):
+    """Replace the input placeholders and compile the template."""
+    # Replace input placeholders with user-provided values
+    processed_content = replace_input_placeholders(template_content, user_inputs)
+    template_path = os.fspath(template_path)
+    cache_dir = os.path.join(default_cache_dir(), "templates")
+    return _compile_template(
+        os.path.dirname(template_path), cache_dir, processed_content, template_path
+    )
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """A bytecode cache that skips the templates it cannot write, e.g. on a read-only disk."""
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def _environment(template_dir: str, cache_dir: str) -> Environment:
+    """
+    Return the environment of the templates of a directory, shared within the process.
+
+    The environment keeps the included templates it compiled, and reloads one
+    when its file changes. Compiled templates are also stored in a bytecode
+    cache under cache_dir, so later runs skip compiling them.
+    """
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache: Optional[FileSystemBytecodeCache] = _BytecodeCache(cache_dir)
+    except OSError:
+        bytecode_cache = None
+    return Environment(
+        loader=IncludeLoader(template_dir),
+        autoescape=True,
+        keep_trailing_newline=True,
+        bytecode_cache=bytecode_cache,
+    )
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_template(template_dir: str, cache_dir: str, source: str, template_path: str) -> Template:
+    """Compile the main template, through the bytecode cache of its environment."""
+    env = _environment(template_dir, cache_dir)
+    bytecode_cache = env.bytecode_cache
+    if bytecode_cache is None:
+        return env.from_string(source)
+    # As jinja2.BaseLoader.load does for the templates of a loader; the bucket
+    # is invalidated when the source, e.g. an input value, changes
+    bucket = bytecode_cache.get_bucket(env, template_path, template_path, source)
+    if bucket.code is None:
+        bucket.code = env.compile(source, template_path, template_path)
+        bytecode_cache.set_bucket(bucket)
+    return env.template_class.from_code(env, bucket.code, env.make_globals(None), None)
@@ -0,0 +1,281 @@
+"""
+This module contains the packing of files into a token budget.
+
+Each file gets a priority from PriorityRules, based on its path, age and size,
+all known from its stat. The files are then packed into the budget:
+
+- greedy (the default) takes the files by decreasing priority while they fit.
+  Files are read in that order, and a file whose section alone, without its
+  content, no longer fits the remaining budget is dropped without being read.
+- knapsack maximises the total priority of the files that fit. It needs the
+  token count of every file, so every file is read.
+
+The cost of a file is the token count of its content plus the tokens of the
+text around it in the output (its section header, its table of contents entry).
+"""
+
+import math
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from code2prompt.core.file_record import FileRecord
+from code2prompt.utils.filter_spec import FilterSpec
+
+PACKERS = ("greedy", "knapsack")
+
+# The knapsack packer works on token counts rounded up to 1/KNAPSACK_RESOLUTION
+# of the budget, which bounds its cost at the price of some unused budget.
+KNAPSACK_RESOLUTION = 1000
+
+_SECONDS_PER_DAY = 86400
+
+
+def parse_priority_weights(spec: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    Parse comma-separated pattern:weight priority rules.
+
+    Args:
+        spec (Optional[str]): The rules, e.g. "src/**:3,tests/**:0.5".
+
+    Returns:
+        List[Tuple[str, float]]: The (pattern, weight) pairs, in order.
+
+    Raises:
+        ValueError: If a rule has no weight, or the weight is not a non-negative number.
+    """
+    weights = []
+    for rule in (spec or "").split(","):
+        if not rule.strip():
+            continue
+        pattern, separator, weight = rule.strip().rpartition(":")
+        try:
+            value = float(weight)
+        except ValueError:
+            value = -1.0
+        if not separator or not pattern or not value >= 0:
+            raise ValueError(f"Invalid priority rule {rule.strip()!r}: expected pattern:weight with a weight >= 0.")
+        weights.append((pattern, value))
+    return weights
+
+
+class PriorityRules:
+    """
+    The rules giving each file its priority for the token budget.
+
+    The priority of a file is the weight of the first pattern it matches, or 1
+    if it matches none. It is halved every recency_half_life days since the file
+    was modified, and divided by (1 + its size in KiB) ** size_penalty.
+
+    Attributes:
+        weights (List[Tuple[str, float]]): The (pattern, weight) rules; patterns
+            are matched like --filter patterns, against the path relative to the
+            deepest of the roots the file is below.
+        recency_half_life (Optional[float]): The half-life of the priority, in days.
+        size_penalty (float): The exponent of the size penalty; 0 disables it.
+    """
+
+    def __init__(
+        self,
+        weights: Sequence[Tuple[str, float]] = (),
+        recency_half_life: Optional[float] = None,
+        size_penalty: float = 0.0,
+        case_sensitive: bool = False,
+        now: Optional[float] = None,
+        roots: Sequence[Union[str, "os.PathLike[str]"]] = (),
+    ):
+        self.weights = list(weights)
+        self.recency_half_life = recency_half_life
+        self.size_penalty = size_penalty
+        self._now = time.time() if now is None else now
+        self._specs = [
+            (FilterSpec.compile([pattern], None, case_sensitive), weight)
+            for pattern, weight in self.weights
+        ]
+        # Deepest first, so a file is matched below the closest root
+        self._prefixes = sorted((os.path.join(os.fspath(root), "") for root in roots), key=len, reverse=True)
+
+    def score(self, record: FileRecord) -> float:
+        """
+        Compute the priority of a file, from its path and stat only.
+
+        Args:
+            record (FileRecord): The file.
+
+        Returns:
+            float: The priority; 0 means the file is never included.
+        """
+        priority = 1.0
+        relative = self._relative(os.fspath(record.path)) if self._specs else ""
+        for spec, weight in self._specs:
+            if spec.matches(relative):
+                priority = weight
+                break
+        if self.recency_half_life:
+            age_days = max(0.0, self._now - record.stat.st_mtime) / _SECONDS_PER_DAY
+            priority *= 0.5 ** (age_days / self.recency_half_life)
+        if self.size_penalty:
+            priority /= (1 + record.size / 1024) ** self.size_penalty
+        return priority
+
+    def _relative(self, path: str) -> str:
+        """The path relative to the deepest root it is below, with "/" separators, or as is."""
+        for prefix in self._prefixes:
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+                break
+        if os.sep != "/":
+            path = path.replace(os.sep, "/")
+        return path
+
+
+class DroppedFile(NamedTuple):
+    """A file left out of the token budget, with the reason."""
+
+    path: Path
+    reason: str
+
+
+class PackResult(NamedTuple):
+    """The outcome of pack_files."""
+
+    files: List[Dict[str, Any]]
+    tokens: int
+    dropped: List[DroppedFile]
+
+
+def pack_files(
+    records: Sequence[FileRecord],
+    budget: int,
+    rules: PriorityRules,
+    frame_tokens: Callable[[Sequence[FileRecord]], List[int]],
+    process: Callable[[Iterable[FileRecord]], Iterator[Dict[str, Any]]],
+    packer: str = "greedy",
+) -> PackResult:
+    """
+    Select and process the files that fit a token budget.
+
+    Args:
+        records (Sequence[FileRecord]): The candidate files, in output order.
+        budget (int): The tokens available to the files.
+        rules (PriorityRules): The rules giving the priority of each file.
+        frame_tokens (Callable[[Sequence[FileRecord]], List[int]]): Computes the
+            tokens each file adds to the output besides its content, without
+            reading it.
+        process (Callable[[Iterable[FileRecord]], Iterator[Dict[str, Any]]]):
+            Processes files lazily, in order, like process_files_iter with an
+            encoding: each file that can be decoded is yielded with its "tokens".
+            The greedy packer picks the next file when the previous one is
+            yielded, so files are only read up to the budget if process does
+            not read ahead, e.g. with token_batch_size=1.
+        packer (str): "greedy" or "knapsack".
+
+    Returns:
+        PackResult: The processed data of the selected files in output order,
+        their total cost in tokens, and the dropped files with the reasons.
+
+    Raises:
+        ValueError: If the packer is unknown.
+    """
+    if packer not in PACKERS:
+        raise ValueError(f"Invalid packer. Must be one of: {', '.join(PACKERS)}")
+
+    scores = [rules.score(record) for record in records]
+    frames = frame_tokens(records)
+    dropped: Dict[int, str] = {}
+    for i, score in enumerate(scores):
+        if score <= 0:
+            dropped[i] = "priority 0"
+    candidates = sorted(
+        (i for i in range(len(records)) if i not in dropped), key=lambda i: (-scores[i], i)
+    )
+
+    remaining = budget
+    costs: Dict[int, int] = {}
+    files: Dict[int, Dict[str, Any]] = {}
+
+    def wanted() -> Iterator[int]:
+        for i in candidates:
+            if frames[i] > remaining:
+                dropped[i] = f"its section needs {frames[i]} tokens without content, {remaining} left"
+                continue
+            yield i
+
+    for i, file_data in _process_indices(records, wanted(), process, dropped):
+        cost = frames[i] + file_data["tokens"]
+        costs[i] = cost
+        if packer == "knapsack":
+            files[i] = file_data
+        elif cost <= remaining:
+            files[i] = file_data
+            remaining -= cost
+        else:
+            dropped[i] = f"needs {cost} tokens, {remaining} left"
+
+    if packer == "knapsack":
+        chosen = _knapsack([(i, scores[i], costs[i]) for i in files], budget)
+        for i in list(files):
+            if i not in chosen:
+                del files[i]
+                dropped[i] = f"needs {costs[i]} tokens; left out for files of higher total priority"
+
+    order = sorted(files)
+    return PackResult(
+        files=[files[i] for i in order],
+        tokens=sum(costs[i] for i in order),
+        dropped=[DroppedFile(records[i].path, dropped[i]) for i in sorted(dropped)],
+    )
+
+
+def _process_indices(
+    records: Sequence[FileRecord],
+    indices: Iterator[int],
+    process: Callable[[Iterable[FileRecord]], Iterator[Dict[str, Any]]],
+    dropped: Dict[int, str],
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Process the files at the given indices, pairing each result with its index."""
+    # process skips the files that cannot be decoded, so the results are paired
+    # with the files handed to it by path
+    pending = deque()
+
+    def feed() -> Iterator[FileRecord]:
+        for i in indices:
+            pending.append(i)
+            yield records[i]
+
+    for file_data in process(feed()):
+        i = pending.popleft()
+        while str(records[i].path) != file_data["path"]:
+            dropped[i] = "not valid UTF-8"
+            i = pending.popleft()
+        yield i, file_data
+    for i in pending:
+        dropped[i] = "not valid UTF-8"
+
+
+def _knapsack(items: List[Tuple[int, float, int]], budget: int) -> set:
+    """Pick the (index, value, cost) items of maximal total value within the budget."""
+    unit = max(1, math.ceil(budget / KNAPSACK_RESOLUTION))
+    capacity = budget // unit
+    # best[w]: the best total value of the items so far with a total weight <= w
+    best = [0.0] * (capacity + 1)
+    taken = []
+    for _, value, cost in items:
+        weight = math.ceil(cost / unit)
+        if weight > capacity:
+            taken.append(None)
+            continue
+        with_item = [b + value for b in best[: capacity + 1 - weight]]
+        take = bytes(weight) + bytes(v > b for v, b in zip(with_item, best[weight:]))
+        best = best[:weight] + [max(v, b) for v, b in zip(with_item, best[weight:])]
+        taken.append(take)
+
+    chosen = set()
+    w = capacity
+    for (i, _, cost), take in zip(reversed(items), reversed(taken)):
+        if take is not None and take[w]:
+            chosen.add(i)
+            w -= math.ceil(cost / unit)
+    return chosen
@@ -0,0 +1,157 @@
+"""
+This module contains the sampling estimator of the token count of the output.
+
+Instead of processing every file, a sample is drawn in each language (stratum),
+with more files drawn from the languages holding more bytes. The sampled files
+are processed and tokenized as usual. The tokens of the contents are estimated
+with a ratio estimator: the bytes-per-token ratio learned from the sample of a
+language is applied to the size of all its files, known from their stat. The
+tokens of the text around each content (its section and table of contents
+entry) are estimated from their mean per file.
+
+The confidence interval is the normal approximation of the combined estimator,
+with the finite population correction, so a language whose files were all
+sampled contributes no uncertainty.
+"""
+
+import math
+import random
+from collections import defaultdict
+from statistics import NormalDist
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from code2prompt.core.file_record import FileRecord
+
+# Number of files sampled in total, spread across languages by size.
+SAMPLE_SIZE = 200
+
+# Number of files sampled at least in each language, to estimate its variance.
+MIN_SAMPLE_PER_LANGUAGE = 5
+
+
+class LanguageEstimate(NamedTuple):
+    """The estimate for the files of one language."""
+
+    language: str
+    files: int
+    sampled: int
+    size: int
+    bytes_per_token: Optional[float]
+    tokens: float
+    variance: float
+
+
+class TokenEstimate(NamedTuple):
+    """The estimated token count of the output, with its confidence interval."""
+
+    tokens: int
+    low: int
+    high: int
+    confidence: float
+    files: int
+    sampled: int
+    languages: List[LanguageEstimate]
+
+
+def estimate_tokens(
+    records: Sequence[FileRecord],
+    language_of: Callable[[FileRecord], str],
+    measure: Callable[[List[FileRecord]], List[Tuple[int, int]]],
+    fixed_tokens: int = 0,
+    sample_size: int = SAMPLE_SIZE,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> TokenEstimate:
+    """
+    Estimate the token count of the output from a stratified sample of the files.
+
+    Args:
+        records (Sequence[FileRecord]): All the files of the output; only their
+            stat is used, except for the sampled ones.
+        language_of (Callable[[FileRecord], str]): Gives the stratum of a file.
+        measure (Callable[[List[FileRecord]], List[Tuple[int, int]]]): Processes
+            the sampled files and returns, for each, the tokens of its content
+            and the tokens of the text around it; (0, 0) for a file that is left
+            out of the output, e.g. because it cannot be decoded.
+        fixed_tokens (int): The tokens of the output that do not depend on the
+            files, e.g. the heading of the table of contents.
+        sample_size (int): The number of files to sample in total.
+        confidence (float): The confidence level of the interval.
+        seed (int): The seed of the sampling, so estimates are reproducible.
+
+    Returns:
+        TokenEstimate: The estimate.
+    """
+    strata: Dict[str, List[FileRecord]] = defaultdict(list)
+    for record in records:
+        strata[language_of(record)].append(record)
+    total_size = sum(record.size for record in records) or 1
+
+    rng = random.Random(seed)
+    samples: Dict[str, List[FileRecord]] = {}
+    for language, files in sorted(strata.items()):
+        size = sum(record.size for record in files)
+        n = max(MIN_SAMPLE_PER_LANGUAGE, round(sample_size * size / total_size))
+        samples[language] = files if n >= len(files) else rng.sample(files, n)
+
+    sampled = [record for language in sorted(samples) for record in samples[language]]
+    measured = iter(measure(sampled))
+
+    languages = []
+    for language in sorted(samples):
+        measurements = [next(measured) for _ in samples[language]]
+        languages.append(
+            _estimate_stratum(language, strata[language], samples[language], measurements)
+        )
+
+    tokens = fixed_tokens + sum(estimate.tokens for estimate in languages)
+    margin = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(
+        sum(estimate.variance for estimate in languages)
+    )
+    return TokenEstimate(
+        tokens=round(tokens),
+        low=max(fixed_tokens, math.floor(tokens - margin)),
+        high=math.ceil(tokens + margin),
+        confidence=confidence,
+        files=len(records),
+        sampled=len(sampled),
+        languages=languages,
+    )
+
+
+def _estimate_stratum(
+    language: str,
+    files: List[FileRecord],
+    sample: List[FileRecord],
+    measurements: List[Tuple[int, int]],
+) -> LanguageEstimate:
+    """Estimate the tokens of the files of one language from its sample."""
+    population, n = len(files), len(sample)
+    size = sum(record.size for record in files)
+    sample_size = sum(record.size for record in sample)
+    content_tokens = sum(content for content, _ in measurements)
+    frame_mean = sum(frame for _, frame in measurements) / n
+
+    ratio = content_tokens / sample_size if sample_size else 0.0
+    tokens = ratio * size + frame_mean * population
+
+    variance = 0.0
+    if n < population:
+        # Residuals of the ratio estimator of the contents plus the deviations of
+        # the frames from their mean, as both are estimated from the same files
+        residuals = [
+            (content - ratio * record.size) + (frame - frame_mean)
+            for record, (content, frame) in zip(sample, measurements)
+        ]
+        s2 = sum(r * r for r in residuals) / (n - 1)
+        variance = population**2 * (1 - n / population) * s2 / n
+
+    return LanguageEstimate(
+        language=language,
+        files=population,
+        sampled=n,
+        size=size,
+        bytes_per_token=sample_size / content_tokens if content_tokens else None,
+        tokens=tokens,
+        variance=variance,
+    )
@@ -0,0 +1,195 @@
+"""
+This module contains a directory walker built on os.scandir.
+
+Unlike ``Path.rglob("*")``, the walker evaluates gitignore and exclude rules when it
+meets a directory and never descends into a pruned subtree. It yields the
+``os.DirEntry`` objects of the files it keeps, so callers can reuse the type and
+stat information cached by the operating system instead of issuing new syscalls.
+With several workers, directories are scanned concurrently on a thread pool.
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+from code2prompt.utils.filter_spec import FilterSpec
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher, GitignoreTree
+
+logger = logging.getLogger(__name__)
+
+
+def walk_directory(
+    root: Path,
+    gitignore_matcher: Optional[Union[GitignoreMatcher, GitignoreTree]] = None,
+    filter_spec: Optional[FilterSpec] = None,
+    workers: int = 1,
+    directories: Optional[List[str]] = None,
+) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield the files below a directory, pruning ignored subtrees.
+
+    Entries are visited in name order, so the output is deterministic. Symbolic
+    links to directories are not followed, as with ``Path.rglob``. When gitignore
+    rules are given, the .gitignore file of every directory below the root is
+    loaded as the walker enters it and applies to that subtree.
+
+    Args:
+        root (Path): The directory to walk.
+        gitignore_matcher (Optional[Union[GitignoreMatcher, GitignoreTree]]): Rules of
+            the root directory with paths relative to root, or a GitignoreTree to
+            reuse its per-directory cache. None disables gitignore handling.
+        filter_spec (Optional[FilterSpec]): Include and exclude patterns, matched
+            against paths relative to root. Only directories whose whole subtree
+            is excluded are pruned; include patterns are left to the caller.
+        workers (int): Number of threads scanning directories concurrently. With
+            more than one worker the whole tree is scanned before the first entry
+            is yielded; the order is the same as with a single worker.
+        directories (Optional[List[str]]): If given, the path of every directory
+            that is walked, the root included, is appended to it.
+
+    Yields:
+        os.DirEntry: The entries of the regular files that are not ignored.
+    """
+    if isinstance(gitignore_matcher, GitignoreMatcher):
+        gitignore_matcher = GitignoreTree(root, gitignore_matcher)
+    root_matcher = (
+        gitignore_matcher.root_matcher if gitignore_matcher is not None else None
+    )
+    if workers > 1:
+        yield from _walk_parallel(
+            str(root), root_matcher, gitignore_matcher, filter_spec, workers, directories
+        )
+        return
+    yield from _walk(
+        str(root),
+        "",
+        root_matcher,
+        gitignore_matcher,
+        filter_spec,
+        directories,
+    )
+
+
+def _scan_directory(
+    directory: str,
+    relative_dir: str,
+    gitignore_matcher: Optional[GitignoreMatcher],
+    gitignore_tree: Optional[GitignoreTree],
+    filter_spec: Optional[FilterSpec],
+) -> Tuple[List[Tuple[os.DirEntry, str, bool]], Optional[GitignoreMatcher]]:
+    """
+    Scan a single directory.
+
+    Returns the kept entries in name order as (entry, relative path, is_dir) tuples,
+    and the matcher that applies to the subdirectories.
+    """
+    try:
+        with os.scandir(directory) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+    except OSError as e:
+        logger.warning("Skipping directory %s: %s", directory, e)
+        return [], gitignore_matcher
+
+    if gitignore_tree is not None:
+        gitignore_entry = next(
+            (e for e in entries if e.name == ".gitignore" and e.is_file()), None
+        )
+        gitignore_matcher = gitignore_tree.matcher_for(
+            relative_dir, gitignore_matcher, gitignore_entry
+        )
+
+    kept = []
+    for entry in entries:
+        relative = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if gitignore_matcher and gitignore_matcher.match(relative, is_dir=True):
+                logger.debug("Pruning %s: Directory is ignored.", entry.path)
+                continue
+            if filter_spec and filter_spec.excludes_directory(relative):
+                logger.debug("Pruning %s: Directory is excluded.", entry.path)
+                continue
+            kept.append((entry, relative, True))
+        elif entry.is_file():
+            if gitignore_matcher and gitignore_matcher.match(relative):
+                logger.debug("Skipping %s: File is ignored.", entry.path)
+                continue
+            kept.append((entry, relative, False))
+    return kept, gitignore_matcher
+
+
+def _walk(
+    directory: str,
+    relative_dir: str,
+    gitignore_matcher: Optional[GitignoreMatcher],
+    gitignore_tree: Optional[GitignoreTree],
+    filter_spec: Optional[FilterSpec],
+    directories: Optional[List[str]] = None,
+) -> Iterator[os.DirEntry]:
+    if directories is not None:
+        directories.append(directory)
+    kept, gitignore_matcher = _scan_directory(
+        directory, relative_dir, gitignore_matcher, gitignore_tree, filter_spec
+    )
+    for entry, relative, is_dir in kept:
+        if is_dir:
+            yield from _walk(
+                entry.path,
+                relative,
+                gitignore_matcher,
+                gitignore_tree,
+                filter_spec,
+                directories,
+            )
+        else:
+            yield entry
+
+
+def _walk_parallel(
+    root: str,
+    root_matcher: Optional[GitignoreMatcher],
+    gitignore_tree: Optional[GitignoreTree],
+    filter_spec: Optional[FilterSpec],
+    workers: int,
+    directories: Optional[List[str]] = None,
+) -> List[os.DirEntry]:
+    # Every directory is a task on the pool's shared queue, so an idle worker picks
+    # up whichever subdirectory is pending next, regardless of which worker found
+    # it. scandir and stat release the GIL, which is what makes this pay off on
+    # high-latency file systems such as NFS.
+    files: List[Tuple[List[str], os.DirEntry]] = []
+    walked: List[Tuple[List[str], str]] = [([], root)]
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="code2prompt-walk"
+    ) as executor:
+        pending = {
+            executor.submit(
+                _scan_directory, root, "", root_matcher, gitignore_tree, filter_spec
+            )
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kept, matcher = future.result()
+                for entry, relative, is_dir in kept:
+                    if is_dir:
+                        walked.append((relative.split("/"), entry.path))
+                        pending.add(
+                            executor.submit(
+                                _scan_directory,
+                                entry.path,
+                                relative,
+                                matcher,
+                                gitignore_tree,
+                                filter_spec,
+                            )
+                        )
+                    else:
+                        files.append((relative.split("/"), entry))
+    # Sorting by path components reproduces the depth-first name order of _walk.
+    files.sort(key=lambda item: item[0])
+    if directories is not None:
+        walked.sort(key=lambda item: item[0])
+        directories.extend(path for _, path in walked)
+    return [entry for _, entry in files]
@@ -5,13 +5,37 @@ from pathlib import Path
 import click
 from code2prompt.commands.analyze import AnalyzeCommand
 from code2prompt.commands.generate import GenerateCommand
+from code2prompt.commands.watch import WatchCommand
 from code2prompt.config import Configuration
 from code2prompt.utils.logging_utils import setup_logger
 from code2prompt.commands.interactive_selector import InteractiveFileSelector
-from code2prompt.core.file_path_retriever import retrieve_file_paths
+from code2prompt.core.file_path_retriever import retrieve_file_records
+from code2prompt.core.compaction import TRANSFORMS, parse_transforms
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.token_budget import parse_priority_weights
+from code2prompt.utils.encoder_registry import set_bpe_dir, warm_up
+from code2prompt.utils.filter_spec import FilterSpec
 from code2prompt.version import VERSION
 
 
+def _validate_compact(ctx, param, value):
+    """Check the names of the compaction transforms as soon as they are parsed."""
+    try:
+        parse_transforms(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+    return value
+
+
+def _validate_priority(ctx, param, value):
+    """Check the syntax of the priority rules as soon as they are parsed."""
+    try:
+        parse_priority_weights(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+    return value
+
+
 @click.group(invoke_without_command=True)
 @click.version_option(
     VERSION, "-v", "--version", message="code2prompt version %(version)s"
@@ -67,6 +91,43 @@ from code2prompt.version import VERSION
 @click.option(
     "--line-number", "-ln", is_flag=True, help="Add line numbers to source code blocks."
 )
+@click.option(
+    "--compact",
+    type=str,
+    callback=_validate_compact,
+    help=f"Comma-separated transforms compacting the code files to save tokens: all, {', '.join(TRANSFORMS)}.",
+)
+@click.option(
+    "--compact-report",
+    is_flag=True,
+    help="Report the tokens saved by each --compact transform, per file.",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help="Emit files with identical contents once, listing the other paths as references.",
+)
+@click.option(
+    "--near-duplicates",
+    type=click.FloatRange(min=0, max=1, min_open=True),
+    help="Also remove files at least this similar (0-1, e.g. 0.9) to an earlier file, estimated with MinHash.",
+)
+@click.option(
+    "--max-file-bytes",
+    type=click.IntRange(min=1),
+    help="Read at most this many bytes of a file: only the head and tail of larger files, around an elision marker.",
+)
+@click.option(
+    "--max-file-tokens",
+    type=click.IntRange(min=1),
+    help="Keep at most this many tokens of a file, cutting the middle of larger files.",
+)
+@click.option(
+    "--elide-tail",
+    type=click.FloatRange(min=0, max=1),
+    default=0.25,
+    help="Share of --max-file-bytes and --max-file-tokens kept from the end of a file.",
+)
 @click.option(
     "--no-codeblock",
     is_flag=True,
@@ -87,6 +148,12 @@ from code2prompt.version import VERSION
     default="cl100k_base",
     help="Specify the tokenizer encoding to use.",
 )
+@click.option(
+    "--tokenizer-dir",
+    type=click.Path(exists=True, file_okay=False),
+    envvar="CODE2PROMPT_TOKENIZER_DIR",
+    help="Directory of pre-seeded tokenizer BPE files (e.g. cl100k_base.tiktoken), for offline use.",
+)
 @click.option(
     "--create-templates",
     is_flag=True,
@@ -105,6 +172,11 @@ from code2prompt.version import VERSION
     is_flag=True,
     help="Display the estimated price of tokens based on provider and model.",
 )
+@click.option(
+    "--estimate",
+    is_flag=True,
+    help="Estimate the token count (and price, with --price) from a sample of the files, without generating the output.",
+)
 @click.option(
     "--provider", type=str, help="Specify the provider for price calculation."
 )
@@ -120,6 +192,84 @@ from code2prompt.version import VERSION
     type=str,
     help="Comma-separated list of extension:synonym mappings for syntax highlighting."
 )
+@click.option(
+    "--discovery",
+    type=click.Choice(["walk", "git"]),
+    default="walk",
+    help="File discovery backend: walk the directory tree or list the files tracked by git.",
+)
+@click.option(
+    "--discovery-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of threads scanning directories concurrently while walking the tree.",
+)
+@click.option(
+    "--max-tokens",
+    type=click.IntRange(min=1),
+    help="Token budget of the output; the files that do not fit are dropped by priority.",
+)
+@click.option(
+    "--priority",
+    type=str,
+    callback=_validate_priority,
+    help="Comma-separated pattern:weight priority rules for --max-tokens, e.g. 'src/**:3,tests/**:0.5'.",
+)
+@click.option(
+    "--recency-half-life",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Days after which the priority of an unmodified file halves, for --max-tokens.",
+)
+@click.option(
+    "--size-penalty",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    help="Exponent of the size penalty on the priority of a file, for --max-tokens.",
+)
+@click.option(
+    "--packer",
+    type=click.Choice(["greedy", "knapsack"]),
+    default="greedy",
+    help="Take files by priority while they fit (greedy), or maximise the total priority (knapsack).",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files read and processed concurrently; the output order does not change.",
+)
+@click.option(
+    "--executor",
+    type=click.Choice(["thread", "process"]),
+    default="thread",
+    help="Process files on threads, or on processes so comment stripping uses several cores.",
+)
+@click.option(
+    "--split-tokens",
+    type=click.IntRange(min=1),
+    help="Split the output into numbered parts (out.001.md, ...) of at most this many tokens each.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Write the output file by file instead of building it in memory; the output is not copied to the clipboard.",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=False,
+    help="Cache processed file contents between runs, keyed by file stat and content hash.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Directory of the file cache (default: $XDG_CACHE_HOME/code2prompt).",
+)
+@click.option(
+    "--cache-size",
+    type=click.IntRange(min=1),
+    default=256,
+    help="Size cap of the file cache in megabytes; least recently used entries are evicted.",
+)
 @click.pass_context
 def cli(ctx, config, path, **generate_options):
     """code2prompt CLI tool"""
@@ -129,6 +279,8 @@ def cli(ctx, config, path, **generate_options):
     else:
         ctx.obj["config"] = Configuration()  # This will now have syntax_map initialized
 
+    # Subcommands such as watch honour the generate options given before them
+    ctx.obj["generate_options"] = {"path": path, **generate_options}
     logging.info("CLI initialized with config: %s", ctx.obj["config"])
 
     if ctx.invoked_subcommand is None:
@@ -150,17 +302,25 @@ def cli(ctx, config, path, **generate_options):
 def generate(ctx, **options):
     """Generate markdown from code files"""
 
-    # Parse the syntax_map option into a dictionary
-    if options.get('syntax_map'):
-        syntax_map = {}
-        for mapping in options['syntax_map'].split(','):
-            ext, syntax = mapping.split(':')
-            syntax_map['.' + ext.strip()] = syntax.strip()  # Add a dot before the extension
-        options['syntax_map'] = syntax_map  # Replace the string with the dictionary
+    _parse_syntax_map(options)
 
     config = ctx.obj["config"].merge(options)
     logger = setup_logger(level=config.log_level)
 
+    if config.split_tokens and not config.estimate:
+        if not config.output:
+            raise click.UsageError("--split-tokens needs an output file to name the parts after; use --output.")
+        if config.template:
+            raise click.UsageError("--split-tokens only works with the default Markdown output, not with --template.")
+
+    if (config.dedupe or config.near_duplicates) and (config.stream or config.split_tokens):
+        raise click.UsageError(
+            "--dedupe and --near-duplicates list the duplicates on the first file, "
+            "which --stream and --split-tokens have already written; drop one of them."
+        )
+
+    _prepare_tokenizer(config)
+
     selected_paths: list[Path] = [Path(p) for p in config.path]
 
     # Check if selected_paths is empty before proceeding
@@ -172,34 +332,104 @@ def generate(ctx, **options):
     exclude_patterns: list[str] = config.exclude.split(",") if config.exclude else []
     case_sensitive: bool = config.case_sensitive
     gitignore: str = config.gitignore
+    filter_spec = FilterSpec.compile(filter_patterns, exclude_patterns, case_sensitive)
 
-    # Handle both directory and file inputs
-    filtered_paths = []
+    # Handle both directory and file inputs. Each file is stat'ed and read once,
+    # during discovery, and the records are handed to the generate command.
+    # Templates may not read every file, so with one only the heads are read
+    # during discovery.
+    file_records: list[FileRecord] = []
     for path in selected_paths:
         if path.is_dir():
-            filtered_paths.extend(retrieve_file_paths(
+            file_records.extend(retrieve_file_records(
                 file_paths=[path],
                 gitignore=gitignore,
                 filter_patterns=filter_patterns,
                 exclude_patterns=exclude_patterns,
                 case_sensitive=case_sensitive,
+                filter_spec=filter_spec,
+                discovery=config.discovery,
+                discovery_workers=config.discovery_workers,
+                keep_content=not (config.stream or config.estimate or config.split_tokens or config.template),
+                max_file_bytes=config.max_file_bytes,
             ))
         elif path.is_file():
-            filtered_paths.append(path)
+            file_records.append(FileRecord.from_path(path))
 
+    filtered_paths = [record.path for record in file_records]
     if filtered_paths and config.interactive:
         file_selector = InteractiveFileSelector(filtered_paths, filtered_paths)
-        filtered_selected_path = file_selector.run()
-        config.path = filtered_selected_path
-    else:
-        config.path = filtered_paths
+        selected = {str(p) for p in file_selector.run()}
+        file_records = [r for r in file_records if str(r.path) in selected]
 
-    command = GenerateCommand(config, logger)
+    config.path = [record.path for record in file_records]
+
+    command = GenerateCommand(
+        config, logger, file_records=file_records, roots=[path for path in selected_paths if path.is_dir()]
+    )
     command.execute()
 
     logger.info("Markdown generation completed.")
 
 
+@cli.command()
+@click.option(
+    "--path",
+    "-p",
+    type=click.Path(exists=True),
+    multiple=True,
+    help="Path(s) to the directory or file to watch.",
+)
+@click.option(
+    "--output", "-o", type=click.Path(), help="Name of the output Markdown file."
+)
+@click.option(
+    "--poll",
+    is_flag=True,
+    help="Poll for changes instead of using inotify.",
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0.01),
+    default=0.5,
+    help="Seconds between two scans when polling for changes.",
+)
+@click.pass_context
+def watch(ctx, **options):
+    """Regenerate the output incrementally whenever files change"""
+    options = {
+        **ctx.obj.get("generate_options", {}),
+        **{key: value for key, value in options.items() if value not in (None, ())},
+    }
+    _parse_syntax_map(options)
+
+    config = ctx.obj["config"].merge(options)
+    logger = setup_logger(level=config.log_level)
+
+    if not config.path:
+        raise click.UsageError("No file paths provided. Please specify valid paths.")
+    if not config.output:
+        raise click.UsageError("watch needs an output file; use --output.")
+    unsupported = [
+        flag
+        for flag, value in (
+            ("--max-tokens", config.max_tokens),
+            ("--dedupe", config.dedupe),
+            ("--near-duplicates", config.near_duplicates),
+            ("--split-tokens", config.split_tokens),
+            ("--stream", config.stream),
+            ("--estimate", config.estimate),
+        )
+        if value
+    ]
+    if unsupported:
+        raise click.UsageError(f"watch does not support {', '.join(unsupported)}; drop them or run without watch.")
+
+    _prepare_tokenizer(config)
+    command = WatchCommand(config, logger)
+    command.execute()
+
+
 @cli.command()
 @click.option(
     "--path",
@@ -214,19 +444,53 @@ def generate(ctx, **options):
     default="flat",
     help="Format of the analysis output.",
 )
+@click.option(
+    "--tokens",
+    is_flag=True,
+    default=None,
+    help="Tokenize the files and show the token count per extension.",
+)
 @click.pass_context
 def analyze(ctx, **options):
     """Analyze codebase structure"""
+    options = {
+        **ctx.obj.get("generate_options", {}),
+        **{key: value for key, value in options.items() if value not in (None, ())},
+    }
     config = ctx.obj["config"].merge(options)
     logger = setup_logger(level=config.log_level)
     logger.info("Analyzing codebase with options: %s", options)
 
+    if config.tokens:
+        _prepare_tokenizer(config)
+
     command = AnalyzeCommand(config, logger)
     command.execute()
 
     logger.info("Codebase analysis completed.")
 
 
+def _prepare_tokenizer(config):
+    """Set up the tokenizer and, if tokens are counted, load it while the files are discovered."""
+    if config.tokenizer_dir:
+        set_bpe_dir(config.tokenizer_dir)
+    if (
+        config.tokens or config.price or config.max_tokens or config.estimate or config.split_tokens
+        or config.compact_report or config.dedupe or config.near_duplicates or config.max_file_tokens
+    ):
+        warm_up(config.encoding)
+
+
+def _parse_syntax_map(options):
+    """Parse the syntax_map option into a dictionary, in place."""
+    if options.get('syntax_map'):
+        syntax_map = {}
+        for mapping in options['syntax_map'].split(','):
+            ext, syntax = mapping.split(':')
+            syntax_map['.' + ext.strip()] = syntax.strip()  # Add a dot before the extension
+        options['syntax_map'] = syntax_map  # Replace the string with the dictionary
+
+
 def get_directory_tree(path):
     """Retrieve a list of files and directories in a given path."""
     return [p.name for p in Path(path).iterdir() if p.is_file() or p.is_dir()]
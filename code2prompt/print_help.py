@@ -17,7 +17,8 @@ def print_help(_ctx):
 
     click.echo(click.style("Commands:", fg="yellow", bold=True))
     click.echo("  generate    Generate markdown from code files")
-    click.echo("  analyze     Analyze codebase structure\n")
+    click.echo("  analyze     Analyze codebase structure")
+    click.echo("  watch       Regenerate the output incrementally whenever files change\n")
 
     click.echo(click.style("Global Options:", fg="yellow", bold=True))
     click.echo("  --config PATH                 Path to configuration file")
@@ -33,26 +34,57 @@ def print_help(_ctx):
     click.echo("  --case-sensitive              Perform case-sensitive pattern matching")
     click.echo("  -s, --suppress-comments       Strip comments from the code files")
     click.echo("  -ln, --line-number            Add line numbers to source code blocks")
+    click.echo("  --compact TEXT                Comma-separated transforms compacting the code, or all")
+    click.echo("  --compact-report              Report the tokens saved by each --compact transform")
+    click.echo("  --max-file-bytes INTEGER      Read at most the head and tail of larger files")
+    click.echo("  --max-file-tokens INTEGER     Cut the middle of files with more tokens")
+    click.echo("  --elide-tail FLOAT            Share of a file cap kept from the end of the file")
+    click.echo("  --dedupe                      Emit files with identical contents once")
+    click.echo("  --near-duplicates FLOAT       Also remove files at least this similar (0-1)")
     click.echo("  --no-codeblock                Disable wrapping code inside markdown code blocks")
     click.echo("  -t, --template PATH           Path to a Jinja2 template file for custom prompt generation")
     click.echo("  --tokens                      Display the token count of the generated prompt")
     click.echo("  --encoding [cl100k_base|p50k_base|p50k_edit|r50k_base]")
     click.echo("                                Specify the tokenizer encoding to use")
+    click.echo("  --tokenizer-dir DIRECTORY     Directory of pre-seeded tokenizer BPE files")
     click.echo("  --create-templates            Create a templates directory with example templates")
     click.echo("  --log-level [DEBUG|INFO|WARNING|ERROR|CRITICAL]")
     click.echo("                                Set the logging level")
     click.echo("  --price                       Display the estimated price of tokens")
+    click.echo("  --estimate                    Estimate tokens and price from a sample of the files")
     click.echo("  --provider TEXT               Specify the provider for price calculation")
     click.echo("  --model TEXT                  Specify the model for price calculation")
-    click.echo("  --output-tokens INTEGER       Specify the number of output tokens for price calculation\n")
+    click.echo("  --output-tokens INTEGER       Specify the number of output tokens for price calculation")
+    click.echo("  --discovery [walk|git]        Walk the directory tree or list the files tracked by git")
+    click.echo("  --discovery-workers INTEGER   Number of threads scanning directories concurrently")
+    click.echo("  --max-tokens INTEGER          Token budget; files that do not fit are dropped by priority")
+    click.echo("  --priority TEXT               Comma-separated pattern:weight priority rules")
+    click.echo("  --recency-half-life FLOAT     Days after which the priority of an unmodified file halves")
+    click.echo("  --size-penalty FLOAT          Exponent of the size penalty on the priority")
+    click.echo("  --packer [greedy|knapsack]    How files are selected within the token budget")
+    click.echo("  --workers INTEGER             Number of files processed concurrently")
+    click.echo("  --executor [thread|process]   Process files on threads or on processes")
+    click.echo("  --split-tokens INTEGER        Split the output into parts of at most this many tokens")
+    click.echo("  --stream                      Write the output file by file with bounded memory")
+    click.echo("  --cache / --no-cache          Cache processed file contents between runs")
+    click.echo("  --cache-dir DIRECTORY         Directory of the file cache")
+    click.echo("  --cache-size INTEGER          Size cap of the file cache in megabytes\n")
 
     click.echo(click.style("Analyze Command Options:", fg="yellow", bold=True))
     click.echo("  -p, --path PATH               Path(s) to analyze")
-    click.echo("  --format [flat|tree]          Format of the analysis output\n")
+    click.echo("  --format [flat|tree]          Format of the analysis output")
+    click.echo("  --tokens                      Show the token count per extension\n")
+
+    click.echo(click.style("Watch Command Options:", fg="yellow", bold=True))
+    click.echo("  -p, --path PATH               Path(s) to watch")
+    click.echo("  -o, --output PATH             Output Markdown file, rewritten on every change")
+    click.echo("  --poll                        Poll for changes instead of using inotify")
+    click.echo("  --poll-interval FLOAT         Seconds between two scans when polling\n")
 
     click.echo(click.style("Examples:", fg="yellow", bold=True))
     click.echo("  code2prompt generate -p ./src")
     click.echo("  code2prompt analyze -p ./src --format tree")
+    click.echo("  code2prompt --suppress-comments watch -p ./src -o context.md")
     click.echo("  code2prompt generate -p ./src -o output.md --price --provider openai --model gpt-3.5-turbo\n")
 
     click.echo(click.style("Note:", fg="red", bold=True))
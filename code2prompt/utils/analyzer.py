@@ -1,13 +1,30 @@
+import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-def analyze_codebase(path: str) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_files import ordered_map
+from code2prompt.core.walk_directory import walk_directory
+from code2prompt.utils.count_tokens import BATCH_THREADS
+from code2prompt.utils.encoder_registry import get_encoder
+from code2prompt.utils.get_gitignore_patterns import get_gitignore_matcher
+
+def analyze_codebase(
+    path: str, gitignore: Optional[str] = None, entries: Optional[List[os.DirEntry]] = None
+) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
     """
     Analyze the codebase and return file extension information.
+
+    Directories ignored by the .gitignore file (and .git itself) are not walked,
+    so the analysis reflects the files that the generate command would see.
     
     Args:
         path (str): The path to the codebase directory.
+        gitignore (Optional[str]): Path to a .gitignore file to use instead of the default.
+        entries (Optional[List[os.DirEntry]]): If given, the entries of the files
+            with an extension are appended to it, e.g. for count_tokens_by_extension.
     
     Returns:
         Tuple[Dict[str, int], Dict[str, List[str]]]: A tuple containing:
@@ -18,41 +35,104 @@ def analyze_codebase(path: str) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
     extension_dirs = defaultdict(set)
     
     file_count = 0
-    for file_path in Path(path).rglob('*'):
-        if file_path.is_file():
-            file_count += 1
-            ext = file_path.suffix.lower()
-            if ext:
-                extension_counts[ext] += 1
-                extension_dirs[ext].add(str(file_path.parent))
+    gitignore_matcher = get_gitignore_matcher(path, gitignore)
+    for entry in walk_directory(Path(path), gitignore_matcher):
+        file_count += 1
+        file_path = Path(entry.path)
+        ext = file_path.suffix.lower()
+        if ext:
+            extension_counts[ext] += 1
+            extension_dirs[ext].add(str(file_path.parent))
+            if entries is not None:
+                entries.append(entry)
     
     if file_count == 0:
         return {"No files found": 0}, {}
     
     return dict(extension_counts), {k: list(v) for k, v in extension_dirs.items()}
-    
 
-def format_flat_output(extension_counts: Dict[str, int]) -> str:
+
+def count_tokens_by_extension(
+    entries: Iterable[os.DirEntry],
+    encoding: str,
+    workers: int = BATCH_THREADS,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Tokenize the text files of the codebase and sum their tokens per extension.
+
+    The files are the entries collected by analyze_codebase, so the tree is not
+    walked again. They are read and tokenized on a pool of threads; at most a
+    few files per worker are in memory at any time. Binary files, files that
+    are not valid UTF-8 and files that can no longer be read count no tokens.
+
+    Args:
+        entries (Iterable[os.DirEntry]): The files, as collected by analyze_codebase.
+        encoding (str): The tokenizer encoding, e.g. cl100k_base.
+        workers (int): The number of threads reading and tokenizing files.
+
+    Returns:
+        Dict[str, Dict[str, int]]: For each extension, the tokens of its files in
+        each directory, keyed like the directories of analyze_codebase.
+
+    Raises:
+        Exception: If the encoder cannot be loaded.
+    """
+    encoder = get_encoder(encoding)
+
+    def count(entry: os.DirEntry) -> int:
+        try:
+            # The file may have been deleted since the walk, which stat reports
+            record = FileRecord.from_entry(entry)
+            if record.is_binary:
+                return 0
+            # encode_ordinary releases the GIL, so the threads tokenize in parallel
+            return len(encoder.encode_ordinary(record.text()))
+        except (OSError, UnicodeDecodeError):
+            return 0
+
+    extension_tokens = defaultdict(lambda: defaultdict(int))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        counted = ordered_map(executor, lambda e: (Path(e.path), count(e)), entries, window=2 * max(1, workers))
+        for file_path, tokens in counted:
+            extension_tokens[file_path.suffix.lower()][str(file_path.parent)] += tokens
+    return {ext: dict(dirs) for ext, dirs in extension_tokens.items()}
+
+
+
+def format_flat_output(
+    extension_counts: Dict[str, int],
+    extension_tokens: Optional[Dict[str, Dict[str, int]]] = None,
+) -> str:
     """
     Format the analysis results in a flat structure.
     
     Args:
         extension_counts (Dict[str, int]): A dictionary of file extensions and their counts.
+        extension_tokens (Optional[Dict[str, Dict[str, int]]]): The tokens of each
+            extension per directory, from count_tokens_by_extension, if counted.
     
     Returns:
         str: Formatted output string.
     """
     output = []
     for ext, count in sorted(extension_counts.items()):
-        output.append(f"{ext}: {count} file{'s' if count > 1 else ''}")
+        line = f"{ext}: {count} file{'s' if count > 1 else ''}"
+        if extension_tokens is not None:
+            line += f", {sum(extension_tokens.get(ext, {}).values()):,} tokens"
+        output.append(line)
     return "\n".join(output)
 
-def format_tree_output(extension_dirs: Dict[str, List[str]]) -> str:
+def format_tree_output(
+    extension_dirs: Dict[str, List[str]],
+    extension_tokens: Optional[Dict[str, Dict[str, int]]] = None,
+) -> str:
     """
     Format the analysis results in a tree-like structure.
     
     Args:
         extension_dirs (Dict[str, List[str]]): A dictionary of file extensions and their directories.
+        extension_tokens (Optional[Dict[str, Dict[str, int]]]): The tokens of each
+            extension per directory, from count_tokens_by_extension, if counted.
     
     Returns:
         str: Formatted output string.
@@ -73,7 +153,10 @@ def format_tree_output(extension_dirs: Dict[str, List[str]]) -> str:
             current = tree
             for part in Path(dir_path).parts:
                 current = current.setdefault(part, {})
-            current[ext] = {}
+            if extension_tokens is not None:
+                current[f"{ext} ({extension_tokens.get(ext, {}).get(dir_path, 0):,} tokens)"] = {}
+            else:
+                current[ext] = {}
 
     return "\n".join(format_tree(tree))
 
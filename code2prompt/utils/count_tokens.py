@@ -1,5 +1,12 @@
+from typing import List
+
 import click
-import tiktoken
+
+from code2prompt.utils.encoder_registry import get_encoder
+
+# Threads used by tiktoken to encode a batch of texts; the encoder releases the
+# GIL, so they run in parallel.
+BATCH_THREADS = 8
 
 
 def count_tokens(text: str, encoding: str) -> int:
@@ -14,8 +21,33 @@ def count_tokens(text: str, encoding: str) -> int:
         int: The number of tokens in the text.
     """
     try:
-        encoder = tiktoken.get_encoding(encoding)
+        encoder = get_encoder(encoding)
         return len(encoder.encode(text))
     except Exception as e:
         click.echo(f"Error counting tokens: {str(e)}", err=True)
-        return 0
\ No newline at end of file
+        return 0
+
+
+def count_tokens_batch(texts: List[str], encoding: str, num_threads: int = BATCH_THREADS) -> List[int]:
+    """
+    Count the number of tokens in each of the given texts, encoding them in parallel.
+
+    Special tokens are counted as ordinary text.
+
+    Args:
+        texts (List[str]): The texts to tokenize and count.
+        encoding (str): The encoding to use for tokenization.
+        num_threads (int): The number of threads encoding the texts.
+
+    Returns:
+        List[int]: The number of tokens in each text, in the order of texts.
+    """
+    if not texts:
+        return []
+    try:
+        encoder = get_encoder(encoding)
+        batch = encoder.encode_ordinary_batch(texts, num_threads=num_threads)
+        return [len(tokens) for tokens in batch]
+    except Exception as e:
+        click.echo(f"Error counting tokens: {str(e)}", err=True)
+        return [0] * len(texts)
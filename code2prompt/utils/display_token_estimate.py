@@ -0,0 +1,52 @@
+from rich.console import Console
+from rich.table import Table
+from rich.panel import Panel
+from rich.text import Text
+
+from code2prompt.core.token_estimator import TokenEstimate
+
+
+def display_token_estimate(estimate: TokenEstimate):
+    """
+    Displays the estimated token count of the output, with a breakdown by language.
+
+    Args:
+        estimate (TokenEstimate): The estimate from a sample of the files.
+
+    Returns:
+        None
+    """
+    console = Console(stderr=True)
+
+    table = Table(show_header=True, header_style="bold magenta", expand=True)
+    table.add_column("Language", style="cyan", no_wrap=True)
+    table.add_column("Files\nSampled | All", justify="right", style="green")
+    table.add_column("Size", justify="right", style="yellow")
+    table.add_column("Bytes\nper Token", justify="right", style="yellow")
+    table.add_column("Tokens", justify="right", style="blue")
+
+    for language in sorted(estimate.languages, key=lambda language: -language.tokens):
+        bytes_per_token = language.bytes_per_token
+        table.add_row(
+            language.language or "(none)",
+            f"{language.sampled:,} | {language.files:,}",
+            f"{language.size:,}",
+            f"{bytes_per_token:.2f}" if bytes_per_token is not None else "-",
+            f"~{round(language.tokens):,}",
+        )
+
+    title = Text("Estimated Token Count", style="bold white on blue")
+    subtitle = Text(
+        f"{estimate.sampled:,} of {estimate.files:,} files sampled", style="italic"
+    )
+
+    panel = Panel(
+        table, title=title, subtitle=subtitle, expand=False, border_style="blue"
+    )
+
+    console.print("\n")
+    console.print(panel)
+    console.print(
+        f"\n🔢 Estimated tokens: {estimate.tokens:,} "
+        f"({estimate.confidence:.0%} interval: {estimate.low:,} - {estimate.high:,})\n"
+    )
@@ -0,0 +1,146 @@
+"""
+This module contains the registry of the tiktoken encoders.
+
+Each encoding is loaded once per process and shared by all threads; a failure
+to load it is remembered too, so it is not retried on every count. Loading an
+encoding needs its BPE file, which tiktoken downloads on first use. For hosts
+without network access, set_bpe_dir points to a directory of pre-seeded BPE
+files, named as published (e.g. cl100k_base.tiktoken). The directory may also
+be a tiktoken cache directory, as filled by an earlier run with network access.
+tiktoken checks the hash of the files in both cases.
+
+Loading an encoder takes a few hundred milliseconds, so warm_up starts it on a
+background thread, e.g. while the files are being discovered.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import tiktoken
+
+BPE_BASE_URL = "https://openaipublic.blob.core.windows.net/encodings/"
+
+# The BPE file of each encoding, as published under BPE_BASE_URL.
+BPE_FILES = {
+    "cl100k_base": "cl100k_base.tiktoken",
+    "p50k_base": "p50k_base.tiktoken",
+    "p50k_edit": "p50k_base.tiktoken",
+    "r50k_base": "r50k_base.tiktoken",
+}
+
+_lock = threading.Lock()
+_encoders: Dict[str, "Future[tiktoken.Encoding]"] = {}
+_bpe_dir: Optional[Path] = None
+
+# TIKTOKEN_CACHE_DIR is process-wide, so encoders from a BPE directory are
+# loaded one at a time.
+_environment_lock = threading.Lock()
+
+
+def set_bpe_dir(directory: Optional[Union[str, Path]]) -> None:
+    """
+    Set the directory of pre-seeded BPE files used to load the encoders.
+
+    Encoders already loaded are kept.
+
+    Args:
+        directory (Optional[Union[str, Path]]): The directory, or None to let
+            tiktoken download the BPE files.
+    """
+    global _bpe_dir
+    with _lock:
+        _bpe_dir = Path(directory) if directory is not None else None
+
+
+def get_encoder(encoding: str) -> tiktoken.Encoding:
+    """
+    Return the encoder of an encoding, loading it on first use.
+
+    If the encoder is being loaded by warm_up, this waits for it.
+
+    Args:
+        encoding (str): The name of the encoding, e.g. cl100k_base.
+
+    Returns:
+        tiktoken.Encoding: The encoder.
+
+    Raises:
+        Exception: Whatever error loading the encoder raised, e.g. when the BPE
+            file can neither be found nor downloaded.
+    """
+    return _load(encoding, background=False).result()
+
+
+def warm_up(encoding: str) -> None:
+    """
+    Start loading the encoder of an encoding on a background thread.
+
+    Errors are not raised here but by the next get_encoder.
+
+    Args:
+        encoding (str): The name of the encoding.
+    """
+    _load(encoding, background=True)
+
+
+def _load(encoding: str, background: bool) -> "Future[tiktoken.Encoding]":
+    with _lock:
+        future = _encoders.get(encoding)
+        if future is not None:
+            return future
+        future = _encoders[encoding] = Future()
+        bpe_dir = _bpe_dir
+
+    def run() -> None:
+        try:
+            future.set_result(_create_encoder(encoding, bpe_dir))
+        except BaseException as e:
+            future.set_exception(e)
+
+    if background:
+        threading.Thread(target=run, name=f"code2prompt-load-{encoding}", daemon=True).start()
+    else:
+        run()
+    return future
+
+
+def _create_encoder(encoding: str, bpe_dir: Optional[Path]) -> tiktoken.Encoding:
+    if bpe_dir is None:
+        return tiktoken.get_encoding(encoding)
+
+    file_name = BPE_FILES.get(encoding)
+    if file_name is not None and (bpe_dir / file_name).is_file():
+        # tiktoken looks its files up in its cache by the hash of their URL, so
+        # the pre-seeded file is exposed under that name in a private cache
+        with tempfile.TemporaryDirectory(prefix="code2prompt-bpe-") as cache_dir:
+            key = hashlib.sha1((BPE_BASE_URL + file_name).encode()).hexdigest()
+            try:
+                os.symlink((bpe_dir / file_name).resolve(), os.path.join(cache_dir, key))
+            except OSError:
+                shutil.copyfile(bpe_dir / file_name, os.path.join(cache_dir, key))
+            with _tiktoken_cache_dir(cache_dir):
+                return tiktoken.get_encoding(encoding)
+
+    with _tiktoken_cache_dir(str(bpe_dir)):
+        return tiktoken.get_encoding(encoding)
+
+
+@contextmanager
+def _tiktoken_cache_dir(directory: str) -> Iterator[None]:
+    with _environment_lock:
+        previous = os.environ.get("TIKTOKEN_CACHE_DIR")
+        os.environ["TIKTOKEN_CACHE_DIR"] = directory
+        try:
+            yield
+        finally:
+            if previous is None:
+                del os.environ["TIKTOKEN_CACHE_DIR"]
+            else:
+                os.environ["TIKTOKEN_CACHE_DIR"] = previous
@@ -5,6 +5,9 @@ from typing import List, Dict, Any
 import logging
 
 from code2prompt.config import Configuration
+from code2prompt.core.walk_directory import walk_directory
+from code2prompt.utils.filter_spec import FilterSpec
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher
 from code2prompt.utils.is_binary import is_binary
 from code2prompt.utils.is_filtered import is_filtered
 from code2prompt.utils.is_ignored import is_ignored
@@ -82,11 +85,12 @@ def process_directory(
         List[Dict[str, Any]]: List of processed file data for files that meet the criteria.
     """
     files_data = []
-    for file_path in directory_path.rglob("*"):
-        if file_path.is_file():
-            file_data = process_single_file(file_path, gitignore_patterns, config)
-            if file_data:
-                files_data.append(file_data)
+    gitignore_matcher = GitignoreMatcher.from_patterns(gitignore_patterns)
+    filter_spec = FilterSpec.compile(config.filter, config.exclude, config.case_sensitive)
+    for entry in walk_directory(directory_path, gitignore_matcher, filter_spec):
+        file_data = process_single_file(Path(entry.path), gitignore_matcher, config)
+        if file_data:
+            files_data.append(file_data)
     return files_data
 
 def should_process_file(
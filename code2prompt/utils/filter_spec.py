@@ -0,0 +1,240 @@
+"""
+This module contains FilterSpec, the compiled form of the include and exclude patterns.
+
+The comma-separated patterns of --filter and --exclude are parsed once. Pure
+extension patterns such as "*.py" become a set lookup on the path suffix; all
+other patterns are combined into a single regular expression.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Tuple, Union
+
+Patterns = Union[str, Iterable[str], None]
+
+# "*.py" or "**.py": the pattern matches exactly the paths ending with ".py".
+_EXTENSION_PATTERN = re.compile(r"\*{1,2}(\.[^*?\[\]/\\.]+)")
+
+
+def split_patterns(patterns: Patterns) -> List[str]:
+    """
+    Split comma-separated patterns into a list, dropping blanks.
+
+    Args:
+        patterns (Patterns): A comma-separated string, an iterable of patterns, or None.
+
+    Returns:
+        List[str]: The stripped, non-empty patterns.
+    """
+    if not patterns:
+        return []
+    if isinstance(patterns, str):
+        patterns = patterns.split(",")
+    return [str(p).strip() for p in patterns if str(p).strip()]
+
+
+def translate_filter_pattern(pattern: str) -> str:
+    """
+    Translate a filter pattern into a regular expression.
+
+    As with fnmatch, "*" and "?" also match "/". In addition, "**/" matches zero
+    or more leading directories and a trailing "/**" matches everything inside a
+    directory. Unless it starts with "/" or "*", a pattern may match at any
+    directory boundary, so "tests/*" matches "src/tests/a.py". Paths are matched
+    relative to the directory being processed, so the directories above it
+    never match.
+
+    Args:
+        pattern (str): The filter pattern.
+
+    Returns:
+        str: A regular expression to be used with fullmatch.
+    """
+    result: List[str] = []
+    if not pattern.startswith(("/", "*")):
+        result.append("(?:.*/)?")
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            j = i
+            while j < n and pattern[j] == "*":
+                j += 1
+            at_start = i == 0 or pattern[i - 1] == "/"
+            if j - i >= 2 and at_start and j < n and pattern[j] == "/":
+                result.append("(?:.*/)?")
+                i = j + 1
+            elif j - i >= 2 and i > 0 and pattern[i - 1] == "/" and j == n:
+                result[-1] = "(?:/.*)?"
+                i = j
+            else:
+                result.append(".*")
+                i = j
+            continue
+        if char == "?":
+            result.append(".")
+        elif char == "[":
+            j = i + 1
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                result.append("\\[")
+            else:
+                stuff = pattern[i + 1 : j].replace("\\", "\\\\").replace("[", "\\[")
+                if stuff[0] == "!":
+                    stuff = "^" + stuff[1:]
+                elif stuff[0] == "^":
+                    stuff = "\\" + stuff
+                result.append(f"[{stuff}]")
+                i = j
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return "".join(result)
+
+
+class _PatternSet:
+    """Patterns split into an extension set and one combined regular expression."""
+
+    def __init__(self, patterns: List[str]):
+        extensions = set()
+        regexes = []
+        for pattern in patterns:
+            match = _EXTENSION_PATTERN.fullmatch(pattern)
+            if match:
+                extensions.add(match.group(1))
+            else:
+                regexes.append(translate_filter_pattern(pattern))
+        self.extensions: FrozenSet[str] = frozenset(extensions)
+        self.regex = re.compile("|".join(regexes), re.DOTALL) if regexes else None
+        self.fullmatch = self.regex.fullmatch if self.regex is not None else None
+        self.directory_regex = self._compile_directory_regex(patterns)
+
+    @staticmethod
+    def _compile_directory_regex(patterns: List[str]):
+        # A pattern ending with "*" that matches "<dir>/" matches every path below
+        # it as well, because the trailing "*" absorbs the rest of the path.
+        regexes = [translate_filter_pattern(p) for p in patterns if p.endswith("*")]
+        return re.compile("|".join(regexes), re.DOTALL) if regexes else None
+
+    def __bool__(self) -> bool:
+        return bool(self.extensions) or self.regex is not None
+
+    def match(self, path: str) -> bool:
+        if self.extensions and path[path.rfind(".") :] in self.extensions:
+            return True
+        return self.fullmatch is not None and self.fullmatch(path) is not None
+
+
+class FilterSpec:
+    """
+    Compiled include and exclude patterns.
+
+    A path is kept when it matches no exclude pattern and, if include patterns are
+    given, at least one include pattern. Exclude patterns take precedence.
+
+    Attributes:
+        include_patterns (Tuple[str, ...]): The include patterns as given.
+        exclude_patterns (Tuple[str, ...]): The exclude patterns as given.
+        case_sensitive (bool): Whether matching is case-sensitive.
+    """
+
+    def __init__(
+        self,
+        include_patterns: Patterns = None,
+        exclude_patterns: Patterns = None,
+        case_sensitive: bool = False,
+    ):
+        self.include_patterns: Tuple[str, ...] = tuple(split_patterns(include_patterns))
+        self.exclude_patterns: Tuple[str, ...] = tuple(split_patterns(exclude_patterns))
+        self.case_sensitive = case_sensitive
+
+        def normalize(patterns: Tuple[str, ...]) -> List[str]:
+            return [p if case_sensitive else p.lower() for p in patterns]
+
+        self._include = _PatternSet(normalize(self.include_patterns))
+        self._exclude = _PatternSet(normalize(self.exclude_patterns))
+        self._has_include = bool(self._include)
+        self._has_exclude = bool(self._exclude)
+
+    @classmethod
+    def compile(
+        cls,
+        include_patterns: Patterns = None,
+        exclude_patterns: Patterns = None,
+        case_sensitive: bool = False,
+    ) -> "FilterSpec":
+        """
+        Compile include and exclude patterns, reusing a cached FilterSpec if possible.
+
+        Args:
+            include_patterns (Patterns): Comma-separated string or list of patterns.
+            exclude_patterns (Patterns): Comma-separated string or list of patterns.
+            case_sensitive (bool): Whether to perform case-sensitive pattern matching.
+
+        Returns:
+            FilterSpec: The compiled filter.
+        """
+        return _compile_cached(
+            tuple(split_patterns(include_patterns)),
+            tuple(split_patterns(exclude_patterns)),
+            case_sensitive,
+        )
+
+    def __bool__(self) -> bool:
+        return self._has_include or self._has_exclude
+
+    def _normalize(self, path: Union[str, "os.PathLike[str]"]) -> str:
+        path = os.fspath(path)
+        return path if self.case_sensitive else path.lower()
+
+    def matches(self, path: Union[str, "os.PathLike[str]"]) -> bool:
+        """
+        Determine if a file should be included.
+
+        Args:
+            path (Union[str, os.PathLike]): The file path.
+
+        Returns:
+            bool: True if the file should be included, False if it is filtered out.
+        """
+        if not isinstance(path, str):
+            path = os.fspath(path)
+        if not self.case_sensitive:
+            path = path.lower()
+        if self._has_exclude and self._exclude.match(path):
+            return False
+        if self._has_include:
+            return self._include.match(path)
+        return True
+
+    def excludes_directory(self, path: Union[str, "os.PathLike[str]"]) -> bool:
+        """
+        Determine if every file below a directory is excluded, so it can be pruned.
+
+        Args:
+            path (Union[str, os.PathLike]): The directory path, relative to the
+                directory being processed.
+
+        Returns:
+            bool: True if the whole subtree is excluded.
+        """
+        regex = self._exclude.directory_regex
+        if regex is None:
+            return False
+        return regex.fullmatch(self._normalize(path) + "/") is not None
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(
+    include_patterns: Tuple[str, ...],
+    exclude_patterns: Tuple[str, ...],
+    case_sensitive: bool,
+) -> FilterSpec:
+    return FilterSpec(include_patterns, exclude_patterns, case_sensitive)
+
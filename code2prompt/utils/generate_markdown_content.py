@@ -1,7 +1,92 @@
+def format_table_of_contents(files_data):
+    """
+    Generates the table of contents of the Markdown content.
+
+    Parameters:
+    - files_data (list of dict): A list of dictionaries containing file information and content.
+
+    Returns:
+    - str: The table of contents, followed by a blank line.
+    """
+    table_of_contents = [f"- {file['path']}\n" for file in files_data]
+    return "# Table of Contents\n" + "".join(table_of_contents) + "\n"
+
+
+def format_file_section(file, no_codeblock):
+    """
+    Generates the Markdown section of a single file.
+
+    Parameters:
+    - file (dict): The file information and content.
+    - no_codeblock (bool): Flag indicating whether to disable wrapping code inside markdown code blocks.
+
+    Returns:
+    - str: The Markdown section of the file.
+    """
+    file_info = (
+        f"## File: {file['path']}\n\n"
+        f"- Extension: {file['extension']}\n"
+        f"- Language: {file['language']}\n"
+        f"- Size: {file['size']} bytes\n"
+        f"- Created: {file['created']}\n"
+        f"- Modified: {file['modified']}\n"
+        + format_elided(file)
+        + format_duplicates(file)
+        + "\n"
+    )
+
+    if no_codeblock:
+        file_code = f"### Code\n\n{file['content']}\n\n"
+    else:
+        file_code = f"### Code\n\n```{file['language']}\n{file['content']}\n```\n\n"
+
+    return file_info + file_code
+
+
+def format_elided(file):
+    """
+    Generates the metadata line of the bytes and tokens cut from a file by the caps, if any were.
+
+    Parameters:
+    - file (dict): The file information, with the "elided_bytes" and "elided_tokens" of process_file.
+
+    Returns:
+    - str: The line, or an empty string.
+    """
+    if "elided_bytes" not in file:
+        return ""
+    return f"- Elided: {file['elided_bytes']} bytes, {file['elided_tokens']} tokens\n"
+
+
+def format_duplicates(file):
+    """
+    Generates the metadata lines listing the duplicates of a file, if it has any.
+
+    Parameters:
+    - file (dict): The file information, with the "duplicates" and "near_duplicates" found by dedupe_files.
+
+    Returns:
+    - str: The lines, or an empty string.
+    """
+    lines = ""
+    if file.get("duplicates"):
+        lines += f"- Duplicates (identical): {', '.join(file['duplicates'])}\n"
+    if file.get("near_duplicates"):
+        near = ", ".join(
+            f"{duplicate['path']} ({duplicate['similarity']:.0%} similar)" for duplicate in file["near_duplicates"]
+        )
+        lines += f"- Near duplicates: {near}\n"
+    return lines
+
+
 def generate_markdown_content(files_data, no_codeblock):
     """
     Generates a Markdown content string from the provided files data.
 
+    The content is the table of contents followed by one section per file, so
+    callers that keep the sections of unchanged files can splice in new ones
+    with format_table_of_contents and format_file_section.
+
     Parameters:
     - files_data (list of dict): A list of dictionaries containing file information and content.
     - no_codeblock (bool): Flag indicating whether to disable wrapping code inside markdown code blocks.
@@ -9,29 +94,6 @@ def generate_markdown_content(files_data, no_codeblock):
     Returns:
     - str: A Markdown-formatted string containing the table of contents and the file contents.
     """
-    table_of_contents = [f"- {file['path']}\n" for file in files_data]
-    
-    content = []
-    for file in files_data:
-        file_info = (
-            f"## File: {file['path']}\n\n"
-            f"- Extension: {file['extension']}\n"
-            f"- Language: {file['language']}\n"
-            f"- Size: {file['size']} bytes\n"
-            f"- Created: {file['created']}\n"
-            f"- Modified: {file['modified']}\n\n"
-        )
-        
-        if no_codeblock:
-            file_code = f"### Code\n\n{file['content']}\n\n"
-        else:
-            file_code = f"### Code\n\n```{file['language']}\n{file['content']}\n```\n\n"
-        
-        content.append(file_info + file_code)
-    
-    return (
-        "# Table of Contents\n"
-        + "".join(table_of_contents)
-        + "\n"
-        + "".join(content)
+    return format_table_of_contents(files_data) + "".join(
+        format_file_section(file, no_codeblock) for file in files_data
     )
@@ -1,4 +1,5 @@
 from code2prompt.utils.parse_gitignore import parse_gitignore
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher, read_gitignore_lines
 from pathlib import Path
 
 def get_gitignore_patterns(path, gitignore):
@@ -24,4 +25,30 @@ def get_gitignore_patterns(path, gitignore):
 
     patterns = parse_gitignore(gitignore_path)
     patterns.add(".git")
-    return patterns
\ No newline at end of file
+    return patterns
+
+def get_gitignore_matcher(path, gitignore):
+    """
+    Compile the gitignore patterns of a path into a GitignoreMatcher.
+
+    The same file is used as in get_gitignore_patterns, but its lines are kept in
+    order so that negated patterns ("!keep.log") take precedence correctly. The
+    .git directory is always ignored, and when the path is the root of a git
+    repository its .git/info/exclude patterns apply with the lowest precedence.
+
+    Args:
+    path (Path): The root path of the project where the default .gitignore file is located.
+    gitignore (Optional[str]): An optional path to a specific .gitignore file to use instead of the default.
+
+    Returns:
+    GitignoreMatcher: The compiled matcher, with paths relative to ``path``.
+    """
+    if gitignore:
+        gitignore_path = Path(gitignore)
+    else:
+        gitignore_path = Path(path) / ".gitignore"
+
+    patterns = [".git"]
+    patterns.extend(read_gitignore_lines(Path(path) / ".git" / "info" / "exclude"))
+    patterns.extend(read_gitignore_lines(gitignore_path))
+    return GitignoreMatcher.from_patterns(patterns)
@@ -0,0 +1,384 @@
+"""
+This module contains a compiled gitignore matcher.
+
+The patterns of a .gitignore file are translated once into regular expressions
+and combined into a single alternation, so checking a path costs one regex match
+instead of one fnmatch call per pattern and per parent directory.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class GitignoreRule(NamedTuple):
+    """A single compiled line of a .gitignore file."""
+
+    pattern: str
+    regex: str
+    negated: bool
+    dir_only: bool
+
+
+def _translate_class(pattern: str, i: int) -> Tuple[Optional[str], int]:
+    """
+    Translate a bracket expression starting at pattern[i] == "[".
+
+    Returns:
+        Tuple[Optional[str], int]: The regex for the class and the index after it,
+        or (None, i + 1) if the bracket is not closed and must be taken literally.
+    """
+    j = i + 1
+    if j < len(pattern) and pattern[j] in "!^":
+        j += 1
+    if j < len(pattern) and pattern[j] == "]":
+        j += 1
+    while j < len(pattern) and pattern[j] != "]":
+        j += 1
+    if j >= len(pattern):
+        return None, i + 1
+
+    stuff = pattern[i + 1 : j].replace("\\", "\\\\").replace("[", "\\[")
+    if stuff[0] in "!^":
+        # A negated class must never match the path separator.
+        stuff = "^/" + stuff[1:]
+    return f"[{stuff}]", j + 1
+
+
+def translate_pattern(pattern: str) -> str:
+    """
+    Translate the body of a gitignore pattern into a regular expression.
+
+    "*" and "?" never match "/", a leading "**/" matches in all directories,
+    a trailing "/**" matches everything inside and "/**/" matches zero or more
+    directories. Any other "**" behaves like "*".
+
+    Args:
+        pattern (str): The pattern without negation, anchoring or trailing slash.
+
+    Returns:
+        str: A regular expression (without anchors) equivalent to the pattern.
+    """
+    result: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            if (
+                pattern.startswith("**", i)
+                and (i == 0 or pattern[i - 1] == "/")
+                and (i + 2 == n or pattern[i + 2] == "/")
+            ):
+                if i + 2 == n:
+                    result.append(".*")
+                    i += 2
+                else:
+                    result.append("(?:.*/)?")
+                    i += 3
+                continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            result.append("[^/]*")
+            continue
+        if char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            char_class, i = _translate_class(pattern, i)
+            result.append(char_class if char_class is not None else re.escape(char))
+            continue
+        elif char == "\\" and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return "".join(result)
+
+
+def compile_rule(line: str, base: str = "") -> Optional[GitignoreRule]:
+    """
+    Compile one line of a .gitignore file.
+
+    Args:
+        line (str): The raw line, with or without its line terminator.
+        base (str): The directory of the .gitignore file, relative to the matcher root,
+                    using "/" as separator. Empty for the root directory.
+
+    Returns:
+        Optional[GitignoreRule]: The compiled rule, or None for blank lines and comments.
+    """
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return None
+
+    # Trailing spaces are ignored unless they are escaped with a backslash.
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    if dir_only:
+        line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A separator at the beginning or in the middle anchors the pattern to the
+    # directory of the .gitignore file; otherwise it matches at any level.
+    anchored = "/" in line
+    body = translate_pattern(line.lstrip("/"))
+    if not anchored:
+        body = "(?:.*/)?" + body
+    if base:
+        body = re.escape(base.strip("/")) + "/" + body
+
+    return GitignoreRule(pattern=line, regex=body, negated=negated, dir_only=dir_only)
+
+
+def _combine(
+    rules: Sequence[GitignoreRule],
+) -> Tuple[Optional["re.Pattern[str]"], Tuple[bool, ...]]:
+    """
+    Combine rules into one alternation where the last rule of the file comes first.
+
+    Python's alternation picks the leftmost alternative that matches, so reversing
+    the rules gives git's "last matching pattern wins" precedence. Each rule is
+    wrapped in a single capturing group; ``match.lastindex`` identifies the winner.
+    """
+    if not rules:
+        return None, ()
+    ordered = list(reversed(rules))
+    regex = re.compile("|".join(f"({rule.regex})" for rule in ordered), re.DOTALL)
+    return regex, tuple(rule.negated for rule in ordered)
+
+
+class GitignoreMatcher:
+    """
+    A set of gitignore rules compiled into two combined regular expressions.
+
+    One expression holds every rule and is used for directories; the other leaves
+    out directory-only rules ("build/") and is used for files. Paths are given
+    relative to the matcher root with "/" as separator.
+    """
+
+    def __init__(self, rules: Iterable[GitignoreRule] = ()):
+        self.rules: Tuple[GitignoreRule, ...] = tuple(rules)
+        self._dir_regex, self._dir_negated = _combine(self.rules)
+        self._file_regex, self._file_negated = _combine(
+            [rule for rule in self.rules if not rule.dir_only]
+        )
+        self._dir_cache: Dict[str, bool] = {}
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str], base: str = "") -> "GitignoreMatcher":
+        """
+        Compile a sequence of gitignore lines, in file order.
+
+        Args:
+            patterns (Iterable[str]): The gitignore lines.
+            base (str): Directory of the patterns relative to the matcher root.
+
+        Returns:
+            GitignoreMatcher: The compiled matcher.
+        """
+        rules = (compile_rule(pattern, base) for pattern in patterns)
+        return cls(rule for rule in rules if rule is not None)
+
+    @classmethod
+    def from_file(cls, gitignore_path: Path, base: str = "") -> "GitignoreMatcher":
+        """
+        Compile a .gitignore file. A missing file yields an empty matcher.
+
+        Args:
+            gitignore_path (Path): Path to the .gitignore file.
+            base (str): Directory of the file relative to the matcher root.
+
+        Returns:
+            GitignoreMatcher: The compiled matcher.
+        """
+        return cls.from_patterns(read_gitignore_lines(gitignore_path), base)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def extend(self, rules: Iterable[GitignoreRule]) -> "GitignoreMatcher":
+        """
+        Return a new matcher where the given rules take precedence over these ones.
+
+        This is how a nested .gitignore is combined with the rules of its parents.
+
+        Args:
+            rules (Iterable[GitignoreRule]): The rules to append.
+
+        Returns:
+            GitignoreMatcher: The combined matcher, or self if there are no new rules.
+        """
+        rules = tuple(rules)
+        if not rules:
+            return self
+        return GitignoreMatcher(self.rules + rules)
+
+    def match(self, relative_path: str, is_dir: bool = False) -> Optional[bool]:
+        """
+        Match a path against the rules, ignoring its parent directories.
+
+        Args:
+            relative_path (str): Path relative to the matcher root, "/"-separated.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            Optional[bool]: True if the last matching rule ignores the path, False if
+            it is a negation, None if no rule matches.
+        """
+        regex, negated = (
+            (self._dir_regex, self._dir_negated)
+            if is_dir
+            else (self._file_regex, self._file_negated)
+        )
+        if regex is None:
+            return None
+        match = regex.fullmatch(relative_path)
+        if match is None:
+            return None
+        return not negated[match.lastindex - 1]
+
+    def is_ignored(self, relative_path: str, is_dir: bool = False) -> bool:
+        """
+        Check whether a path is ignored, taking its parent directories into account.
+
+        As in git, a file cannot be re-included when one of its parent directories
+        is excluded. Results for parent directories are cached.
+
+        Args:
+            relative_path (str): Path relative to the matcher root, "/"-separated.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the path is ignored.
+        """
+        parent, _, _ = relative_path.rpartition("/")
+        if parent and self._is_dir_ignored(parent):
+            return True
+        return bool(self.match(relative_path, is_dir))
+
+    def _is_dir_ignored(self, relative_dir: str) -> bool:
+        cached = self._dir_cache.get(relative_dir)
+        if cached is None:
+            cached = self.is_ignored(relative_dir, is_dir=True)
+            self._dir_cache[relative_dir] = cached
+        return cached
+
+
+class GitignoreTree:
+    """
+    Gitignore rules for a directory tree, honouring nested .gitignore files.
+
+    The walker asks for the matcher of each directory it enters. A directory with
+    its own .gitignore gets its parent's matcher extended with that file's rules;
+    any other directory shares its parent's matcher object, so nothing is parsed or
+    compiled twice. Matchers are cached per directory and reused across walks for
+    as long as the parent matcher and the .gitignore modification time are unchanged.
+
+    Attributes:
+        root (Path): The root directory of the tree.
+        root_matcher (GitignoreMatcher): Rules for the root directory itself.
+    """
+
+    def __init__(self, root: Path, root_matcher: GitignoreMatcher):
+        self.root = Path(root)
+        self.root_matcher = root_matcher
+        self._cache: Dict[str, Tuple[GitignoreMatcher, int, GitignoreMatcher]] = {}
+
+    def matcher_for(
+        self,
+        relative_dir: str,
+        parent: GitignoreMatcher,
+        gitignore_entry: Optional[os.DirEntry] = None,
+    ) -> GitignoreMatcher:
+        """
+        Return the matcher that applies to the entries of a directory.
+
+        Args:
+            relative_dir (str): The directory relative to the root, "/"-separated.
+            parent (GitignoreMatcher): The matcher of the parent directory.
+            gitignore_entry (Optional[os.DirEntry]): The directory's .gitignore entry,
+                if it has one.
+
+        Returns:
+            GitignoreMatcher: The matcher for the directory.
+        """
+        if not relative_dir or gitignore_entry is None:
+            return parent
+
+        try:
+            mtime_ns = gitignore_entry.stat().st_mtime_ns
+        except OSError:
+            return parent
+        return self._extend(relative_dir, parent, Path(gitignore_entry.path), mtime_ns)
+
+    def is_ignored(self, relative: str, is_dir: bool = False) -> bool:
+        """
+        Check whether a path is ignored, or lies in an ignored directory, as the
+        walker would find it.
+
+        The .gitignore files of the directories above the path are stat'ed, but
+        no directory is listed, so this is cheap for a single path.
+
+        Args:
+            relative (str): The path relative to the root, "/"-separated.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the walker would skip the path.
+        """
+        parts = relative.split("/")
+        matcher = self.root_matcher
+        for i in range(1, len(parts) + 1):
+            current = "/".join(parts[:i])
+            last = i == len(parts)
+            if matcher.match(current, is_dir=is_dir or not last):
+                return True
+            if not last:
+                gitignore_path = self.root / current / ".gitignore"
+                try:
+                    mtime_ns = gitignore_path.stat().st_mtime_ns
+                except OSError:
+                    continue
+                matcher = self._extend(current, matcher, gitignore_path, mtime_ns)
+        return False
+
+    def _extend(
+        self, relative_dir: str, parent: GitignoreMatcher, gitignore_path: Path, mtime_ns: int
+    ) -> GitignoreMatcher:
+        """Extend the parent matcher with the rules of a directory's .gitignore, cached."""
+        cached = self._cache.get(relative_dir)
+        if cached is not None and cached[0] is parent and cached[1] == mtime_ns:
+            return cached[2]
+
+        rules = (
+            compile_rule(line, relative_dir)
+            for line in read_gitignore_lines(gitignore_path)
+        )
+        matcher = parent.extend(rule for rule in rules if rule is not None)
+        self._cache[relative_dir] = (parent, mtime_ns, matcher)
+        return matcher
+
+
+def read_gitignore_lines(gitignore_path: Path) -> List[str]:
+    """
+    Read the lines of a .gitignore file in order.
+
+    Args:
+        gitignore_path (Path): Path to the .gitignore file.
+
+    Returns:
+        List[str]: The raw lines, or an empty list if the file does not exist.
+    """
+    try:
+        with Path(gitignore_path).open("r", encoding="utf-8") as file:
+            return file.read().splitlines()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return []
@@ -52,12 +52,28 @@ class IncludeLoader(BaseLoader):
     def get_source(
         self, environment: "jinja2.Environment", template: str
     ) -> Tuple[str, str, Callable[[], bool]]:
+        """
+        Read the source of a template.
+
+        Args:
+            environment (jinja2.Environment): The environment loading the template.
+            template (str): The template name, relative to the base path.
+
+        Returns:
+            Tuple[str, str, Callable[[], bool]]: The source, the path of the file,
+            and a function telling whether the file is unchanged since it was read,
+            from its modification time.
+
+        Raises:
+            TemplateNotFound: If the file does not exist or cannot be read.
+        """
         path: str = os.path.join(self.path, template)
         if not os.path.exists(path):
             raise TemplateNotFound(f"{template} (searched in {self.path})")
 
         with self._include_stack_context(path):
             try:
+                mtime = os.stat(path).st_mtime_ns
                 with open(path, "r", encoding=self.encoding) as f:
                     source: str = f.read()
             except IOError as e:
@@ -65,7 +81,13 @@ class IncludeLoader(BaseLoader):
                     template, message=f"Error reading template file: {e}"
                 ) from e
 
-        return source, path, lambda: True
+        def uptodate() -> bool:
+            try:
+                return os.stat(path).st_mtime_ns == mtime
+            except OSError:
+                return False
+
+        return source, path, uptodate
 
     def list_templates(self) -> List[str]:
         """
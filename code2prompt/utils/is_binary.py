@@ -1,8 +1,45 @@
+"""
+This module contains the functions to detect binary files.
+"""
+
+# Number of leading bytes inspected by the binary sniff.
+SNIFF_SIZE = 1024
+
+# Extensions of files that are always text; the binary sniff is skipped for them.
+# Extensions also used by binary formats, such as .ts for MPEG transport streams
+# or .m for MATLAB files, are left out so that those files are sniffed.
+TEXT_EXTENSIONS = frozenset(
+    {
+        ".bash", ".bat", ".c", ".cc", ".cfg", ".clj", ".cmake", ".conf", ".cpp",
+        ".cs", ".css", ".csv", ".cxx", ".dart", ".el", ".erl", ".ex", ".exs",
+        ".go", ".gradle", ".h", ".hpp", ".hs", ".html", ".ini", ".j2", ".java",
+        ".jinja", ".js", ".json", ".jsx", ".kt", ".kts", ".less", ".lua",
+        ".md", ".mjs", ".php", ".pl", ".pm", ".properties", ".proto", ".ps1",
+        ".py", ".pyi", ".r", ".rb", ".rs", ".rst", ".sass", ".scala", ".scss",
+        ".sh", ".sql", ".svelte", ".swift", ".tex", ".toml", ".tsx",
+        ".txt", ".vue", ".xml", ".yaml", ".yml", ".zsh",
+    }
+)
+
+
+def is_binary_content(chunk: bytes) -> bool:
+    """
+    Determine if data read from the start of a file looks binary.
+
+    Args:
+        chunk (bytes): The leading bytes of the file; only the first SNIFF_SIZE
+            bytes are inspected.
+
+    Returns:
+        bool: True if the data contains a NUL byte.
+    """
+    return b"\x00" in chunk[:SNIFF_SIZE]
+
+
 def is_binary(file_path):
     try:
         with open(file_path, "rb") as file:
-            chunk = file.read(1024)
-            return b"\x00" in chunk
+            return is_binary_content(file.read(SNIFF_SIZE))
     except IOError:
         print(f"Error: The file at {file_path} could not be opened.")
-        return False
\ No newline at end of file
+        return False
@@ -1,34 +1,37 @@
-from fnmatch import fnmatch
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Tuple, Union
 
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher
 
 
-def is_ignored(file_path: Path, gitignore_patterns: list, base_path: Path) -> bool:
+@lru_cache(maxsize=32)
+def _compile_patterns(patterns: Tuple[str, ...]) -> GitignoreMatcher:
+    return GitignoreMatcher.from_patterns(patterns)
+
+
+def is_ignored(
+    file_path: Path,
+    gitignore_patterns: Union[GitignoreMatcher, Iterable[str]],
+    base_path: Path,
+    is_dir: bool = False,
+) -> bool:
     """
     Check if a file is ignored based on gitignore patterns.
 
     Args:
         file_path (Path): The path of the file to check.
-        gitignore_patterns (list): List of gitignore patterns.
+        gitignore_patterns (Union[GitignoreMatcher, Iterable[str]]): A compiled matcher,
+            or a list of gitignore patterns which is compiled once and cached.
         base_path (Path): The base path to resolve relative paths.
+        is_dir (bool): Whether file_path is a directory, for directory-only patterns.
 
     Returns:
         bool: True if the file is ignored, False otherwise.
     """
+    if isinstance(gitignore_patterns, GitignoreMatcher):
+        matcher = gitignore_patterns
+    else:
+        matcher = _compile_patterns(tuple(gitignore_patterns))
     relative_path = file_path.relative_to(base_path)
-    for pattern in gitignore_patterns:
-        pattern = pattern.rstrip("/")
-        if pattern.startswith("/"):
-            if fnmatch(str(relative_path), pattern[1:]):
-                return True
-            if fnmatch(str(relative_path.parent), pattern[1:]):
-                return True
-        else:
-            for path in relative_path.parents:
-                if fnmatch(str(path / relative_path.name), pattern):
-                    return True
-                if fnmatch(str(path), pattern):
-                    return True
-            if fnmatch(str(relative_path), pattern):
-                return True
-    return False
\ No newline at end of file
+    return matcher.is_ignored(relative_path.as_posix(), is_dir)
@@ -1,129 +1,346 @@
+"""
+This module contains the detection of the language of a file.
+
+The language is found from the file name first: the extension, through
+--syntax-map and LANGUAGE_MAP, or the exact name of well-known files such as
+Dockerfile or Makefile. Files the name says nothing about, such as extensionless
+scripts, are recognised from their first bytes: a shebang line, or a Vim or
+Emacs modeline. The tables are built once at import, and the lookup table of
+each syntax map is built once and reused.
+"""
+
 import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Union
+
+# The language of each file extension, as named in Markdown code blocks.
+LANGUAGE_MAP = {
+    ".c": "c",
+    ".h": "c",
+    ".cpp": "cpp",
+    ".hpp": "cpp",
+    ".cc": "cpp",
+    ".cxx": "cpp",
+    ".java": "java",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".cs": "csharp",
+    ".php": "php",
+    ".go": "go",
+    ".rs": "rust",
+    ".kt": "kotlin",
+    ".swift": "swift",
+    ".scala": "scala",
+    ".dart": "dart",
+    ".py": "python",
+    ".rb": "ruby",
+    ".pl": "perl",
+    ".pm": "perl",
+    ".sh": "bash",
+    ".bash": "bash",
+    ".zsh": "zsh",
+    ".ps1": "powershell",
+    ".html": "html",
+    ".htm": "html",
+    ".xml": "xml",
+    ".sql": "sql",
+    ".m": "matlab",
+    ".r": "r",
+    ".lua": "lua",
+    ".jl": "julia",
+    ".f": "fortran",
+    ".f90": "fortran",
+    ".hs": "haskell",
+    ".lhs": "haskell",
+    ".ml": "ocaml",
+    ".erl": "erlang",
+    ".ex": "elixir",
+    ".exs": "elixir",
+    ".clj": "clojure",
+    ".coffee": "coffeescript",
+    ".groovy": "groovy",
+    ".pas": "pascal",
+    ".vb": "visualbasic",
+    ".asm": "assembly",
+    ".s": "assembly",
+    ".lisp": "lisp",
+    ".cl": "lisp",
+    ".scm": "scheme",
+    ".rkt": "racket",
+    ".fs": "fsharp",
+    ".d": "d",
+    ".ada": "ada",
+    ".nim": "nim",
+    ".cr": "crystal",
+    ".v": "verilog",
+    ".vhd": "vhdl",
+    ".tcl": "tcl",
+    ".elm": "elm",
+    ".zig": "zig",
+    ".raku": "raku",
+    ".perl6": "raku",
+    ".p6": "raku",
+    ".vim": "vimscript",
+    ".ps": "postscript",
+    ".prolog": "prolog",
+    ".cobol": "cobol",
+    ".cob": "cobol",
+    ".cbl": "cobol",
+    ".forth": "forth",
+    ".fth": "forth",
+    ".abap": "abap",
+    ".apex": "apex",
+    ".sol": "solidity",
+    ".hack": "hack",
+    ".sml": "standardml",
+    ".purs": "purescript",
+    ".idr": "idris",
+    ".agda": "agda",
+    ".lean": "lean",
+    ".wasm": "webassembly",
+    ".wat": "webassembly",
+    ".j2": "jinja2",
+    ".md": "markdown",
+    ".tex": "latex",
+    ".bib": "bibtex",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".json": "json",
+    ".toml": "toml",
+    ".ini": "ini",
+    ".cfg": "ini",
+    ".conf": "ini",
+    ".mk": "makefile",
+    ".mak": "makefile",
+    ".cmake": "cmake",
+    ".dockerfile": "dockerfile",
+    ".docker": "dockerfile",
+    '.txt': 'plaintext',
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.log': 'log'
+}
+
+# The language of files known by their name, in lowercase.
+FILENAME_MAP = {
+    "dockerfile": "dockerfile",
+    "containerfile": "dockerfile",
+    "makefile": "makefile",
+    "gnumakefile": "makefile",
+    "cmakelists.txt": "cmake",
+    "rakefile": "ruby",
+    "gemfile": "ruby",
+    "podfile": "ruby",
+    "vagrantfile": "ruby",
+    "brewfile": "ruby",
+    "guardfile": "ruby",
+    "jenkinsfile": "groovy",
+    "sconstruct": "python",
+    "sconscript": "python",
+    "build.bazel": "python",
+    "workspace.bazel": "python",
+    "pipfile": "toml",
+    "cargo.lock": "toml",
+    "poetry.lock": "toml",
+    ".bashrc": "bash",
+    ".bash_profile": "bash",
+    ".bash_logout": "bash",
+    ".profile": "bash",
+    ".zshrc": "zsh",
+    ".zshenv": "zsh",
+    ".zprofile": "zsh",
+    ".vimrc": "vimscript",
+    ".editorconfig": "ini",
+    ".gitconfig": "ini",
+    ".npmrc": "ini",
+}
+
+# Prefixes of file names whose suffix is a variant, e.g. Dockerfile.dev.
+FILENAME_PREFIXES = (
+    ("dockerfile.", "dockerfile"),
+    ("containerfile.", "dockerfile"),
+    ("makefile.", "makefile"),
+)
+
+# The language of the interpreters named in a shebang, without version suffix.
+INTERPRETER_MAP = {
+    "python": "python",
+    "pypy": "python",
+    "sh": "bash",
+    "bash": "bash",
+    "dash": "bash",
+    "ash": "bash",
+    "ksh": "bash",
+    "zsh": "zsh",
+    "node": "javascript",
+    "nodejs": "javascript",
+    "bun": "javascript",
+    "deno": "typescript",
+    "ts-node": "typescript",
+    "ruby": "ruby",
+    "perl": "perl",
+    "raku": "raku",
+    "php": "php",
+    "rscript": "r",
+    "lua": "lua",
+    "luajit": "lua",
+    "tclsh": "tcl",
+    "wish": "tcl",
+    "pwsh": "powershell",
+    "julia": "julia",
+    "elixir": "elixir",
+    "escript": "erlang",
+    "groovy": "groovy",
+    "swift": "swift",
+    "scala": "scala",
+    "crystal": "crystal",
+    "runghc": "haskell",
+    "runhaskell": "haskell",
+    "sbcl": "lisp",
+    "guile": "scheme",
+    "racket": "racket",
+    "octave": "octave",
+    "make": "makefile",
+}
+
+# Vim file types and Emacs modes that are not named after the language.
+MODELINE_ALIASES = {
+    "sh": "bash",
+    "shell-script": "bash",
+    "c++": "cpp",
+    "js": "javascript",
+    "js2": "javascript",
+    "make": "makefile",
+    "cperl": "perl",
+    "ps1": "powershell",
+    "tex": "latex",
+    "text": "plaintext",
+    "conf": "ini",
+    "dosini": "ini",
+    "vim": "vimscript",
+    "cs": "csharp",
+}
+
+KNOWN_LANGUAGES = frozenset(
+    [*LANGUAGE_MAP.values(), *FILENAME_MAP.values(), *INTERPRETER_MAP.values(), *MODELINE_ALIASES.values()]
+)
 
+# Number of leading lines searched for a modeline.
+MODELINE_LINES = 5
 
-def infer_language(filename: str, syntax_map: dict) -> str:
+_VERSION_SUFFIX = re.compile(r"[\d.]+$")
+_VIM_MODELINE = re.compile(r"(?:^|\s)(?:vi|vim|ex)(?:[<=>]?\d+)?:.*?\b(?:ft|filetype|syntax)=([\w+-]+)")
+_EMACS_MODELINE = re.compile(r"-\*-(.*?)-\*-")
+_EMACS_MODE = re.compile(r"(?:^|;)\s*mode:\s*([\w+-]+)", re.IGNORECASE)
+
+
+def infer_language(
+    filename: str,
+    syntax_map: dict,
+    head: Union[bytes, Callable[[], bytes], None] = None,
+) -> str:
     """
-    Infers the programming language of a given file based on its extension.
+    Infers the programming language of a given file based on its name, and on its first bytes if need be.
 
     Parameters:
     - filename (str): The name of the file including its extension.
     - syntax_map (dict): Custom syntax mappings for language inference.
+    - head (Union[bytes, Callable[[], bytes], None]): The first bytes of the file,
+      or a function reading them. They are only looked at when the name gives
+      no language, for a shebang or a modeline.
 
     Returns:
     - str: The inferred programming language as a lowercase string, e.g., "python".
            Returns "unknown" if the language cannot be determined.
     """
-    _, extension = os.path.splitext(filename)
-    extension = extension.lower()
-
-    # Check user-defined syntax map first
-    if extension in syntax_map:
-        return syntax_map[extension]
-
-    language_map = {
-        ".c": "c",
-        ".h": "c",
-        ".cpp": "cpp",
-        ".hpp": "cpp",
-        ".cc": "cpp",
-        ".cxx": "cpp",
-        ".java": "java",
-        ".js": "javascript",
-        ".jsx": "javascript",
-        ".ts": "typescript",
-        ".tsx": "typescript",
-        ".cs": "csharp",
-        ".php": "php",
-        ".go": "go",
-        ".rs": "rust",
-        ".kt": "kotlin",
-        ".swift": "swift",
-        ".scala": "scala",
-        ".dart": "dart",
-        ".py": "python",
-        ".rb": "ruby",
-        ".pl": "perl",
-        ".pm": "perl",
-        ".sh": "bash",
-        ".bash": "bash",
-        ".zsh": "zsh",
-        ".ps1": "powershell",
-        ".html": "html",
-        ".htm": "html",
-        ".xml": "xml",
-        ".sql": "sql",
-        ".m": "matlab",
-        ".r": "r",
-        ".lua": "lua",
-        ".jl": "julia",
-        ".f": "fortran",
-        ".f90": "fortran",
-        ".hs": "haskell",
-        ".lhs": "haskell",
-        ".ml": "ocaml",
-        ".erl": "erlang",
-        ".ex": "elixir",
-        ".exs": "elixir",
-        ".clj": "clojure",
-        ".coffee": "coffeescript",
-        ".groovy": "groovy",
-        ".pas": "pascal",
-        ".vb": "visualbasic",
-        ".asm": "assembly",
-        ".s": "assembly",
-        ".lisp": "lisp",
-        ".cl": "lisp",
-        ".scm": "scheme",
-        ".rkt": "racket",
-        ".fs": "fsharp",
-        ".d": "d",
-        ".ada": "ada",
-        ".nim": "nim",
-        ".cr": "crystal",
-        ".v": "verilog",
-        ".vhd": "vhdl",
-        ".tcl": "tcl",
-        ".elm": "elm",
-        ".zig": "zig",
-        ".raku": "raku",
-        ".perl6": "raku",
-        ".p6": "raku",
-        ".vim": "vimscript",
-        ".ps": "postscript",
-        ".prolog": "prolog",
-        ".cobol": "cobol",
-        ".cob": "cobol",
-        ".cbl": "cobol",
-        ".forth": "forth",
-        ".fth": "forth",
-        ".abap": "abap",
-        ".apex": "apex",
-        ".sol": "solidity",
-        ".hack": "hack",
-        ".sml": "standardml",
-        ".purs": "purescript",
-        ".idr": "idris",
-        ".agda": "agda",
-        ".lean": "lean",
-        ".wasm": "webassembly",
-        ".wat": "webassembly",
-        ".j2": "jinja2",
-        ".md": "markdown",
-        ".tex": "latex",
-        ".bib": "bibtex",
-        ".yaml": "yaml",
-        ".yml": "yaml",
-        ".json": "json",
-        ".toml": "toml",
-        ".ini": "ini",
-        ".cfg": "ini",
-        ".conf": "ini",
-        ".dockerfile": "dockerfile",
-        ".docker": "dockerfile",
-        '.txt': 'plaintext',
-        '.csv': 'csv',
-        '.tsv': 'tsv',
-        '.log': 'log'
-    }
-
-    return language_map.get(extension, "unknown")
+    detector = _detector(tuple(syntax_map.items())) if syntax_map else _DEFAULT_DETECTOR
+    language = detector.from_name(filename)
+    if language is None and head is not None:
+        try:
+            language = sniff_language(head() if callable(head) else head)
+        except OSError:
+            language = None
+    return language or "unknown"
+
+
+def sniff_language(head: bytes) -> Optional[str]:
+    """
+    Detects the language of a file from its shebang line or a Vim or Emacs modeline.
+
+    Parameters:
+    - head (bytes): The first bytes of the file.
+
+    Returns:
+    - Optional[str]: The language, or None if the first bytes do not tell.
+    """
+    lines = head.decode("utf-8", errors="replace").splitlines()[:MODELINE_LINES]
+    if not lines:
+        return None
+    if lines[0].startswith("#!"):
+        language = _interpreter_language(lines[0][2:].split())
+        if language is not None:
+            return language
+    for line in lines:
+        match = _EMACS_MODELINE.search(line)
+        if match:
+            fields = match.group(1)
+            mode = _EMACS_MODE.search(fields)
+            language = _modeline_language(mode.group(1) if mode else fields if ":" not in fields else "")
+            if language is not None:
+                return language
+        match = _VIM_MODELINE.search(line)
+        if match:
+            language = _modeline_language(match.group(1))
+            if language is not None:
+                return language
+    return None
+
+
+class _Detector:
+    """The name-based detection for one syntax map."""
+
+    def __init__(self, syntax_map: Dict[str, str]):
+        self.syntax_map = syntax_map
+        # Extensions of the syntax map win over file names, as before
+        self.extensions = {**LANGUAGE_MAP, **syntax_map}
+
+    def from_name(self, filename: str) -> Optional[str]:
+        _, extension = os.path.splitext(filename)
+        extension = extension.lower()
+        if extension in self.syntax_map:
+            return self.syntax_map[extension]
+        name = os.path.basename(filename).lower()
+        language = FILENAME_MAP.get(name) or self.extensions.get(extension)
+        if language is None:
+            for prefix, prefix_language in FILENAME_PREFIXES:
+                if name.startswith(prefix):
+                    return prefix_language
+        return language
+
+
+@lru_cache(maxsize=32)
+def _detector(syntax_items: Tuple[Tuple[str, str], ...]) -> _Detector:
+    return _Detector(dict(syntax_items))
+
+
+_DEFAULT_DETECTOR = _Detector({})
+
+
+def _interpreter_language(command: list) -> Optional[str]:
+    """Return the language of the interpreter of a shebang, e.g. ["/usr/bin/env", "-S", "python3"]."""
+    if command and os.path.basename(command[0]) == "env":
+        # Skip the options and variable assignments of env
+        command = [arg for arg in command[1:] if not arg.startswith("-") and "=" not in arg]
+    if not command:
+        return None
+    interpreter = _VERSION_SUFFIX.sub("", os.path.basename(command[0]).lower())
+    return INTERPRETER_MAP.get(interpreter)
+
+
+def _modeline_language(name: str) -> Optional[str]:
+    name = name.strip().lower()
+    language = MODELINE_ALIASES.get(name, name)
+    return language if language in KNOWN_LANGUAGES else None
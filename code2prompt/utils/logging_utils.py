@@ -50,6 +50,71 @@ def log_token_count(token_count):
     token_count_message = f"\n✨ \033[94mToken count: {token_count}\033[0m\n"  # Added color for better display
     print(token_count_message, file=sys.stderr)
 
+def log_token_budget(kept, total, tokens, max_tokens, dropped):
+    """Log the files kept within the token budget, and each dropped file with the reason."""
+    print(
+        f"\n🎯 \033[94mToken budget: kept {kept} of {total} files, {tokens} of {max_tokens} tokens\033[0m",
+        file=sys.stderr,
+    )
+    for dropped_file in dropped:
+        print(f"   dropped {dropped_file.path}: {dropped_file.reason}", file=sys.stderr)
+
+def log_output_parts(parts, max_tokens):
+    """Log the parts of a split output with their token counts."""
+    print(
+        f"\n📚 \033[94mOutput split into {len(parts)} parts of at most {max_tokens} tokens\033[0m",
+        file=sys.stderr,
+    )
+    for part in parts:
+        print(f"   {part.path}: {part.files} sections, {part.tokens} tokens", file=sys.stderr)
+
+def log_tokens_saved(files_saved):
+    """Log the tokens saved by each compaction transform, in total and for each file that saved any."""
+    totals = {}
+    for _, saved in files_saved:
+        for transform, tokens in saved.items():
+            totals[transform] = totals.get(transform, 0) + tokens
+    breakdown = ", ".join(f"{transform} {tokens}" for transform, tokens in totals.items())
+    print(
+        f"\n✂️  \033[94mCompaction saved {sum(totals.values())} tokens"
+        f" in {len(files_saved)} files\033[0m" + (f" ({breakdown})" if breakdown else ""),
+        file=sys.stderr,
+    )
+    for path, saved in files_saved:
+        if any(saved.values()):
+            breakdown = ", ".join(f"{transform} {tokens}" for transform, tokens in saved.items() if tokens)
+            print(f"   {path}: {sum(saved.values())} tokens ({breakdown})", file=sys.stderr)
+
+def log_duplicates(result):
+    """Log the files removed as duplicates, the files they duplicate and the tokens saved."""
+    print(
+        f"\n♻️  \033[94mRemoved {result.identical + result.near} duplicate files"
+        f" ({result.identical} identical, {result.near} near), {result.tokens_saved} tokens saved\033[0m",
+        file=sys.stderr,
+    )
+    for file in result.files:
+        duplicates = list(file.get("duplicates", []))
+        duplicates += [
+            f"{duplicate['path']} ({duplicate['similarity']:.0%} similar)" for duplicate in file.get("near_duplicates", [])
+        ]
+        if duplicates:
+            print(f"   {file['path']}: {', '.join(duplicates)}", file=sys.stderr)
+
+def log_elided_files(files):
+    """Log the files cut by the byte and token caps, with what was elided from each."""
+    elided_bytes = sum(file["elided_bytes"] for file in files)
+    elided_tokens = sum(file["elided_tokens"] for file in files)
+    print(
+        f"\n✂️  \033[94m{len(files)} files capped: {elided_bytes} bytes and {elided_tokens} tokens elided\033[0m",
+        file=sys.stderr,
+    )
+    for file in files:
+        print(
+            f"   {file['path']}: {file['size']} bytes, {file['elided_bytes']} bytes and"
+            f" {file['elided_tokens']} tokens elided",
+            file=sys.stderr,
+        )
+
 def log_token_prices(prices):
     """Log the estimated token prices."""
     # Remove the unused logger variable
@@ -7,9 +7,10 @@ if a file should be processed based on several criteria.
 
 import logging
 from pathlib import Path
-from typing import List  # Add this import
+from typing import Iterable, Optional, Union
+from code2prompt.utils.filter_spec import FilterSpec
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher
 from code2prompt.utils.is_binary import is_binary
-from code2prompt.utils.is_filtered import is_filtered
 from code2prompt.utils.is_ignored import is_ignored
 
 logger = logging.getLogger(__name__)
@@ -17,14 +18,20 @@ logger = logging.getLogger(__name__)
 
 def should_process_file(
     file_path: Path,
-    gitignore_patterns: List[str],  # List is now defined
+    gitignore_patterns: Union[GitignoreMatcher, Iterable[str]],
     root_path: Path,
     filter_patterns: str,  ## comma separated list of patterns
     exclude_patterns: str,  ## comma separated list of patterns
     case_sensitive: bool,
+    filter_spec: Optional[FilterSpec] = None,
 ) -> bool:
     """
     Determine whether a file should be processed based on several criteria.
+
+    gitignore_patterns is preferably a GitignoreMatcher compiled once by the caller;
+    a plain list of patterns is compiled on first use and cached. Likewise, a
+    FilterSpec given as filter_spec replaces filter_patterns, exclude_patterns
+    and case_sensitive.
     """
     logger.debug(
         "Checking if should process file: %s", file_path
@@ -40,12 +47,10 @@ def should_process_file(
         )
         return False
 
-    if not is_filtered(
-        file_path=file_path,
-        include_pattern=filter_patterns,
-        exclude_pattern=exclude_patterns,
-        case_sensitive=case_sensitive,
-    ):
+    if filter_spec is None:
+        filter_spec = FilterSpec.compile(filter_patterns, exclude_patterns, case_sensitive)
+
+    if not filter_spec.matches(file_path):
         logger.debug(
             "Skipping %s: File does not meet filter criteria.", file_path
         )  # Use lazy % formatting
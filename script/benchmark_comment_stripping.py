@@ -0,0 +1,133 @@
+"""
+Throughput benchmark of the table-driven comment lexer against the regex
+strippers it replaced.
+
+Usage:
+    python script/benchmark_comment_stripping.py [--size MB]
+
+Typical code is generated for the four language families of the old strippers,
+with the usual density of comments and string literals. The pathological inputs
+are unterminated comments and strings, on which the old regexes take quadratic
+time; they are run on much smaller inputs, and the old stripper is given up on
+after a few seconds.
+"""
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from code2prompt.comment_stripper import strip_comments  # noqa: E402
+
+# The regex strippers as they were before the lexer, for comparison.
+_LEGACY_PATTERNS = {
+    "c": (re.compile(r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"', re.DOTALL | re.MULTILINE), ("'", '"')),
+    "python": (
+        re.compile(r'(?s)#.*?$|\'\'\'.*?\'\'\'|""".*?"""|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"', re.MULTILINE),
+        ("'", '"'),
+    ),
+    "sql": (re.compile(r'--.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"', re.DOTALL | re.MULTILINE), ("'", '"')),
+    "r": (re.compile(r'#.*?$|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"', re.DOTALL | re.MULTILINE), ("'", '"')),
+}
+
+
+def legacy_strip_comments(code: str, language: str) -> str:
+    pattern, strings = _LEGACY_PATTERNS[language]
+
+    def replace(match):
+        text = match.group(0)
+        if language == "python" and text.startswith(("'''", '"""')):
+            return ""
+        return text if text.startswith(strings) else ""
+
+    return pattern.sub(replace, code)
+
+
+_SNIPPETS = {
+    "c": [
+        "    int total = count(items, n); // running total\n",
+        '    printf("value: %d\\n", total);\n',
+        "    /* Walk the list and\n       free every node. */\n",
+        "    char quote = '\\'';\n",
+        "    for (int i = 0; i < n; i++) { sum += values[i] * weights[i]; }\n",
+    ],
+    "python": [
+        "    total = sum(values)  # running total\n",
+        '    message = f"value: {total!r}"\n',
+        '    """Walk the list and\n    free every node."""\n',
+        "    quote = '\\''\n",
+        "    result = [value * weight for value, weight in zip(values, weights)]\n",
+    ],
+    "sql": [
+        "SELECT id, name -- the columns\n",
+        "FROM users WHERE name = 'O''Brien'\n",
+        "/* Join the orders\n   of each user. */\n",
+        "JOIN orders ON orders.user_id = users.id AND orders.total > 100\n",
+    ],
+    "r": [
+        "total <- sum(values) # running total\n",
+        'message <- paste("value:", total)\n',
+        "result <- lapply(values, function(x) x * weight)\n",
+    ],
+}
+
+_PATHOLOGICAL = {
+    "unterminated /* comments": ("c", "/* " * 20_000),
+    'unterminated " strings': ("python", '"\\' * 20_000),
+    "unterminated ' strings": ("sql", "'\\" * 20_000),
+}
+
+
+def typical_code(language: str, size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    snippets = _SNIPPETS[language]
+    parts, length = [], 0
+    while length < size:
+        snippet = rng.choice(snippets)
+        parts.append(snippet)
+        length += len(snippet)
+    return "".join(parts)
+
+
+def measure(function, code: str, language: str, timeout: float) -> float:
+    """Return the seconds taken by function(code, language), or inf past the timeout."""
+    elapsed = []
+
+    def run():
+        start = time.perf_counter()
+        function(code, language)
+        elapsed.append(time.perf_counter() - start)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return elapsed[0] if elapsed else float("inf")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=4.0, help="Megabytes of typical code per language.")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds before giving up on a run.")
+    args = parser.parse_args()
+
+    print(f"{'input':<28} {'regex MB/s':>12} {'lexer MB/s':>12} {'speed-up':>9}")
+    cases = [
+        (f"typical {language}", language, typical_code(language, int(args.size * 1_000_000)))
+        for language in _SNIPPETS
+    ]
+    cases += [(name, language, code) for name, (language, code) in _PATHOLOGICAL.items()]
+    for name, language, code in cases:
+        megabytes = len(code) / 1_000_000
+        legacy = measure(legacy_strip_comments, code, language, args.timeout)
+        lexer = measure(strip_comments, code, language, args.timeout)
+        legacy_rate = f"{megabytes / legacy:.1f}" if legacy != float("inf") else f"> {args.timeout:.0f} s"
+        print(f"{name:<28} {legacy_rate:>12} {megabytes / lexer:>12.1f} {legacy / lexer:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
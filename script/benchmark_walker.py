@@ -0,0 +1,128 @@
+"""
+Benchmark the directory walker with 1 to 32 workers on a synthetic deep tree.
+
+Usage:
+    python script/benchmark_walker.py [--depth 5] [--fanout 4] [--files 8]
+                                      [--latency-ms 2] [--root PATH]
+
+On a local disk the directory reads are served from the page cache and the walk
+is bound by the interpreter, so extra workers barely help. --latency-ms adds a
+sleep to every directory read to model a network file system such as NFS, where
+each readdir is a round-trip to the server; this is where the workers pay off.
+Pass --root to benchmark an existing tree (for example an NFS checkout) instead.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tabulate import tabulate  # noqa: E402
+
+from code2prompt.core import walk_directory as walk_module  # noqa: E402
+from code2prompt.utils.get_gitignore_patterns import get_gitignore_matcher  # noqa: E402
+
+WORKER_COUNTS = [1, 2, 4, 8, 16, 32]
+
+
+def create_tree(root: Path, depth: int, fanout: int, files: int) -> int:
+    """Create a tree of fanout**depth leaf directories and return the file count."""
+    count = 0
+    directories = [root]
+    for level in range(depth + 1):
+        next_level = []
+        for directory in directories:
+            directory.mkdir(parents=True, exist_ok=True)
+            for i in range(files):
+                (directory / f"file_{i}.py").write_text(f"# level {level}\n")
+                count += 1
+            if level < depth:
+                next_level.extend(directory / f"dir_{i}" for i in range(fanout))
+        directories = next_level
+    return count
+
+
+def install_latency(latency_ms: float):
+    """Make every os.scandir call of the walker sleep first."""
+    if latency_ms <= 0:
+        return
+    scandir = os.scandir
+
+    def slow_scandir(path):
+        time.sleep(latency_ms / 1000)
+        return scandir(path)
+
+    walk_module.os.scandir = slow_scandir
+
+
+def benchmark(root: Path, repeat: int):
+    matcher = get_gitignore_matcher(root, None)
+    rows = []
+    expected = None
+    baseline = None
+    for workers in WORKER_COUNTS:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            paths = [
+                entry.path
+                for entry in walk_module.walk_directory(root, matcher, workers=workers)
+            ]
+            timings.append(time.perf_counter() - start)
+        if expected is None:
+            expected = paths
+        elif paths != expected:
+            raise SystemExit(f"Output with {workers} workers differs from 1 worker")
+        best = min(timings)
+        baseline = baseline or best
+        rows.append(
+            [
+                workers,
+                len(paths),
+                f"{best * 1000:.1f}",
+                f"{statistics.median(timings) * 1000:.1f}",
+                f"{baseline / best:.2f}x",
+            ]
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, default=5, help="Depth of the tree.")
+    parser.add_argument("--fanout", type=int, default=4, help="Subdirectories per directory.")
+    parser.add_argument("--files", type=int, default=8, help="Files per directory.")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated latency of every directory read, in milliseconds.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count.")
+    parser.add_argument("--root", type=Path, help="Walk an existing tree instead.")
+    args = parser.parse_args()
+
+    install_latency(args.latency_ms)
+    headers = ["workers", "files", "best (ms)", "median (ms)", "speedup"]
+
+    if args.root:
+        print(tabulate(benchmark(args.root, args.repeat), headers=headers))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        count = create_tree(root, args.depth, args.fanout, args.files)
+        print(
+            f"Synthetic tree: depth {args.depth}, fanout {args.fanout}, "
+            f"{count} files, {args.latency_ms} ms per directory read\n"
+        )
+        print(tabulate(benchmark(root, args.repeat), headers=headers))
+
+
+if __name__ == "__main__":
+    main()
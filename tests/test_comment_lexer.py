@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from code2prompt.comment_stripper import COMMENT_SYNTAX, CommentSyntax, strip_comments, strip_comments_with_syntax
+from code2prompt.utils.language_inference import KNOWN_LANGUAGES
+
+
+def test_every_language_has_a_comment_syntax():
+    assert KNOWN_LANGUAGES <= set(COMMENT_SYNTAX)
+
+
+@pytest.mark.parametrize(
+    "language, code, expected",
+    [
+        ("c", 'puts("// not /* a comment */"); // comment\n', 'puts("// not /* a comment */");\n'),
+        ("c", "a = '\"'; /* one */ b = 1; /* two\n */\nc();\n", "a = '\"';  b = 1;\nc();\n"),
+        ("javascript", "const s = `line\n// kept`; // dropped\n", "const s = `line\n// kept`;\n"),
+        ("go", "s := `C:\\` // dropped\n", "s := `C:\\`\n"),
+        ("rust", "fn f<'a>() {} /* outer /* inner */ still */ x\n", "fn f<'a>() {}  x\n"),
+        ("python", '#!/usr/bin/env python\ndef f():\n    """Docstring."""\n    x = """kept"""  # dropped\n',
+         '#!/usr/bin/env python\ndef f():\n    x = """kept"""\n'),
+        ("bash", 'echo "${#list[@]}" $# # comment\n', 'echo "${#list[@]}" $#\n'),
+        ("perl", "my $n = $#array; # last index\n", "my $n = $#array;\n"),
+        ("sql", "SELECT 'it''s -- kept' -- dropped\nFROM t;\n", "SELECT 'it''s -- kept'\nFROM t;\n"),
+        ("haskell", "x = 1 {- a {- nested -} comment -} + 2 -- end\n", "x = 1  + 2\n"),
+        ("lua", "--[[ block\n]] print('--[[ kept') -- line\n", " print('--[[ kept')\n"),
+        ("latex", "50\\% off % comment\n", "50\\% off\n"),
+        ("yaml", "key: a#b # comment\n", "key: a#b\n"),
+        ("html", "<p>don't</p><!-- comment -->\r\n<!-- whole line -->\r\nend", "<p>don't</p>\r\nend"),
+        ("json", '{"a": "// b"}', '{"a": "// b"}'),
+        ("unknown", "# kept", "# kept"),
+    ],
+)
+def test_strip_comments(language, code, expected):
+    assert strip_comments(code, language) == expected
+
+
+def test_unterminated_tokens_run_to_their_end():
+    assert strip_comments('x = 1 /* open\ny = 2\n', "c") == "x = 1"
+    # An unterminated single-line string stops at the end of its line
+    assert strip_comments('s = "open\n// comment\n', "c") == 's = "open\n'
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "/*" * 100_000,
+        "/* */" * 100_000,
+        '"\\' * 100_000,
+        "'" * 100_000 + "\n",
+        "-- " + "{-" * 100_000,
+        "x\n" * 100_000,
+    ],
+    ids=["unclosed-blocks", "many-blocks", "escapes", "unclosed-strings", "nested-openers", "lines"],
+)
+def test_pathological_inputs_take_linear_time(code):
+    for language in ("c", "haskell", "python", "sql"):
+        start = time.perf_counter()
+        strip_comments(code, language)
+        assert time.perf_counter() - start < 2
+
+
+def test_custom_syntax():
+    syntax = CommentSyntax(line=("REM ",), strings=('"',), escape="")
+    assert strip_comments_with_syntax('PRINT "REM \\" REM x\n', syntax) == 'PRINT "REM \\"\n'
@@ -0,0 +1,132 @@
+import ast
+
+import pytest
+import tiktoken
+
+from code2prompt.core.compaction import (
+    TRANSFORMS,
+    collapse_blank_lines,
+    compact,
+    parse_transforms,
+    reindent,
+    strip_python_docstrings,
+    strip_trailing_whitespace,
+)
+from code2prompt.core.process_files import process_files
+from code2prompt.utils import encoder_registry
+
+PYTHON_CODE = '''"""Module docstring."""
+import os
+
+
+class Greeter:
+    """Greets people.
+
+    At length.
+    """
+
+    def greet(self, name):
+        """Only a docstring."""
+
+    async def wait(self):
+        \'\'\'Docstring.\'\'\'  # with a comment
+        return "not a docstring"
+
+
+def inline(): "kept, it shares its line"; return 1
+'''
+
+
+@pytest.fixture
+def byte_tokens(monkeypatch):
+    # One token per byte, so the tests run without downloading a tokenizer
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+
+
+def test_parse_transforms():
+    assert parse_transforms(None) == ()
+    assert parse_transforms("blank-lines, docstrings") == ("docstrings", "blank-lines")
+    assert parse_transforms("all") == TRANSFORMS
+    with pytest.raises(ValueError, match="Invalid transform 'tabs'"):
+        parse_transforms("indent,tabs")
+
+
+def test_strip_python_docstrings():
+    stripped = strip_python_docstrings(PYTHON_CODE)
+    ast.parse(stripped)
+    assert "docstring." not in stripped.lower().replace("not a docstring", "")
+    assert "        pass\n" in stripped
+    assert 'return "not a docstring"' in stripped
+    assert 'def inline(): "kept, it shares its line"; return 1' in stripped
+
+
+def test_strip_python_docstrings_leaves_invalid_code_and_other_languages():
+    assert strip_python_docstrings('def f(:\n    """doc"""\n') == 'def f(:\n    """doc"""\n'
+    assert strip_python_docstrings('"""doc"""\n', "ruby") == '"""doc"""\n'
+
+
+def test_strip_trailing_whitespace_keeps_line_endings():
+    assert strip_trailing_whitespace("a  \r\nb\t\nc ") == "a\r\nb\nc"
+    assert strip_trailing_whitespace("line break  \n", "markdown") == "line break  \n"
+
+
+def test_collapse_blank_lines():
+    code = "\n\na = 1\n\n  \n\t\nb = 2\n\nc = 3\n\n\n"
+    assert collapse_blank_lines(code) == "a = 1\n\nb = 2\n\nc = 3\n"
+    assert collapse_blank_lines("a\r\n\r\n\r\nb\r\n") == "a\r\n\r\nb\r\n"
+
+
+def test_reindent_python_keeps_the_structure():
+    code = "class A:\n    def f(self):\n        if x:\n            return (1,\n                    2)\n"
+    reindented = reindent(code, "python")
+    assert reindented == "class A:\n def f(self):\n  if x:\n   return (1,\n     2)\n"
+    ast.parse(reindented)
+
+
+def test_reindent_python_falls_back_to_a_common_step():
+    # The continuation line is indented by 2, so the step of 4 would change the structure
+    code = "def f():\n    return g(\n      1)\n"
+    assert reindent(code, "python") == "def f():\n  return g(\n   1)\n"
+
+
+def test_reindent_keeps_partial_steps_elsewhere():
+    code = "int f() {\n\t/*\n\t * doc\n\t */\n\tif (a) {\n\t\tb;\n\t}\n}\n"
+    assert reindent(code, "c") == "int f() {\n /*\n  * doc\n  */\n if (a) {\n  b;\n }\n}\n"
+
+
+def test_reindent_leaves_layout_sensitive_languages():
+    code = "- item\n    - nested\n"
+    assert reindent(code, "markdown") == code
+    assert reindent(code, "unknown") == code
+
+
+def test_compact_counts_the_tokens_saved_by_each_transform():
+    content, saved = compact("a = 1   \n\n\n\nb = 2\n", "python", ("trailing-whitespace", "blank-lines"), len)
+    assert content == "a = 1\n\nb = 2\n"
+    assert saved == {"trailing-whitespace": 3, "blank-lines": 2}
+    assert compact("a = 1   \n", "python", ("trailing-whitespace",)) == ("a = 1\n", {})
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_process_files_reports_tokens_saved(tmp_path, byte_tokens, executor):
+    path = tmp_path / "greeter.py"
+    path.write_text(PYTHON_CODE)
+
+    plain = process_files([path], False, False, False, {}, transforms=TRANSFORMS)
+    assert "tokens_saved" not in plain[0]
+
+    files = process_files(
+        [path], False, False, False, {}, workers=2, executor=executor,
+        transforms=TRANSFORMS, savings_encoding="cl100k_base",
+    )
+    assert files[0]["content"] == plain[0]["content"]
+    saved = files[0]["tokens_saved"]
+    assert list(saved) == list(TRANSFORMS)
+    assert sum(saved.values()) == len(PYTHON_CODE.encode()) - len(files[0]["content"].encode())
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+import tiktoken
+
+from code2prompt.utils import encoder_registry
+from code2prompt.utils.analyzer import (
+    analyze_codebase,
+    count_tokens_by_extension,
+    format_flat_output,
+    format_tree_output,
+)
+
+
+@pytest.fixture
+def byte_encoding(monkeypatch):
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.py").write_text("print('hello')\n")
+    (tmp_path / "sub" / "b.py").write_text("x = 1\n")
+    (tmp_path / "sub" / "c.css").write_text("<|endoftext|>")
+    (tmp_path / "d.bin").write_bytes(b"\x00\x01\x02")
+    (tmp_path / "e.txt").write_bytes(b"\xff\xfe invalid")
+    (tmp_path / "Makefile").write_text("all:\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_count_tokens_by_extension(codebase, byte_encoding, workers):
+    entries = []
+    extension_counts, extension_dirs = analyze_codebase(str(codebase), entries=entries)
+    tokens = count_tokens_by_extension(entries, "cl100k_base", workers=workers)
+
+    assert tokens == {
+        ".py": {str(codebase): 15, str(codebase / "sub"): 6},
+        ".css": {str(codebase / "sub"): 13},
+        ".bin": {str(codebase): 0},
+        ".txt": {str(codebase): 0},
+    }
+    assert set(tokens) == set(extension_counts)
+    assert {ext: set(dirs) for ext, dirs in tokens.items()} == {
+        ext: set(dirs) for ext, dirs in extension_dirs.items()
+    }
+
+
+def test_files_deleted_after_the_walk_count_no_tokens(codebase, byte_encoding):
+    entries = []
+    analyze_codebase(str(codebase), entries=entries)
+    (codebase / "a.py").unlink()
+
+    tokens = count_tokens_by_extension(entries, "cl100k_base")
+
+    assert tokens[".py"] == {str(codebase): 0, str(codebase / "sub"): 6}
+
+
+def test_format_output_with_tokens(codebase, byte_encoding):
+    entries = []
+    extension_counts, extension_dirs = analyze_codebase(str(codebase), entries=entries)
+    tokens = count_tokens_by_extension(entries, "cl100k_base")
+
+    flat = format_flat_output(extension_counts, tokens)
+    assert ".py: 2 files, 21 tokens" in flat
+    assert ".bin: 1 file, 0 tokens" in flat
+
+    tree = format_tree_output(extension_dirs, tokens)
+    assert ".css (13 tokens)" in tree
+    assert ".py (6 tokens)" in tree
+    assert ".py (15 tokens)" in tree
+    assert " tokens)" not in format_tree_output(extension_dirs)
@@ -0,0 +1,69 @@
+import random
+
+from code2prompt.core.dedupe import dedupe_files, minhash_signature, similarity
+from code2prompt.utils.generate_markdown_content import format_file_section
+
+
+def _file(path, content, **extra):
+    return {
+        "path": path,
+        "extension": ".py",
+        "language": "python",
+        "size": len(content),
+        "created": "2024-01-01 00:00:00",
+        "modified": "2024-01-01 00:00:00",
+        "content": content,
+        "no_codeblock": False,
+        **extra,
+    }
+
+
+def _text(seed, lines=200):
+    rng = random.Random(seed)
+    words = [f"name{i}" for i in range(300)]
+    return "\n".join(" ".join(rng.choice(words) for _ in range(8)) for _ in range(lines))
+
+
+def test_identical_files_are_emitted_once():
+    files = [_file("a.py", "x = 1\n", tokens=4), _file("b.py", "y = 2\n"), _file("vendor/a.py", "x = 1\n", tokens=4)]
+
+    result = dedupe_files(files)
+
+    assert [file["path"] for file in result.files] == ["a.py", "b.py"]
+    assert result.files[0]["duplicates"] == ["vendor/a.py"]
+    assert (result.identical, result.near, result.tokens_saved) == (1, 0, 4)
+
+
+def test_tokens_saved_are_counted_when_files_have_no_counts():
+    files = [_file("a.py", "x = 1\n"), _file("b.py", "x = 1\n")]
+    assert dedupe_files(files, count_tokens=len).tokens_saved == 6
+
+
+def test_near_duplicates_above_the_threshold_are_collapsed():
+    base = _text(0)
+    lines = base.split("\n")
+    lines[10] = "a changed line"
+    files = [_file("a.py", base), _file("other.py", _text(1)), _file("copy.py", "\n".join(lines))]
+
+    assert dedupe_files(files).files == files
+    result = dedupe_files(files, near_threshold=0.8)
+
+    assert [file["path"] for file in result.files] == ["a.py", "other.py"]
+    (near,) = result.files[0]["near_duplicates"]
+    assert near["path"] == "copy.py" and near["similarity"] >= 0.8
+    assert result.near == 1
+
+
+def test_minhash_similarity_estimates_jaccard():
+    base = _text(2)
+    assert similarity(minhash_signature(base), minhash_signature(base)) == 1.0
+    assert similarity(minhash_signature(base), minhash_signature(_text(3))) < 0.2
+    assert minhash_signature("") == ()
+    assert minhash_signature(base) == minhash_signature(base[:])
+
+
+def test_file_section_lists_duplicates():
+    file = _file("a.py", "x = 1\n", duplicates=["b.py"], near_duplicates=[{"path": "c.py", "similarity": 0.92}])
+    section = format_file_section(file, False)
+    assert "- Duplicates (identical): b.py\n" in section
+    assert "- Near duplicates: c.py (92% similar)\n" in section
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+
+import pytest
+import tiktoken
+
+from code2prompt.utils import encoder_registry
+from code2prompt.utils.count_tokens import count_tokens
+from code2prompt.utils.encoder_registry import BPE_BASE_URL, get_encoder, set_bpe_dir, warm_up
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Record the encodings loaded by tiktoken, and start from an empty registry."""
+    calls = []
+
+    def get_encoding(name):
+        calls.append((name, os.environ.get("TIKTOKEN_CACHE_DIR")))
+        return tiktoken.Encoding(
+            name=name,
+            pat_str=r"\S+|\s+",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={},
+        )
+
+    monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+    monkeypatch.setattr(encoder_registry, "_bpe_dir", None)
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+    return calls
+
+
+def test_encoder_is_loaded_once(loads):
+    encoders = []
+    threads = [
+        threading.Thread(target=lambda: encoders.append(get_encoder("cl100k_base")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(encoder is encoders[0] for encoder in encoders)
+    assert count_tokens("abc", "cl100k_base") == 3
+    assert len(loads) == 1
+
+
+def test_load_failure_is_remembered(monkeypatch, loads):
+    def fail(name):
+        loads.append(name)
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", fail)
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            get_encoder("cl100k_base")
+    assert count_tokens("abc", "cl100k_base") == 0
+    assert loads == ["cl100k_base"]
+
+
+def test_warm_up_loads_in_background(monkeypatch, loads):
+    release = threading.Event()
+    get_encoding = tiktoken.get_encoding
+
+    def slow(name):
+        release.wait(5)
+        return get_encoding(name)
+
+    monkeypatch.setattr(tiktoken, "get_encoding", slow)
+
+    warm_up("p50k_base")
+    assert loads == []
+    release.set()
+    assert get_encoder("p50k_base").name == "p50k_base"
+    assert len(loads) == 1
+
+
+def test_bpe_dir_with_published_file_names(tmp_path, monkeypatch, loads):
+    (tmp_path / "p50k_base.tiktoken").write_bytes(b"seeded")
+    set_bpe_dir(tmp_path)
+    seen = []
+
+    def get_encoding(name):
+        # The seeded file is where tiktoken looks for its cached download
+        key = hashlib.sha1((BPE_BASE_URL + "p50k_base.tiktoken").encode()).hexdigest()
+        with open(os.path.join(os.environ["TIKTOKEN_CACHE_DIR"], key), "rb") as f:
+            seen.append(f.read())
+
+    monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+    get_encoder("p50k_edit")
+
+    assert seen == [b"seeded"]
+    assert "TIKTOKEN_CACHE_DIR" not in os.environ
+
+
+def test_bpe_dir_as_tiktoken_cache(tmp_path, loads):
+    set_bpe_dir(tmp_path)
+    get_encoder("r50k_base")
+    assert loads == [("r50k_base", str(tmp_path))]
@@ -0,0 +1,116 @@
+import os
+import time
+
+from code2prompt.core.file_cache import FileCache
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_file import process_file
+
+OPTIONS = {"suppress_comments": True, "line_number": False, "encoding": "cl100k_base", "syntax_map": {}}
+
+
+def _age(path, seconds=60):
+    """Move the mtime out of the racy window so the stat can be trusted."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def _process(path, cache):
+    return process_file(FileRecord.from_path(path), True, False, False, {}, cache=cache)
+
+
+def test_file_cache_hit_by_stat_skips_read(tmp_path, monkeypatch):
+    source = tmp_path / "src" / "main.py"
+    source.parent.mkdir()
+    source.write_text("# comment\nx = 1\n")
+    _age(source)
+
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        first = _process(source, cache)
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def fail_read(self):
+        raise AssertionError("file read despite an unchanged stat")
+
+    monkeypatch.setattr(FileRecord, "_read", fail_read)
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        second = _process(source, cache)
+        assert (cache.hits, cache.misses) == (1, 0)
+
+    assert second["content"] == first["content"]
+    assert "comment" not in second["content"]
+
+
+def test_file_cache_content_hash_fallback(tmp_path):
+    source = tmp_path / "main.py"
+    source.write_text("x = 1\n")
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        _process(source, cache)
+
+    # Same content, new mtime: served from the content hash
+    _age(source, 10)
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        assert _process(source, cache)["content"] == "x = 1\n"
+        assert cache.hits == 1
+
+
+
+def test_file_cache_does_not_trust_racy_mtime(tmp_path):
+    source = tmp_path / "main.py"
+    source.write_text("x = 1\n")
+    mtime_ns = source.stat().st_mtime_ns
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        _process(source, cache)
+
+    # Rewritten within the same mtime tick: same size, mtime and inode
+    source.write_text("y = 2\n")
+    os.utime(source, ns=(mtime_ns, mtime_ns))
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        assert _process(source, cache)["content"] == "y = 2\n"
+        assert cache.misses == 1
+
+
+def test_file_cache_options_are_part_of_the_key(tmp_path):
+    source = tmp_path / "main.py"
+    source.write_text("# comment\nx = 1\n")
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        _process(source, cache)
+
+    with FileCache(tmp_path / "cache", dict(OPTIONS, suppress_comments=False)) as cache:
+        result = process_file(FileRecord.from_path(source), False, False, False, {}, cache=cache)
+        assert cache.misses == 1
+    assert result["content"] == "# comment\nx = 1\n"
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text(str(i) * 1000)
+        paths.append(path)
+
+    with FileCache(tmp_path / "cache", OPTIONS, max_size=10_000) as cache:
+        for path in paths:
+            _process(path, cache)
+
+    time.sleep(0.01)
+    with FileCache(tmp_path / "cache", OPTIONS, max_size=10_000) as cache:
+        _process(paths[0], cache)
+
+    with FileCache(tmp_path / "cache", OPTIONS, max_size=1_500) as cache:
+        pass
+
+    with FileCache(tmp_path / "cache", OPTIONS) as cache:
+        for path in paths:
+            _process(path, cache)
+        assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_file_cache_unusable_directory_disables_cache(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    source = tmp_path / "main.py"
+    source.write_text("x = 1\n")
+
+    with FileCache(blocker, OPTIONS) as cache:
+        assert not cache
+        assert _process(source, cache)["content"] == "x = 1\n"
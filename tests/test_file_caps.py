@@ -0,0 +1,104 @@
+import pytest
+import tiktoken
+
+from code2prompt.core.file_cache import FileCache
+from code2prompt.core.file_caps import FileCaps, cap_tokens, read_capped_text
+from code2prompt.core.file_path_retriever import retrieve_file_records
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_files import process_files
+from code2prompt.utils import encoder_registry
+from code2prompt.utils.generate_markdown_content import format_file_section
+
+
+@pytest.fixture
+def byte_tokens(monkeypatch):
+    # One token per byte, so the tests run without downloading a tokenizer
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+
+
+@pytest.fixture
+def no_full_reads(monkeypatch):
+    def read(self):
+        raise AssertionError(f"{self.path} was read in full")
+
+    monkeypatch.setattr(FileRecord, "_read", read)
+
+
+def _write_lines(path, count):
+    path.write_text("".join(f"line {i}\n" for i in range(count)))
+
+
+def test_read_capped_text_keeps_whole_lines_of_head_and_tail(tmp_path, no_full_reads):
+    path = tmp_path / "dump.log"
+    _write_lines(path, 10_000)
+
+    text, elided = read_capped_text(FileRecord.from_path(path), FileCaps(max_bytes=100, tail_fraction=0.5))
+
+    head, marker, tail = text.partition(f"[... {elided} bytes elided ...]\n")
+    assert marker
+    assert head.startswith("line 0\n") and head.endswith("\n") and len(head) <= 50
+    assert tail.endswith("line 9999\n") and len(tail) <= 50
+    assert len(head) + len(tail) + elided == path.stat().st_size
+
+
+def test_read_capped_text_does_not_split_characters(tmp_path):
+    path = tmp_path / "one-line.txt"
+    path.write_text("é" * 1000, encoding="utf-8")
+
+    record = FileRecord.from_path(path)
+
+    # The cut falls inside an é at the end of the head, then at the start of the tail
+    for caps in (FileCaps(max_bytes=11, tail_fraction=0.4), FileCaps(max_bytes=11, tail_fraction=0.5)):
+        text, elided = read_capped_text(record, caps)
+        head, _, tail = text.partition("\n[... ")
+        assert head == "é" * 3 and tail.endswith("elided ...]\n" + "é" * 2)
+        assert elided == 2000 - 10
+
+
+def test_read_capped_text_reads_small_files_whole(tmp_path):
+    path = tmp_path / "small.txt"
+    path.write_bytes(b"a\r\nb\r\n")
+    assert read_capped_text(FileRecord.from_path(path), FileCaps(max_bytes=100)) == ("a\nb\n", 0)
+
+
+def test_cap_tokens(byte_tokens):
+    content = "".join(f"line {i}\n" for i in range(100))
+    caps = FileCaps(max_tokens=40, tail_fraction=0.25)
+
+    capped, elided = cap_tokens(content, caps)
+
+    assert capped.startswith("line 0\n") and capped.endswith("line 99\n")
+    assert f"[... {elided} tokens elided ...]\n" in capped
+    assert len(capped.encode()) - len(f"[... {elided} tokens elided ...]\n") + elided == len(content)
+    assert cap_tokens("short\n", caps) == ("short\n", 0)
+
+
+def test_process_files_caps_files_and_does_not_cache_them(tmp_path, byte_tokens, no_full_reads):
+    big = tmp_path / "big.sql"
+    _write_lines(big, 5_000)
+    caps = FileCaps(max_bytes=200)
+    cache = FileCache(tmp_path / "cache", {"max_file_tokens": None})
+    try:
+        (file_data,) = process_files([FileRecord.from_path(big)], False, False, False, {}, cache=cache, caps=caps)
+    finally:
+        cache.close()
+
+    assert file_data["elided_bytes"] > 0 and file_data["elided_tokens"] == 0
+    assert "[... " in file_data["content"]
+    assert "- Elided: " in format_file_section(file_data, False)
+    assert cache.misses == 0
+
+
+def test_retrieve_file_records_sniffs_oversized_files(tmp_path, no_full_reads):
+    _write_lines(tmp_path / "big.log", 5_000)
+
+    records = retrieve_file_records([tmp_path], [], [], False, None, max_file_bytes=1000)
+
+    assert [record.path.name for record in records] == ["big.log"]
@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+
+from code2prompt.core.file_path_retriever import retrieve_file_records
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_file import process_file
+
+
+def test_file_record_from_entry_reads_once(tmp_path, monkeypatch):
+    (tmp_path / "a.py").write_text("print('a')\r\n")
+    entry = next(e for e in os.scandir(tmp_path) if e.name == "a.py")
+    record = FileRecord.from_entry(entry)
+
+    opened = []
+    original_open = os.open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return original_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("code2prompt.core.file_record.os.open", counting_open)
+
+    assert not record.is_binary
+    assert record.text() == "print('a')\n"
+    assert record.data == b"print('a')\r\n"
+    assert record.size == 12
+    assert len(opened) == 1
+
+
+def test_file_record_text_extension_skips_sniff(tmp_path):
+    (tmp_path / "a.py").write_bytes(b"x\x00y")
+    (tmp_path / "b.dat").write_bytes(b"x\x00y")
+
+    python_record = FileRecord.from_path(tmp_path / "a.py")
+    data_record = FileRecord.from_path(tmp_path / "b.dat")
+
+    assert not python_record.is_binary
+    assert python_record._data is None
+    assert data_record.is_binary
+
+
+def test_file_record_sniffs_extensions_shared_with_binary_formats(tmp_path):
+    (tmp_path / "video.ts").write_bytes(b"G\x40\x00\x10" * 47)
+    (tmp_path / "data.m").write_bytes(b"MATLAB 5.0 MAT-file\x00\x01")
+    (tmp_path / "app.ts").write_text("export const x = 1;\n")
+
+    assert FileRecord.from_path(tmp_path / "video.ts").sniff_binary()
+    assert FileRecord.from_path(tmp_path / "data.m").is_binary
+    assert not FileRecord.from_path(tmp_path / "app.ts").sniff_binary()
+
+
+def test_file_record_reads_large_file(tmp_path):
+    content = os.urandom(300_000)
+    (tmp_path / "big.bin").write_bytes(content)
+    assert FileRecord.from_path(tmp_path / "big.bin").data == content
+
+
+def test_process_file_uses_record(tmp_path):
+    file_path = tmp_path / "main.py"
+    file_path.write_text("x = 1\n")
+    record = FileRecord.from_path(file_path)
+    assert record.data
+    file_path.unlink()
+
+    result = process_file(record, False, False, False, {})
+
+    assert result["path"] == str(file_path)
+    assert result["content"] == "x = 1\n"
+    assert result["size"] == 6
+    assert result["language"] == "python"
+
+
+def test_retrieve_file_records_skips_binary_files(tmp_path):
+    (tmp_path / "a.py").write_text("a")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\x00\x00")
+    (tmp_path / "notes").write_text("plain text")
+
+    records = retrieve_file_records([tmp_path], [], [], False, None)
+
+    assert [r.path for r in records] == [tmp_path / "a.py", tmp_path / "notes"]
+    assert all(isinstance(r.path, Path) for r in records)
+
+
+def test_process_file_detects_extensionless_scripts(tmp_path):
+    script = tmp_path / "deploy"
+    script.write_text("#!/usr/bin/env bash\n# say hello\necho hi  # inline\n")
+
+    result = process_file(FileRecord.from_path(script), True, False, False, {})
+
+    assert result["language"] == "bash"
+    assert result["content"] == "#!/usr/bin/env bash\necho hi\n"
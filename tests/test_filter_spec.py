@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from code2prompt.utils.filter_spec import FilterSpec
+
+
+@pytest.mark.parametrize(
+    "path, include, exclude, case_sensitive, expected",
+    [
+        ("src/main.py", "*.py,*.ts", "", False, True),
+        ("src/main.PY", "*.py", "", False, True),
+        ("src/main.PY", "*.py", "", True, False),
+        ("src/main.py.bak", "*.py", "", False, False),
+        ("dir.py/readme", "*.py", "", False, False),
+        ("deeply/nested/file.txt", "**/*.txt", "", False, True),
+        ("file.txt", "**/*.txt", "", False, True),
+        ("x/test/a.py", "**/test/*.py", "", False, True),
+        ("x/test/a.pyc", "**/test/*.py", "", False, False),
+        ("/repo/node_modules/pkg/index.js", "", "**/node_modules/**", False, False),
+        ("/repo/src/index.js", "", "**/node_modules/**", False, True),
+        ("/repo/tests/test_a.py", "", "tests/*", False, False),
+        ("/repo/src/a.py", "src/**/*.py", "", False, True),
+        ("/repo/lib/a.py", "src/**/*.py", "", False, False),
+        (".gitignore", "", "**/.gitignore", False, False),
+    ],
+)
+def test_filter_spec_matches(path, include, exclude, case_sensitive, expected):
+    spec = FilterSpec.compile(include, exclude, case_sensitive)
+    assert spec.matches(Path(path)) is expected
+
+
+def test_filter_spec_accepts_lists_and_is_cached():
+    spec = FilterSpec.compile(["*.py", " *.ts "], "")
+    assert spec.include_patterns == ("*.py", "*.ts")
+    assert FilterSpec.compile("*.py,*.ts", None) is spec
+
+
+def test_filter_spec_excludes_directory():
+    spec = FilterSpec.compile("", "**/node_modules/**,build/*,*.md")
+    assert spec.excludes_directory("/repo/node_modules")
+    assert spec.excludes_directory("/repo/build")
+    assert not spec.excludes_directory("/repo/src")
+    # "*.md" does not end with "*": a directory named docs.md may hold other files.
+    assert not spec.excludes_directory("/repo/docs.md")
+
+
+def test_empty_filter_spec_keeps_everything():
+    spec = FilterSpec.compile("", "")
+    assert not spec
+    assert spec.matches("anything/at/all")
@@ -0,0 +1,43 @@
+import shutil
+import subprocess
+
+import pytest
+
+from code2prompt.core.file_path_retriever import retrieve_file_paths
+from code2prompt.core.git_file_lister import list_git_files
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    for relative in ["a-b.py", "a/b.py", "src/main.py", "src/data.json"]:
+        file_path = tmp_path / relative
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("x")
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    (tmp_path / "untracked.py").write_text("x")
+    return tmp_path
+
+
+def test_list_git_files_lists_tracked_files_only(git_repo):
+    assert list_git_files(git_repo) == ["a/b.py", "a-b.py", "src/data.json", "src/main.py"]
+    assert list_git_files(git_repo / "src") == ["data.json", "main.py"]
+
+
+def test_list_git_files_outside_repository(tmp_path):
+    assert list_git_files(tmp_path) is None
+
+
+def test_retrieve_file_paths_with_git_discovery(git_repo):
+    (git_repo / "src" / "main.py").unlink()  # deleted but still in the index
+    paths = retrieve_file_paths(
+        file_paths=[git_repo],
+        filter_patterns=["*.py"],
+        exclude_patterns=[],
+        case_sensitive=False,
+        gitignore=None,
+        discovery="git",
+    )
+    assert [p.relative_to(git_repo).as_posix() for p in paths] == ["a/b.py", "a-b.py"]
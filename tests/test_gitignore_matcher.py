@@ -0,0 +1,120 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher
+
+
+def test_negation_last_match_wins():
+    matcher = GitignoreMatcher.from_patterns(["*.log", "!keep.log"])
+    assert matcher.is_ignored("debug.log")
+    assert not matcher.is_ignored("keep.log")
+    assert not matcher.is_ignored("src/keep.log")
+
+
+def test_directory_only_pattern():
+    matcher = GitignoreMatcher.from_patterns(["build/"])
+    assert matcher.is_ignored("build", is_dir=True)
+    assert matcher.is_ignored("src/build/out.o")
+    assert not matcher.is_ignored("build")  # a file named build
+
+
+def test_anchored_and_globstar_patterns():
+    matcher = GitignoreMatcher.from_patterns(["/root.txt", "docs/**/*.md", "a/**/b"])
+    assert matcher.is_ignored("root.txt")
+    assert not matcher.is_ignored("sub/root.txt")
+    assert matcher.is_ignored("docs/a.md")
+    assert matcher.is_ignored("docs/x/y/z.md")
+    assert not matcher.is_ignored("other/docs/a.md")
+    assert matcher.is_ignored("a/b")
+    assert matcher.is_ignored("a/x/y/b")
+
+
+def test_excluded_parent_cannot_be_reincluded():
+    matcher = GitignoreMatcher.from_patterns(["build/", "!build/keep.txt"])
+    assert matcher.is_ignored("build/keep.txt")
+
+
+def test_from_patterns_with_base():
+    matcher = GitignoreMatcher.from_patterns(["*.tmp", "/local"], base="pkg")
+    assert matcher.is_ignored("pkg/a/b.tmp")
+    assert matcher.is_ignored("pkg/local")
+    assert not matcher.is_ignored("b.tmp")
+    assert not matcher.is_ignored("pkg/a/local")
+
+
+GITIGNORE = """\
+# comment
+*.log
+!keep.log
+/root.txt
+build/
+!build/keep.py
+docs/**/*.md
+cache/**
+**/generated
+*.py[co]
+tmp?
+\\#hash
+trailing.txt
+lib/*/vendor
+!important/
+node_modules
+"""
+
+PATHS = [
+    "debug.log",
+    "keep.log",
+    "sub/keep.log",
+    "sub/debug.log",
+    "root.txt",
+    "sub/root.txt",
+    "build/a.py",
+    "build/keep.py",
+    "sub/build/b.py",
+    "docs/a.md",
+    "docs/a/b/c.md",
+    "docs/a/b/c.txt",
+    "other/docs/a.md",
+    "cache/x",
+    "cache/y/z",
+    "generated/out.c",
+    "src/generated/out.c",
+    "mod.pyc",
+    "mod.py",
+    "tmp1",
+    "tmp12",
+    "#hash",
+    "trailing.txt",
+    "lib/a/vendor/x.js",
+    "lib/a/b/vendor/x.js",
+    "important/debug.log",
+    "web/node_modules/pkg/index.js",
+    "src/main.py",
+]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_matches_git_check_ignore(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    (tmp_path / ".gitignore").write_text(GITIGNORE)
+    for relative in PATHS:
+        file_path = tmp_path / relative
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("")
+
+    result = subprocess.run(
+        ["git", "check-ignore", "--no-index", "--stdin"],
+        cwd=tmp_path,
+        input="\n".join(PATHS) + "\n",
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    expected = set(result.stdout.splitlines())
+
+    matcher = GitignoreMatcher.from_file(tmp_path / ".gitignore")
+    actual = {relative for relative in PATHS if matcher.is_ignored(relative)}
+    assert actual == expected
@@ -1,3 +1,4 @@
+import os
 import pytest
 from jinja2 import Environment, TemplateNotFound
 from code2prompt.utils.include_loader import IncludeLoader
@@ -106,4 +107,15 @@ def test_get_source_success(temp_dir):
     source, path, uptodate = loader.get_source(env, "main.j2")
     assert source == "Main: {% include 'sub.j2' %}"
     assert path == str(temp_dir / "main.j2")
-    assert uptodate() is True
\ No newline at end of file
+    assert uptodate() is True
+
+
+def test_get_source_uptodate_follows_mtime(temp_dir):
+    loader = IncludeLoader(str(temp_dir))
+    env = Environment(loader=loader)
+    _, path, uptodate = loader.get_source(env, "sub.j2")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert uptodate() is False
+    os.remove(path)
+    assert uptodate() is False
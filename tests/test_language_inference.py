@@ -27,3 +27,41 @@ def test_infer_language():
     assert infer_language("script.m", syntax_map) == "matlab"
     assert infer_language("script.r", syntax_map) == "r"
     assert infer_language("file.txt", syntax_map) == "plaintext"
+
+
+def test_infer_language_from_file_name():
+    assert infer_language("Dockerfile", {}) == "dockerfile"
+    assert infer_language("Dockerfile.dev", {}) == "dockerfile"
+    assert infer_language("Makefile", {}) == "makefile"
+    assert infer_language("CMakeLists.txt", {}) == "cmake"
+    assert infer_language("src/.bashrc", {}) == "bash"
+    # The syntax map still wins
+    assert infer_language("CMakeLists.txt", {".txt": "markdown"}) == "markdown"
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        (b"#!/usr/bin/env python3.11\nprint(1)\n", "python"),
+        (b"#!/usr/bin/env -S node --harmony\n", "javascript"),
+        (b"#!/bin/sh\nset -e\n", "bash"),
+        (b"#!/usr/bin/env\n", "unknown"),
+        (b"# -*- mode: ruby; coding: utf-8 -*-\n", "ruby"),
+        (b"# -*- python -*-\n", "python"),
+        (b"# -*- coding: utf-8 -*-\n", "unknown"),
+        (b"// vim: set ft=javascript :\n", "javascript"),
+        (b"# vim: filetype=sh\n", "bash"),
+        (b"no hint here\n", "unknown"),
+    ],
+)
+def test_infer_language_sniffs_shebangs_and_modelines(head, expected):
+    assert infer_language("script", {}, head) == expected
+
+
+def test_infer_language_reads_head_only_when_the_name_is_not_enough():
+    def head():
+        raise AssertionError("read")
+
+    assert infer_language("main.py", {}, head) == "python"
+    assert infer_language("run", {}, lambda: b"#!/usr/bin/ruby\n") == "ruby"
+    assert infer_language("gone", {}, lambda: (_ for _ in ()).throw(FileNotFoundError())) == "unknown"
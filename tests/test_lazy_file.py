@@ -0,0 +1,126 @@
+import logging
+
+import pytest
+import tiktoken
+
+from code2prompt.commands.generate import GenerateCommand
+from code2prompt.config import Configuration
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.lazy_file import LazyFile
+from code2prompt.core.process_file import process_file
+from code2prompt.core.template_processor import process_template
+from code2prompt.utils import encoder_registry
+
+
+@pytest.fixture
+def byte_tokens(monkeypatch):
+    # One token per byte, so the tests run without downloading a tokenizer
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "a.py").write_text("# comment\nx = 1\n")
+    (tmp_path / "b.bin").write_bytes(b"\xff\xfe")
+    calls = []
+
+    def process(record):
+        calls.append(record.path.name)
+        return process_file(record, suppress_comments=True, line_number=False, no_codeblock=False, syntax_map={})
+
+    lazy = [
+        LazyFile(FileRecord.from_path(tmp_path / name), process, {}, False, encoding="cl100k_base")
+        for name in ("a.py", "b.bin")
+    ]
+    return lazy, calls
+
+
+def test_metadata_does_not_process_the_file(files):
+    lazy, calls = files
+    assert lazy[0]["path"].endswith("a.py")
+    assert lazy[0]["language"] == "python"
+    assert lazy[0]["size"] == 16
+    assert "content" in lazy[0] and "tokens" in lazy[0]
+    assert list(lazy[0])[-1] == "tokens"
+    assert calls == []
+    assert not lazy[0].loaded
+
+
+def test_content_and_tokens_are_computed_once(files, byte_tokens):
+    lazy, calls = files
+    assert lazy[0]["content"] == "x = 1\n"
+    assert lazy[0]["tokens"] == 6
+    assert lazy[0]["content"] == "x = 1\n"
+    assert calls == ["a.py"]
+    assert lazy[0].loaded
+
+
+def test_undecodable_file_is_found_once_processed(files):
+    lazy, calls = files
+    assert lazy[0].decodes()
+    assert not lazy[1].decodes()
+    assert lazy[1]["content"] == ""
+    assert calls == ["a.py", "b.bin"]
+
+
+def test_unknown_key_does_not_process_the_file(files):
+    lazy, calls = files
+    with pytest.raises(KeyError):
+        lazy[0]["author"]
+    assert calls == []
+    with pytest.raises(KeyError):
+        lazy[0]["elided_bytes"]
+    assert calls == ["a.py"]
+
+
+def test_path_only_template_processes_no_file(tmp_path, files, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    lazy, calls = files
+    template_path = tmp_path / "paths.j2"
+    listing = process_template(
+        "{% for file in files %}{{ file.path }} {{ file['size'] }}\n{% endfor %}", lazy, {}, str(template_path)
+    )
+    assert listing.splitlines() == [f"{tmp_path / 'a.py'} 16", f"{tmp_path / 'b.bin'} 2"]
+    assert calls == []
+
+    rendered = process_template("{{ files[0].content }}{{ files[0].content }}", lazy, {}, str(template_path))
+    assert rendered == "x = 1\nx = 1\n"
+    assert calls == ["a.py"]
+
+
+@pytest.mark.parametrize(
+    "template, listed, reads",
+    [
+        ("{% for file in files %}{{ file.path }}\n{% endfor %}", ["a.py", "b.bin"], False),
+        ("{% for file in files %}{{ file.path }}\n{{ file.content }}{% endfor %}", ["a.py", "x = 1"], True),
+    ],
+)
+def test_generate_reads_files_only_for_templates_that_use_them(tmp_path, monkeypatch, template, listed, reads):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "a.py").write_text("# comment\nx = 1\n")
+    (tmp_path / "b.bin").write_bytes(b"\xff\xfe")
+    (tmp_path / "listing.j2").write_text(template)
+    output = tmp_path / "out.md"
+    config = Configuration(
+        path=[tmp_path / "a.py", tmp_path / "b.bin"],
+        template=tmp_path / "listing.j2",
+        output=output,
+        suppress_comments=True,
+    )
+    read = []
+    text, data = FileRecord.text, FileRecord.data
+    monkeypatch.setattr(FileRecord, "text", lambda self: read.append(self.path.name) or text(self))
+    monkeypatch.setattr(FileRecord, "data", property(lambda self: read.append(self.path.name) or data.fget(self)))
+
+    GenerateCommand(config, logging.getLogger(__name__)).execute()
+
+    lines = output.read_text().splitlines()
+    assert [line.rsplit("/", 1)[-1] for line in lines] == listed
+    assert bool(read) is reads
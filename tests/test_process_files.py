@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import tiktoken
+
+from code2prompt.commands import generate as generate_module
+from code2prompt.commands.generate import GenerateCommand
+from code2prompt.config import Configuration
+from code2prompt.core import process_files as process_files_module
+from code2prompt.core.file_cache import FileCache
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_files import ordered_map, process_files
+from code2prompt.utils import encoder_registry
+
+
+def _create_files(tmp_path, count=80):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"f{i:03}.py"
+        path.write_text(f"# comment {i}\nx = {i}  # trailing\n" * (i % 7 + 1))
+        paths.append(path)
+    (tmp_path / "latin1.txt").write_bytes(b"caf\xe9\n")
+    paths.insert(10, tmp_path / "latin1.txt")
+    return paths
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_processing_matches_serial(tmp_path, monkeypatch, executor):
+    # Several batches, so the results of different workers are interleaved
+    monkeypatch.setattr(process_files_module, "PROCESS_BATCH_SIZE", 8)
+    paths = _create_files(tmp_path)
+
+    serial = process_files(paths, True, False, True, {})
+    parallel = process_files(paths, True, False, True, {}, workers=4, executor=executor)
+
+    assert parallel == serial
+    assert len(serial) == len(paths) - 1
+
+
+def test_process_executor_uses_cache(tmp_path):
+    paths = _create_files(tmp_path, count=10)
+    serial = process_files(paths, False, False, True, {})
+
+    with FileCache(tmp_path / "cache", {"suppress_comments": True}) as cache:
+        records = [FileRecord.from_path(path) for path in paths]
+        first = process_files(records, False, False, True, {}, cache=cache, workers=2, executor="process")
+    with FileCache(tmp_path / "cache", {"suppress_comments": True}) as cache:
+        records = [FileRecord.from_path(path) for path in paths]
+        second = process_files(records, False, False, True, {}, cache=cache, workers=2, executor="process")
+        assert cache.hits == len(paths) - 1
+
+    assert first == serial
+    assert second == serial
+
+
+def test_invalid_executor(tmp_path):
+    with pytest.raises(ValueError):
+        process_files(_create_files(tmp_path, count=1), False, False, False, {}, executor="fiber")
+
+
+def test_ordered_map_keeps_order_and_bounds_tasks_in_flight():
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def work(i):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        # Later items finish first
+        time.sleep(0.001 * (20 - i % 20))
+        with lock:
+            running -= 1
+        return i * i
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(ordered_map(pool, work, range(60), window=4))
+
+    assert results == [i * i for i in range(60)]
+    assert peak <= 4
+
+
+def test_ordered_map_cancels_pending_tasks_on_close():
+    done = []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results = ordered_map(pool, done.append, range(100), window=5)
+        next(results)
+        results.close()
+    assert len(done) < 100
+
+
+@pytest.fixture
+def byte_encoding(monkeypatch):
+    """An offline encoding with one token per byte."""
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+    return encoding
+
+
+def test_process_files_counts_tokens_per_file(tmp_path, monkeypatch, byte_encoding):
+    monkeypatch.setattr(process_files_module, "TOKEN_BATCH_SIZE", 8)
+    paths = _create_files(tmp_path, count=20)
+
+    files_data = process_files(paths, False, False, True, {}, workers=2, encoding="cl100k_base")
+
+    assert [file["tokens"] for file in files_data] == [
+        len(file["content"].encode("utf-8")) for file in files_data
+    ]
+    assert "tokens" not in process_files(paths, False, False, True, {})[0]
+
+
+def test_token_batch_size_bounds_the_files_read_ahead(tmp_path, monkeypatch, byte_encoding):
+    paths = _create_files(tmp_path, count=20)[:20]
+    loaded = []
+    original = process_files_module.transform_content
+
+    def tracking_transform(record, *args, **kwargs):
+        loaded.append(record.path.name)
+        return original(record, *args, **kwargs)
+
+    monkeypatch.setattr(process_files_module, "transform_content", tracking_transform)
+
+    next(process_files_module.process_files_iter(paths, False, False, True, {}, encoding="cl100k_base"))
+    assert len(loaded) == 20
+    loaded.clear()
+    next(process_files_module.process_files_iter(
+        paths, False, False, True, {}, encoding="cl100k_base", token_batch_size=1
+    ))
+    assert len(loaded) == 1
+
+
+def test_token_counts_are_cached(tmp_path, monkeypatch, byte_encoding):
+    paths = _create_files(tmp_path, count=5)
+    with FileCache(tmp_path / "cache", {}) as cache:
+        process_files(paths, False, False, False, {}, cache=cache)
+    # Cached without counts: they are computed and stored on the next run
+    with FileCache(tmp_path / "cache", {}) as cache:
+        first = process_files(paths, False, False, False, {}, cache=cache, encoding="cl100k_base")
+
+    batches = []
+    monkeypatch.setattr(
+        process_files_module,
+        "count_tokens_batch",
+        lambda texts, encoding: batches.append(texts) or [0] * len(texts),
+    )
+    with FileCache(tmp_path / "cache", {}) as cache:
+        second = process_files(paths, False, False, False, {}, cache=cache, encoding="cl100k_base")
+
+    assert second == first
+    assert batches == [[]]
+
+
+@pytest.mark.parametrize(
+    "template, derived",
+    [
+        (None, True),
+        ("{% for file in files %}# {{ file.path }} ({{ file.tokens }})\n{{ file.content }}\n{% endfor %}", True),
+        ("{% for file in files %}{{ file.path }}\n{% endfor %}", False),
+    ],
+)
+def test_total_tokens_derived_from_file_counts(tmp_path, monkeypatch, byte_encoding, template, derived):
+    paths = _create_files(tmp_path, count=5)
+    config = Configuration(path=paths, tokens=True)
+    command = GenerateCommand(config, logging.getLogger(__name__))
+    if template is not None:
+        config.template = str(tmp_path / "t.j2")
+        command.template_content = template
+    files_data = command._process_files({}, encoding="cl100k_base")
+    content = command._generate_content(files_data)
+
+    counted = []
+    original = generate_module.count_tokens
+    monkeypatch.setattr(
+        generate_module, "count_tokens", lambda text, encoding: counted.append(text) or original(text, encoding)
+    )
+
+    assert command._count_output_tokens(files_data, content) == len(content.encode("utf-8"))
+    assert (counted != [content]) is derived
@@ -0,0 +1,140 @@
+import io
+
+import pytest
+
+from code2prompt.core import stream_output
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.process_files import process_files, process_files_iter
+from code2prompt.core.stream_output import (
+    split_part_path,
+    write_chunks,
+    write_markdown_stream,
+    write_split_markdown,
+)
+from code2prompt.utils.generate_markdown_content import (
+    format_file_section,
+    format_table_of_contents,
+    generate_markdown_content,
+)
+
+
+def _create_files(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"f{i}.py"
+        path.write_text(f"x = {i}\n" * 50)
+        paths.append(path)
+    (tmp_path / "latin1.txt").write_bytes(b"caf\xe9\n")
+    paths.append(tmp_path / "latin1.txt")
+    return paths
+
+
+def test_write_markdown_stream_matches_generate_markdown_content(tmp_path, monkeypatch):
+    # Force the spool to disk to cover the rollover
+    monkeypatch.setattr(stream_output, "SPOOL_MAX_SIZE", 100)
+    paths = _create_files(tmp_path)
+    sink = io.StringIO()
+
+    tokens = write_markdown_stream(
+        process_files_iter(paths, False, False, False, {}),
+        False,
+        sink,
+        count_tokens=lambda text: len(text.split()),
+    )
+
+    expected = generate_markdown_content(process_files(paths, False, False, False, {}), False)
+    assert sink.getvalue() == expected
+    assert "latin1.txt" not in expected
+    assert tokens == len(expected.split())
+
+
+def test_process_files_iter_releases_content(tmp_path):
+    paths = _create_files(tmp_path)
+    records = [FileRecord.from_path(path) for path in paths]
+    for record in records:
+        assert record.data
+
+    for _ in process_files_iter(records, False, False, False, {}):
+        pass
+
+    assert all(record._data is None for record in records)
+
+
+def test_write_chunks_coalesces_small_chunks(monkeypatch):
+    monkeypatch.setattr(stream_output, "WRITE_BUFFER_SIZE", 10)
+    writes = []
+
+    class Sink(io.StringIO):
+        def write(self, text):
+            writes.append(text)
+            return super().write(text)
+
+    sink = Sink()
+    chunks = ["ab", "cd", "efghij", "kl", "m"]
+    tokens = write_chunks(chunks, sink, count_tokens=len)
+
+    assert sink.getvalue() == "abcdefghijklm"
+    assert writes == ["abcdefghij", "klm"]
+    assert tokens == 13
+
+
+def test_write_split_markdown_keeps_files_whole(tmp_path):
+    paths = _create_files(tmp_path)
+    files_data = process_files(paths, False, False, False, {})
+    sections = [format_file_section(file, False) for file in files_data]
+    limit = max(len(section) for section in sections) * 2 + 200
+
+    # One token per character, so counts add up exactly
+    parts = write_split_markdown(iter(files_data), False, tmp_path / "out.md", limit, len)
+
+    assert [part.path.name for part in parts] == [f"out.00{i}.md" for i in range(1, len(parts) + 1)]
+    assert len(parts) > 1
+    written = []
+    for part in parts:
+        text = part.path.read_text()
+        assert part.tokens == len(text) <= limit
+        files = files_data[len(written):len(written) + part.files]
+        assert text == generate_markdown_content(files, False)
+        written.extend(files)
+    assert written == files_data
+
+
+def test_write_split_markdown_splits_oversized_files(tmp_path):
+    path = tmp_path / "big.py"
+    path.write_text("".join(f"line {i}\n" for i in range(300)) + "y" * 1500 + "\n")
+    small = tmp_path / "small.py"
+    small.write_text("z = 1\n")
+    files_data = process_files([path, small], False, False, False, {})
+
+    parts = write_split_markdown(files_data, False, tmp_path / "out.md", 1000, len)
+
+    contents = []
+    for part in parts:
+        text = part.path.read_text()
+        assert part.tokens == len(text) <= 1000
+        assert text.startswith(format_table_of_contents([])[:-1])
+    pieces = list(_sections(parts))
+    assert pieces[0].endswith(f"big.py (part 1 of {len(pieces) - 1})")
+    assert pieces[-1] == str(small)
+    for part in parts:
+        for block in part.path.read_text().split("```python\n")[1:]:
+            contents.append(block.rsplit("\n```", 1)[0])
+    assert "".join(contents[:-1]) == files_data[0]["content"]
+
+
+def _sections(parts):
+    for part in parts:
+        for line in part.path.read_text().splitlines():
+            if line.startswith("## File: "):
+                yield line[len("## File: "):]
+
+
+def test_write_split_markdown_rejects_a_too_small_limit(tmp_path):
+    files_data = process_files(_create_files(tmp_path), False, False, False, {})
+    with pytest.raises(ValueError):
+        write_split_markdown(files_data, False, tmp_path / "out.md", 100, len)
+
+
+def test_split_part_path():
+    assert split_part_path("dir/out.md", 12).as_posix() == "dir/out.012.md"
+    assert split_part_path("out", 1).as_posix() == "out.001"
@@ -1,3 +1,9 @@
+import os
+from unittest.mock import patch
+
+from jinja2 import Environment
+
+from code2prompt.core import template_processor
 from code2prompt.core.template_processor import process_template
 
 def test_include_feature(tmp_path):
@@ -88,6 +94,39 @@ def test_include_with_files_data(tmp_path):
     result = process_template(template_content, files_data, user_inputs, str(main_template))
     assert result == "Main: Sub: test_file.py"
 
+def test_include_changes_are_picked_up_across_renders(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    main_template = tmp_path / "main.j2"
+    main_template.write_text("Main: {% include 'sub.j2' %}")
+    sub_template = tmp_path / "sub.j2"
+    sub_template.write_text("Sub: {{ variable }}")
+
+    template_content = main_template.read_text()
+    assert process_template(template_content, [], {"variable": "a"}, str(main_template)) == "Main: Sub: a"
+
+    # The environment is shared, but the include is reloaded once its mtime changes
+    sub_template.write_text("New sub: {{ variable }}")
+    stat = os.stat(sub_template)
+    os.utime(sub_template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert process_template(template_content, [], {"variable": "b"}, str(main_template)) == "Main: New sub: b"
+
+
+def test_templates_are_compiled_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    main_template = tmp_path / "main.j2"
+    main_template.write_text("Main: {% include 'sub.j2' %}")
+    (tmp_path / "sub.j2").write_text("Sub: {{ variable }}")
+    template_content = main_template.read_text()
+
+    process_template(template_content, [], {"variable": "a"}, str(main_template))
+    # The bytecode of the main template and of the include is on disk
+    assert len(list((tmp_path / "cache" / "code2prompt" / "templates").iterdir())) == 2
+
+    template_processor._compile_template.cache_clear()
+    with patch.object(Environment, "compile", side_effect=AssertionError("compiled again")):
+        assert process_template(template_content, [], {"variable": "b"}, main_template) == "Main: Sub: b"
+
+
 #def test_circular_include(tmp_path):
     # Create templates with circular inclusion
 #    template1 = tmp_path / "template1.j2"
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch
-from code2prompt.core.template_processor import get_user_inputs
+from code2prompt.core.template_processor import get_user_inputs, process_template, stream_template, template_uses_file_content, template_uses_file_tokens
 
 @pytest.fixture
 def mock_prompt():
@@ -107,4 +107,45 @@ def test_get_user_inputs_nested_jinja_blocks(mock_prompt):
     mock_prompt.return_value = "user_value"
     result = get_user_inputs(template_content)
     assert result == {"user_var": "user_value"}
-    mock_prompt.assert_called_once_with("Enter value for user_var: ")
\ No newline at end of file
+    mock_prompt.assert_called_once_with("Enter value for user_var: ")
+
+
+def test_stream_template_matches_process_template(tmp_path):
+    template_path = tmp_path / "template.j2"
+    (tmp_path / "footer.j2").write_text("-- {{ files|length }} files --\n")
+    template_content = (
+        "# {{ title }}\n{% for file in files %}## {{ file.path }}\n{{ file.content }}\n{% endfor %}"
+        "{% include 'footer.j2' %}"
+    )
+    files_data = [{"path": f"f{i}.py", "content": f"x = {i}"} for i in range(3)]
+    user_inputs = {"title": "Review"}
+
+    chunks = list(stream_template(template_content, files_data, user_inputs, str(template_path)))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == process_template(
+        template_content, files_data, user_inputs, str(template_path)
+    )
+
+
+def test_stream_template_logs_missing_include(tmp_path):
+    template_path = tmp_path / "template.j2"
+    with patch('code2prompt.core.template_processor.log_error') as mock_log_error:
+        chunks = list(stream_template("{% include 'missing.j2' %}", [], {}, str(template_path)))
+    assert "".join(chunks) == ""
+    mock_log_error.assert_called_once()
+
+
+def test_template_uses_file_tokens():
+    assert template_uses_file_tokens("{% for file in files %}{{ file.tokens }}{% endfor %}")
+    assert template_uses_file_tokens("{{ files | sum(attribute='size') }}{{ files[0]['tokens'] }}")
+    assert template_uses_file_tokens("{% include 'other.j2' %}")
+    assert not template_uses_file_tokens(
+        "{{ input:goal }}{% for file in files %}{{ file.path }}{{ file.content }}{% endfor %}"
+    )
+
+
+def test_template_uses_file_content():
+    assert template_uses_file_content("{% for file in files %}{{ file.content }}{% endfor %}")
+    assert template_uses_file_content("{{ files[0]['content'] }}")
+    assert not template_uses_file_content("{% for file in files %}{{ file.path }} {{ file.size }}{% endfor %}")
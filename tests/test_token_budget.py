@@ -0,0 +1,154 @@
+import logging
+import os
+import time
+
+import pytest
+import tiktoken
+
+from code2prompt.commands.generate import GenerateCommand
+from code2prompt.config import Configuration
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.token_budget import PriorityRules, pack_files, parse_priority_weights
+from code2prompt.utils import encoder_registry
+
+
+def _records(tmp_path, sizes):
+    records = []
+    for name, size in sizes.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x" * size)
+        records.append(FileRecord.from_path(path))
+    return records
+
+
+def _pack(records, budget, rules=None, packer="greedy", frame=10):
+    read = []
+
+    def process(records):
+        for record in records:
+            read.append(record.path.name)
+            yield {"path": str(record.path), "tokens": record.size}
+
+    result = pack_files(
+        records,
+        budget,
+        rules or PriorityRules(),
+        lambda records: [frame] * len(records),
+        process,
+        packer,
+    )
+    return result, read
+
+
+def test_parse_priority_weights():
+    assert parse_priority_weights("src/**:3, tests/*.py:0.5,") == [("src/**", 3.0), ("tests/*.py", 0.5)]
+    assert parse_priority_weights(None) == []
+    for spec in ["src/**", "src/**:high", "*.py:-1", ":2"]:
+        with pytest.raises(ValueError):
+            parse_priority_weights(spec)
+
+
+def test_priority_rules(tmp_path):
+    old, new, big = _records(tmp_path, {"src/old.py": 10, "src/new.py": 10, "big.txt": 3 * 1024})
+    now = time.time()
+    os.utime(old.path, (now - 20 * 86400, now - 20 * 86400))
+    old = FileRecord.from_path(old.path)
+
+    rules = PriorityRules([("src/**", 4), ("*.txt", 0)])
+    assert rules.score(new) == 4
+    assert rules.score(big) == 0
+
+    rules = PriorityRules(recency_half_life=10, size_penalty=1, now=now)
+    assert rules.score(old) == pytest.approx(0.25 / (1 + 10 / 1024), rel=1e-3)
+    assert rules.score(big) == pytest.approx(1 / 4, rel=1e-3)
+
+
+def test_priority_rules_match_below_the_root(tmp_path):
+    root = tmp_path / "src" / "proj"
+    test, source = _records(root, {"tests/a.py": 10, "lib/b.py": 10})
+
+    rules = PriorityRules([("src/**", 3), ("tests/**", 0.5)], roots=[tmp_path, root])
+
+    assert rules.score(test) == 0.5
+    assert rules.score(source) == 1
+
+
+def test_greedy_packs_by_priority_and_keeps_output_order(tmp_path):
+    records = _records(tmp_path, {"a.py": 50, "b.md": 30, "c.py": 40, "d.lock": 5})
+    rules = PriorityRules([("*.py", 2), ("*.lock", 0)])
+
+    result, read = _pack(records, 105, rules)
+
+    assert [file["path"] for file in result.files] == [str(records[0].path), str(records[1].path)]
+    assert result.tokens == 60 + 40
+    assert read == ["a.py", "c.py", "b.md"]
+    assert [(dropped.path.name, dropped.reason) for dropped in result.dropped] == [
+        ("c.py", "needs 50 tokens, 45 left"),
+        ("d.lock", "priority 0"),
+    ]
+
+
+def test_greedy_stops_reading_when_budget_is_exhausted(tmp_path):
+    records = _records(tmp_path, {f"f{i}.py": 20 for i in range(10)})
+
+    result, read = _pack(records, 95, frame=25)
+
+    assert len(result.files) == 2
+    # Once less than a section header is left, files are not read anymore
+    assert read == ["f0.py", "f1.py"]
+    assert "without content" in result.dropped[-1].reason
+
+
+def test_knapsack_maximises_total_priority(tmp_path):
+    records = _records(tmp_path, {"big.py": 60, "small1.py": 45, "small2.py": 45})
+    rules = PriorityRules([("big.py", 1.5)])
+
+    greedy, _ = _pack(records, 100, rules, frame=0)
+    knapsack, _ = _pack(records, 100, rules, packer="knapsack", frame=0)
+
+    assert [file["path"] for file in greedy.files] == [str(records[0].path)]
+    assert [file["path"] for file in knapsack.files] == [str(records[1].path), str(records[2].path)]
+    assert knapsack.dropped[0].path.name == "big.py"
+
+
+def test_pack_files_reports_undecodable_files(tmp_path):
+    records = _records(tmp_path, {"a.py": 1, "b.py": 1, "c.py": 1})
+
+    def process(records):
+        for record in records:
+            if record.path.name != "b.py":
+                yield {"path": str(record.path), "tokens": 1}
+
+    result = pack_files(records, 100, PriorityRules(), lambda r: [0] * len(r), process)
+
+    assert len(result.files) == 2
+    assert result.dropped == [(records[1].path, "not valid UTF-8")]
+
+
+def test_generate_respects_max_tokens(tmp_path, monkeypatch):
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+    records = _records(tmp_path, {f"src/f{i}.py": 300 for i in range(10)})
+    records += _records(tmp_path, {f"tests/t{i}.py": 100 for i in range(10)})
+    output = tmp_path / "out.md"
+    config = Configuration(
+        path=[record.path for record in records],
+        output=output,
+        max_tokens=8000,
+        priority="tests/**:2",
+    )
+
+    GenerateCommand(config, logging.getLogger(__name__), file_records=records).execute()
+
+    content = output.read_text()
+    assert len(content.encode("utf-8")) <= 8000
+    assert all(f"tests/t{i}.py" in content for i in range(10))
+    assert "src/f0.py" in content
+    assert "src/f9.py" not in content
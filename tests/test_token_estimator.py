@@ -0,0 +1,97 @@
+import logging
+import random
+import re
+
+import tiktoken
+
+from code2prompt.commands.generate import GenerateCommand
+from code2prompt.config import Configuration
+from code2prompt.core.file_record import FileRecord
+from code2prompt.core.token_estimator import MIN_SAMPLE_PER_LANGUAGE, estimate_tokens
+from code2prompt.utils import encoder_registry
+from code2prompt.utils.count_tokens import count_tokens
+
+
+def _records(tmp_path, sizes):
+    records = []
+    for name, size in sizes.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x" * size)
+        records.append(FileRecord.from_path(path))
+    return records
+
+
+def _language(record):
+    return record.path.suffix
+
+
+def test_estimate_is_exact_when_every_file_is_sampled(tmp_path):
+    records = _records(tmp_path, {"a.py": 40, "b.py": 80, "c.md": 32})
+    measured = []
+
+    def measure(sample):
+        measured.extend(sample)
+        return [(record.size // 4, 10) for record in sample]
+
+    estimate = estimate_tokens(records, _language, measure, fixed_tokens=7)
+
+    assert estimate.tokens == estimate.low == estimate.high == 7 + (10 + 20 + 8) + 3 * 10
+    assert estimate.sampled == estimate.files == 3
+    assert sorted(record.path.name for record in measured) == ["a.py", "b.py", "c.md"]
+    assert [language.bytes_per_token for language in estimate.languages] == [4, 4]
+
+
+def test_estimate_samples_by_size_and_covers_the_truth(tmp_path):
+    rng = random.Random(1)
+    sizes = {f"src/f{i}.py": rng.randint(100, 5000) for i in range(600)}
+    sizes.update({f"docs/d{i}.md": rng.randint(100, 400) for i in range(50)})
+    records = _records(tmp_path, sizes)
+    # Markdown packs more bytes per token, with noise
+    noise = {record.path: rng.uniform(0.9, 1.1) for record in records}
+
+    def measure(sample):
+        return [
+            (round(record.size / (3 if record.path.suffix == ".py" else 5) * noise[record.path]), 12)
+            for record in sample
+        ]
+
+    truth = sum(content + frame for content, frame in measure(records))
+    estimate = estimate_tokens(records, _language, measure, sample_size=100)
+
+    assert estimate.low <= truth <= estimate.high
+    assert (estimate.high - estimate.low) / truth < 0.1
+    by_language = {language.language: language for language in estimate.languages}
+    assert by_language[".md"].sampled == MIN_SAMPLE_PER_LANGUAGE
+    assert by_language[".py"].sampled > 90
+    assert estimate == estimate_tokens(records, _language, measure, sample_size=100)
+
+
+def test_generate_estimate_reads_only_the_sample(tmp_path, monkeypatch, capsys):
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    monkeypatch.setattr(encoder_registry, "_encoders", {})
+    records = _records(tmp_path, {f"src/f{i}.py": 100 + i for i in range(300)})
+    output = tmp_path / "out.md"
+    config = Configuration(path=[record.path for record in records], output=output, estimate=True)
+    read = []
+    text = FileRecord.text
+    monkeypatch.setattr(FileRecord, "text", lambda self: read.append(self.path) or text(self))
+
+    GenerateCommand(config, logging.getLogger(__name__), file_records=records).execute()
+
+    assert not output.exists()
+    assert len(read) <= 210
+    match = re.search(r"Estimated tokens: ([\d,]+) \(95% interval: ([\d,]+) - ([\d,]+)\)", capsys.readouterr().err)
+    tokens, low, high = (int(group.replace(",", "")) for group in match.groups())
+
+    config = Configuration(path=[record.path for record in records], output=output)
+    GenerateCommand(config, logging.getLogger(__name__), file_records=records).execute()
+    truth = count_tokens(output.read_text(), "cl100k_base")
+    assert low <= truth <= high
+    assert abs(tokens - truth) / truth < 0.01
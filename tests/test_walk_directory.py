@@ -0,0 +1,140 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from code2prompt.core.file_path_retriever import retrieve_file_paths
+from code2prompt.core.walk_directory import walk_directory
+from code2prompt.utils.filter_spec import FilterSpec
+from code2prompt.utils.get_gitignore_patterns import get_gitignore_matcher
+from code2prompt.utils.gitignore_matcher import GitignoreMatcher
+
+
+def _create_tree(root: Path):
+    for relative in [
+        "b.py",
+        "a/z.py",
+        "a/a.py",
+        "node_modules/pkg/index.js",
+        "build/out.o",
+        "src/main.py",
+        "src/generated/api.py",
+    ]:
+        file_path = root / relative
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("x")
+
+
+def _relative(root: Path, entries):
+    return [Path(entry.path).relative_to(root).as_posix() for entry in entries]
+
+
+def test_walk_directory_sorted_without_rules(tmp_path):
+    _create_tree(tmp_path)
+    assert _relative(tmp_path, walk_directory(tmp_path)) == [
+        "a/a.py",
+        "a/z.py",
+        "b.py",
+        "build/out.o",
+        "node_modules/pkg/index.js",
+        "src/generated/api.py",
+        "src/main.py",
+    ]
+
+
+def test_walk_directory_prunes_ignored_directories(tmp_path, monkeypatch):
+    _create_tree(tmp_path)
+    scanned = []
+    original_scandir = __import__("os").scandir
+
+    def tracking_scandir(path):
+        scanned.append(Path(path).relative_to(tmp_path).as_posix())
+        return original_scandir(path)
+
+    monkeypatch.setattr("code2prompt.core.walk_directory.os.scandir", tracking_scandir)
+    matcher = GitignoreMatcher.from_patterns(["node_modules/", "/build"])
+
+    result = _relative(tmp_path, walk_directory(tmp_path, matcher, FilterSpec.compile(exclude_patterns="**/generated/**")))
+
+    assert result == ["a/a.py", "a/z.py", "b.py", "src/main.py"]
+    assert "node_modules" not in scanned
+    assert "build" not in scanned
+    assert "src/generated" not in scanned
+
+
+def test_walk_directory_nested_gitignore(tmp_path):
+    _create_tree(tmp_path)
+    (tmp_path / "src" / ".gitignore").write_text("generated/\n")
+    (tmp_path / "a" / ".gitignore").write_text("*.py\n!a.py\n")
+    matcher = GitignoreMatcher.from_patterns(["node_modules/", "/build"])
+
+    result = _relative(tmp_path, walk_directory(tmp_path, matcher))
+
+    assert result == ["a/.gitignore", "a/a.py", "b.py", "src/.gitignore", "src/main.py"]
+
+
+@pytest.mark.parametrize("workers", [2, 8])
+def test_walk_directory_parallel_matches_serial(tmp_path, workers):
+    _create_tree(tmp_path)
+    for i in range(20):
+        nested = tmp_path / "deep" / f"d{i % 4}" / f"e{i}"
+        nested.mkdir(parents=True, exist_ok=True)
+        (nested / f"f{i}.txt").write_text("x")
+    (tmp_path / "src" / ".gitignore").write_text("generated/\n")
+    (tmp_path / "deep" / "d1" / ".gitignore").write_text("*.txt\n")
+    matcher = GitignoreMatcher.from_patterns(["node_modules/"])
+    filter_spec = FilterSpec.compile(exclude_patterns="**/d2/**")
+
+    serial = _relative(tmp_path, walk_directory(tmp_path, matcher, filter_spec))
+    parallel = _relative(
+        tmp_path, walk_directory(tmp_path, matcher, filter_spec, workers=workers)
+    )
+
+    assert parallel == serial
+    assert "deep/d0/e0/f0.txt" in parallel
+    assert "deep/d1/.gitignore" in parallel
+    assert not any(p.startswith("deep/d1/e") for p in parallel)
+    assert not any(p.startswith(("deep/d2/", "src/generated/")) for p in parallel)
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_walk_directory_matches_git_ls_files(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    _create_tree(tmp_path)
+    (tmp_path / ".gitignore").write_text("node_modules/\n*.o\n")
+    (tmp_path / "src" / ".gitignore").write_text("generated/\n!/main.py\n")
+    (tmp_path / "a" / ".gitignore").write_text("z.*\n")
+    (tmp_path / ".git" / "info" / "exclude").write_text("b.py\n")
+
+    listed = subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard"],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+
+    matcher = get_gitignore_matcher(tmp_path, None)
+    assert _relative(tmp_path, walk_directory(tmp_path, matcher)) == sorted(listed)
+
+
+def test_patterns_do_not_match_directories_above_the_root(tmp_path):
+    root = tmp_path / "docs" / "proj"
+    _create_tree(root)
+    (root / "docs").mkdir()
+    (root / "docs" / "guide.md").write_text("x")
+
+    spec = FilterSpec.compile("", "docs/*,proj/*")
+    walked = _relative(root, walk_directory(root, None, spec))
+    assert "b.py" in walked and "src/main.py" in walked
+    assert "docs/guide.md" not in walked
+
+    def retrieve(filter_patterns, exclude_patterns):
+        paths = retrieve_file_paths([root], filter_patterns, exclude_patterns, False, None)
+        return sorted(path.relative_to(root).as_posix() for path in paths)
+
+    everything = retrieve([], [])
+    assert "b.py" in everything
+    assert retrieve([], ["docs/*"]) == [path for path in everything if path != "docs/guide.md"]
+    assert retrieve(["docs/*"], []) == ["docs/guide.md"]
@@ -0,0 +1,143 @@
+import logging
+import os
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from code2prompt.commands.watch import WatchCommand
+from code2prompt.config import Configuration
+from code2prompt.core.file_watcher import InotifyWatcher, PollingWatcher
+from code2prompt.core.process_files import process_files
+from code2prompt.main import cli
+from code2prompt.utils.generate_markdown_content import generate_markdown_content
+
+
+def _create_tree(root):
+    (root / "src").mkdir()
+    (root / "src" / "a.py").write_text("a = 1\n")
+    (root / "src" / "b.py").write_text("b = 2\n")
+    (root / "README.md").write_text("# Readme\n")
+    (root / ".gitignore").write_text("*.log\n")
+
+
+def _command(tmp_path, **options):
+    config = Configuration(path=[tmp_path / "project"], output=tmp_path / "out.md", **options)
+    return WatchCommand(config, logging.getLogger(__name__))
+
+
+def _expected(root, paths):
+    files_data = process_files([root / p for p in paths], False, False, False, {})
+    return generate_markdown_content(files_data, False)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    _create_tree(root)
+    return root
+
+
+def test_watch_build_matches_generate(tmp_path, project):
+    command = _command(tmp_path)
+    command.build()
+    expected = _expected(project, [".gitignore", "README.md", "src/a.py", "src/b.py"])
+    assert (tmp_path / "out.md").read_text() == expected
+
+
+def test_watch_update_reprocesses_touched_files(tmp_path, project, monkeypatch):
+    monkeypatch.setattr(
+        "code2prompt.commands.watch.count_tokens", lambda text, encoding: len(text.split())
+    )
+    command = _command(tmp_path, tokens=True)
+    command.build()
+    tokens_before = command.token_count
+
+    processed = []
+    original_load = WatchCommand._load
+
+    def tracking_load(self, path, entry=None, cache=None):
+        processed.append(os.path.relpath(path, project))
+        return original_load(self, path, entry, cache)
+
+    monkeypatch.setattr(WatchCommand, "_load", tracking_load)
+    (project / "src" / "a.py").write_text("a = 10\n")
+    assert command.update({str(project / "src" / "a.py")})
+
+    assert processed == [os.path.join("src", "a.py")]
+    output = (tmp_path / "out.md").read_text()
+    assert output == _expected(project, [".gitignore", "README.md", "src/a.py", "src/b.py"])
+    full = _expected(project, [".gitignore", "README.md", "src/a.py", "src/b.py"])
+    assert command.token_count == tokens_before == len(full.split())
+
+
+def test_watch_update_adds_and_removes_files(tmp_path, project):
+    command = _command(tmp_path)
+    command.build()
+
+    (project / "src" / "c.py").write_text("c = 3\n")
+    (project / "debug.log").write_text("ignored\n")
+    (project / "src" / "b.py").unlink()
+    changed = {str(project / "src" / name) for name in ("c.py", "b.py")}
+    changed.add(str(project / "debug.log"))
+
+    assert command.update(changed)
+    expected = _expected(project, [".gitignore", "README.md", "src/a.py", "src/c.py"])
+    assert (tmp_path / "out.md").read_text() == expected
+
+
+def test_watch_update_skips_ignored_and_filtered_paths(tmp_path, project, monkeypatch):
+    command = _command(tmp_path, exclude="*.swp")
+    command.build()
+    monkeypatch.setattr(WatchCommand, "_discover", lambda self: pytest.fail("rescanned"))
+
+    (project / "debug.log").write_text("ignored\n")
+    (project / "src" / ".a.py.swp").write_text("swap\n")
+    (project / "src" / "gone.tmp").write_text("x")
+    (project / "src" / "gone.tmp").unlink()
+    changed = {str(project / name) for name in ("debug.log", "src/.a.py.swp", "src/gone.tmp")}
+    assert not command.update(changed)
+
+    # Rules of the .gitignore files below the root apply too
+    (project / "build").mkdir()
+    (project / "build" / ".gitignore").write_text("*.o\n")
+    (project / "build" / "out.o").write_text("x")
+    assert not command.update({str(project / "build" / "out.o")})
+
+
+@pytest.mark.parametrize("option", [["--max-tokens", "100"], ["--dedupe"], ["--split-tokens", "100"], ["--stream"]])
+def test_watch_rejects_unsupported_options(tmp_path, project, option):
+    result = CliRunner().invoke(
+        cli, [*option, "watch", "--path", str(project), "--output", str(tmp_path / "out.md")]
+    )
+    assert result.exit_code == 2
+    assert f"watch does not support {option[0]}" in result.output
+
+
+def test_polling_watcher_reports_changed_files(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("a")
+    signatures = {"value": {str(path): (1, 1, 1)}}
+    watcher = PollingWatcher(lambda: dict(signatures["value"]), interval=0.01)
+
+    assert watcher.changes(timeout=0.05) == set()
+    signatures["value"] = {str(path): (2, 2, 1), str(tmp_path / "b.py"): (1, 1, 2)}
+    assert watcher.changes(timeout=1.0) == {str(path), str(tmp_path / "b.py")}
+
+
+def test_inotify_watcher_reports_changed_files(tmp_path):
+    try:
+        watcher = InotifyWatcher()
+    except (OSError, AttributeError):
+        pytest.skip("inotify is not available")
+    try:
+        watcher.watch([str(tmp_path)])
+        (tmp_path / "a.py").write_text("a")
+        deadline = time.monotonic() + 2
+        changed = set()
+        while str(tmp_path / "a.py") not in changed and time.monotonic() < deadline:
+            changed |= watcher.changes(timeout=0.5)
+        assert str(tmp_path / "a.py") in changed
+    finally:
+        watcher.close()